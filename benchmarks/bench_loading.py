@@ -0,0 +1,103 @@
+"""
+Benchmark CSV loading: peak RSS and load time of the untyped and typed paths.
+
+The CSV is generated and each mode loads it in a fresh subprocess: a forked
+child inherits the peak RSS of its parent, so the parent stays small.
+
+Usage:
+    python benchmarks/bench_loading.py --rows 2000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cleaner.data_quality import ingestion  # noqa: E402
+
+MODES = {
+    "untyped": {"typed": False, "engine": "c"},
+    "typed": {"typed": True, "engine": "c"},
+    "typed-pyarrow": {"typed": True, "engine": "pyarrow"},
+}
+
+
+def make_csv(path, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({
+        "id": np.arange(rows),
+        "country": rng.choice(["France", "Morocco", "Spain", "Germany", "Italy"], rows),
+        "status": rng.choice(["active", "inactive", "pending"], rows),
+        "email": [f"user{i}@example.com" for i in rng.integers(0, rows, rows)],
+        "amount": rng.random(rows) * 1000,
+    }).to_csv(path, index=False)
+
+
+def run_mode(path, mode):
+    """Load the file in this process and report the peak RSS of the process."""
+    options = MODES[mode]
+    start = time.perf_counter()
+    df = ingestion.load_csv(path, typed=options["typed"], engine=options["engine"])
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "rows": len(df),
+        "seconds": round(elapsed, 3),
+        "frame_mb": round(df.memory_usage(deep=True).sum() / 2**20, 1),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "dtypes": {column: str(dtype) for column, dtype in df.dtypes.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--path", help="Existing CSV file to load instead of a generated one")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--generate", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.generate:
+        make_csv(args.path, args.rows)
+        return
+    if args.mode:
+        print(json.dumps(run_mode(args.path, args.mode)))
+        return
+
+    path = args.path
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "bench_loading.csv")
+        subprocess.run(
+            [sys.executable, __file__, "--path", path, "--rows", str(args.rows), "--generate"], check=True
+        )
+
+    results = []
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, __file__, "--path", path, "--mode", mode],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(json.dumps({
+        "benchmark": "csv_loading",
+        "file_mb": round(os.path.getsize(path) / 2**20, 1),
+        "results": results,
+    }, indent=2))
+
+    if args.path is None:
+        ingestion.remove_spooled_file(path)
+
+
+if __name__ == "__main__":
+    main()
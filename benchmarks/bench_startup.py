@@ -0,0 +1,100 @@
+"""
+Benchmark process startup: the time a fresh process takes to load the app, with and without a model client.
+
+Each case runs in a fresh subprocess, --repeat times, and reports its best
+and median time and whether google.generativeai was imported. No prompt is
+sent over the network: `gemini_client` only creates the client, as the first
+model call of a process would.
+
+Usage:
+    python benchmarks/bench_startup.py --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _setup():
+    import django
+
+    django.setup()
+    import cleaner.urls  # noqa: F401  (views, analysis and the LLM module, as a web process loads them)
+
+
+def _first_offline_call():
+    _setup()
+    from cleaner.ai_checks import llm
+
+    llm.identify_id_column_prompt(["id", "name"])
+
+
+def _gemini_client():
+    _setup()
+    from cleaner.ai_checks import llm
+
+    llm.get_provider()._client()
+
+
+# Case -> (code run in the subprocess, extra environment)
+CASES = {
+    "django_setup": (_setup, {}),
+    "first_offline_call": (_first_offline_call, {"LLM_PROVIDER": "offline"}),
+    "gemini_client": (_gemini_client, {"LLM_PROVIDER": "gemini"}),
+}
+
+
+def run_case(name):
+    """Run one case in this process and report its time."""
+    start = time.perf_counter()
+    CASES[name][0]()
+    return {
+        "seconds": round(time.perf_counter() - start, 4),
+        "genai_imported": "google.generativeai" in sys.modules,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--case", choices=CASES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        sys.path.insert(0, ROOT)
+        print(json.dumps(run_case(args.case)))
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, (_, extra_env) in CASES.items():
+            env = dict(
+                os.environ, DJANGO_SETTINGS_MODULE="csv_cleaner.settings",
+                LLM_CACHE_PATH=os.path.join(directory, f"{name}.sqlite3"), **extra_env,
+            )
+            runs = []
+            for _ in range(args.repeat):
+                output = subprocess.run(
+                    [sys.executable, __file__, "--case", name],
+                    check=True, capture_output=True, text=True, env=env, cwd=ROOT,
+                ).stdout
+                runs.append(json.loads(output.strip().splitlines()[-1]))
+            times = [run["seconds"] for run in runs]
+            results[name] = {
+                "seconds": min(times),
+                "median_seconds": round(statistics.median(times), 4),
+                "genai_imported": runs[-1]["genai_imported"],
+            }
+            print(f"{name}: {results[name]}", file=sys.stderr)
+
+    print(json.dumps({"benchmark": "startup", "repeat": args.repeat, "cases": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark uniqueness_check on a single high-cardinality column.
+
+Usage:
+    python benchmarks/bench_uniqueness.py --rows 10000000 --cardinality 1000000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cleaner.data_quality.checks import uniqueness_check  # noqa: E402
+
+
+def make_frame(rows, cardinality, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "id": np.arange(rows),
+        "value": rng.integers(0, cardinality, rows),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--cardinality", type=int, default=1_000_000)
+    parser.add_argument("--max-ids-per-group", type=int, default=100)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, args.cardinality)
+
+    start = time.perf_counter()
+    results_df, score, total_duplicates = uniqueness_check(
+        df,
+        columns=["value"],
+        id_column="id",
+        total_fields=len(df),
+        max_ids_per_group=args.max_ids_per_group,
+    )
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "benchmark": "uniqueness_check",
+        "rows": args.rows,
+        "cardinality": args.cardinality,
+        "max_ids_per_group": args.max_ids_per_group,
+        "duplicate_groups": len(results_df),
+        "total_duplicates": int(total_duplicates),
+        "seconds": round(elapsed, 3),
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Benchmark suite for the data quality checks and the upload-to-dashboard flow.
+
+Times each check on an in-memory DataFrame and on a CSV file, and the full
+home -> worker -> dashboard flow through Django's test client, on a synthetic
+dataset with the LLM replaced by a deterministic local stub. Each case reports
+its best time over --repeat runs and the peak memory traced by tracemalloc in
+one more run. Results are written as JSON and can be compared with a stored
+baseline; timings depend on the machine, so compare against a baseline
+recorded on the same one.
+
+Usage:
+    python benchmarks/run_suite.py --rows 200000 --output results.json
+    python benchmarks/run_suite.py --baseline benchmarks/baseline.json --fail-on-regression
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS))
+sys.path.insert(0, BENCHMARKS)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "csv_cleaner.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.files.uploadedfile import SimpleUploadedFile  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from cleaner.data_quality import checks, sketches  # noqa: E402
+from pandas.api.types import is_numeric_dtype  # noqa: E402
+from cleaner.jobs import run_pending_jobs  # noqa: E402
+from cleaner.models import AnalysisJob  # noqa: E402
+from stub_llm import stub_llm  # noqa: E402
+from synthetic import write_dataset  # noqa: E402
+
+
+def measure(function, repeat):
+    """Best wall time of `repeat` calls, then the traced peak memory of one more call."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(min(times), 4), "peak_mb": round(peak / 2**20, 2)}
+
+
+def check_cases(df, path, chunksize):
+    columns = list(df.columns)
+    categorical = [column for column in columns if column.startswith("cat_")]
+    text_columns = [column for column in columns if column != "id" and not is_numeric_dtype(df[column])]
+    total_fields = df.size
+    return {
+        "uniqueness_check": lambda: checks.uniqueness_check(
+            df, columns, "id", total_fields, max_ids_per_group=settings.UNIQUENESS_MAX_IDS_PER_GROUP
+        ),
+        "completeness_check": lambda: checks.completeness_check(df, total_fields),
+        "near_duplicate_check": lambda: checks.near_duplicate_check(
+            df, text_columns, "id", max_ids_per_group=settings.UNIQUENESS_MAX_IDS_PER_GROUP
+        ),
+        "near_duplicate_check_fuzzy": lambda: checks.near_duplicate_check(
+            df, text_columns, "id", fuzzy=True, max_ids_per_group=settings.UNIQUENESS_MAX_IDS_PER_GROUP
+        ),
+        "check_categorical_validity_ai": lambda: checks.check_categorical_validity_ai(
+            df, categorical, "id", total_fields
+        ),
+        "accuracy_check": lambda: checks.accuracy_check(df, [column for column in columns if column != "id"]),
+        "consistency_check": lambda: checks.consistency_check(df, text_columns),
+        "timeliness_check": lambda: checks.timeliness_check(df, columns, freshness_days=365),
+        "uniqueness_check_chunked": lambda: checks.uniqueness_check_chunked(
+            path, columns, "id", total_fields, chunksize=chunksize,
+            max_ids_per_group=settings.UNIQUENESS_MAX_IDS_PER_GROUP,
+        ),
+        "uniqueness_check_approximate": lambda: checks.uniqueness_check_chunked(
+            path, columns, "id", total_fields, chunksize=chunksize,
+            profile=sketches.sketch_file(path, chunksize=chunksize),
+        ),
+        "completeness_check_chunked": lambda: checks.completeness_check_chunked(
+            path, total_fields, chunksize=chunksize
+        ),
+        "check_categorical_validity_ai_chunked": lambda: checks.check_categorical_validity_ai_chunked(
+            path, categorical, "id", total_fields, chunksize=chunksize
+        ),
+    }
+
+
+def flow_cases(content):
+    """The upload, the worker's analysis and the dashboard render of one file, as separate cases."""
+    client = Client()
+    state = {}
+
+    def upload():
+        AnalysisJob.objects.all().delete()  # no reuse of a previous run's results
+        response = client.post(reverse("home"), {"csv_file": SimpleUploadedFile("bench.csv", content)})
+        state["dashboard"] = response.url
+
+    def analyse():
+        upload()
+        run_pending_jobs()
+
+    def render():
+        # Runs after flow_upload_and_analysis, so the latest job is finished
+        response = client.get(state["dashboard"])
+        assert response.status_code == 200
+
+    def full_flow():
+        analyse()
+        render()
+
+    return {
+        "flow_upload": upload,
+        "flow_upload_and_analysis": analyse,
+        "flow_dashboard_render": render,
+        "flow_total": full_flow,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Ratio of each case's time to the baseline's, flagging those slower than 1 + tolerance."""
+    regressions = []
+    for name, result in results["cases"].items():
+        reference = baseline.get("cases", {}).get(name)
+        if not reference or not reference.get("seconds"):
+            continue
+        result["baseline_seconds"] = reference["seconds"]
+        result["ratio"] = round(result["seconds"] / reference["seconds"], 3)
+        if result["ratio"] > 1 + tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--cardinality", type=int, default=20)
+    parser.add_argument("--null-rate", type=float, default=0.05)
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-flow", action="store_true", help="Only time the checks")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    parameters = {
+        "rows": args.rows,
+        "columns": args.columns,
+        "cardinality": args.cardinality,
+        "null_rate": args.null_rate,
+        "duplicate_rate": args.duplicate_rate,
+        "seed": args.seed,
+    }
+    results = {
+        "benchmark": "suite",
+        "parameters": parameters,
+        "python": platform.python_version(),
+        "cases": {},
+    }
+
+    with tempfile.TemporaryDirectory() as directory, stub_llm():
+        path = os.path.join(directory, "bench.csv")
+        df = write_dataset(path, **parameters)
+        results["file_mb"] = round(os.path.getsize(path) / 2**20, 2)
+
+        cases = check_cases(df, path, settings.CSV_CHUNK_SIZE)
+        if not args.skip_flow:
+            setup_test_environment()
+            connection.creation.create_test_db(verbosity=0)
+            with open(path, "rb") as handle:
+                content = handle.read()
+            flow_settings = override_settings(
+                ANALYSIS_RUN_WORKERS_IN_PROCESS=False,
+                CSV_UPLOAD_DIR=os.path.join(directory, "uploads"),
+            )
+            flow_settings.enable()
+            cases.update(flow_cases(content))
+
+        for name, function in cases.items():
+            results["cases"][name] = measure(function, args.repeat)
+            print(f"{name}: {results['cases'][name]}", file=sys.stderr)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as handle:
+            regressions = compare(results, json.load(handle), args.tolerance)
+        results["regressions"] = regressions
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(output + "\n")
+    print(output)
+
+    if regressions and args.fail_on_regression:
+        sys.exit(f"Slower than the baseline: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Deterministic local stand-in for the Gemini model, so benchmarks never hit the network.
+
+Answers are derived from the prompt itself: columns named `cat_*` are
+categorical, `id` is the ID column, and values starting with `invalid` are
+invalid.
+"""
+import contextlib
+import os
+import re
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+QUOTED = re.compile(r"'((?:[^'\\]|\\.)*)'")
+
+
+def _quoted_after(prompt, marker):
+    """Quoted strings of the last list following `marker` in the prompt."""
+    segment = prompt.rsplit(marker, 1)[-1]
+    return QUOTED.findall(segment.split("]", 1)[0])
+
+
+class StubModel:
+    name = "stub"
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt, temperature, timeout):
+        self.calls += 1
+        if "unique values from my categorical column:" in prompt:
+            values = _quoted_after(prompt, "unique values from my categorical column:")
+            text = repr([value for value in values if value.startswith("invalid")])
+        elif "categorical column names" in prompt:
+            columns = _quoted_after(prompt, "Column names:")
+            text = repr([column for column in columns if column.startswith("cat_")])
+        elif "ID-related column" in prompt:
+            text = "id"
+        else:
+            text = "[]"
+        return SimpleNamespace(text=text)
+
+
+@contextlib.contextmanager
+def stub_llm():
+    """Route every model call to a StubModel, with an empty response cache in a temporary directory."""
+    from cleaner.ai_checks import llm
+    from cleaner.ai_checks.cache import LLMCache
+
+    with tempfile.TemporaryDirectory() as directory:
+        model = StubModel()
+        cache = LLMCache(os.path.join(directory, "cache.sqlite3"))
+        with mock.patch.object(llm, "provider", model), mock.patch.object(llm, "llm_cache", cache), \
+                mock.patch.dict(os.environ, {"LLM_RETRY_BACKOFF": "0"}):
+            yield model
@@ -0,0 +1,64 @@
+"""
+Synthetic datasets for the benchmarks.
+
+Every generator is seeded, so the same parameters always produce the same file.
+"""
+import numpy as np
+import pandas as pd
+
+# Share of categorical cells replaced by a value the stub LLM flags as invalid
+INVALID_RATE = 0.01
+
+
+def make_dataset(rows=100_000, columns=8, cardinality=20, null_rate=0.05, duplicate_rate=0.1, seed=0):
+    """
+    Build a DataFrame with an `id` column followed by `columns` data columns.
+
+    Data columns cycle through three kinds: categorical (`cat_*`, `cardinality`
+    labels plus a few invalid ones), numeric (`num_*`) and free text (`text_*`,
+    mostly distinct values).
+
+    Args:
+        rows (int): Number of rows.
+        columns (int): Number of data columns besides `id`.
+        cardinality (int): Distinct labels per categorical column.
+        null_rate (float): Share of data cells left empty.
+        duplicate_rate (float): Share of rows copied from another row (with their own ID).
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: The dataset.
+    """
+    rng = np.random.default_rng(seed)
+    data = {"id": np.arange(rows)}
+    labels = np.array([f"label_{i}" for i in range(cardinality)], dtype=object)
+    for index in range(columns):
+        kind = index % 3
+        if kind == 0:
+            values = labels[rng.integers(0, cardinality, rows)]
+            invalid = rng.random(rows) < INVALID_RATE
+            values[invalid] = "invalid_" + rng.integers(0, 3, invalid.sum()).astype(str).astype(object)
+            data[f"cat_{index}"] = values
+        elif kind == 1:
+            data[f"num_{index}"] = rng.normal(100, 15, rows).round(2)
+        else:
+            data[f"text_{index}"] = "text " + rng.integers(0, rows * 10, rows).astype(str).astype(object)
+    df = pd.DataFrame(data)
+
+    # Copy whole rows over other rows, keeping their IDs
+    copies = rng.random(rows) < duplicate_rate
+    sources = rng.integers(0, rows, copies.sum())
+    data_columns = df.columns[1:]
+    df.loc[copies, data_columns] = df.loc[sources, data_columns].to_numpy()
+
+    # Blank out cells at random
+    for column in data_columns:
+        df.loc[rng.random(rows) < null_rate, column] = None
+    return df
+
+
+def write_dataset(path, **parameters):
+    """Generate a dataset with make_dataset and write it to `path` as CSV."""
+    df = make_dataset(**parameters)
+    df.to_csv(path, index=False)
+    return df
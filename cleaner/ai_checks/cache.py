@@ -0,0 +1,138 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_TTL = 7 * 24 * 3600  # one week
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 64 MB
+
+
+class LLMCache:
+    """
+    Persistent, content-addressed cache of LLM responses stored in SQLite.
+
+    Entries are keyed on a hash of the model name, the generation settings and
+    the full prompt (template plus input), expire after `ttl` seconds, and the
+    least recently used entries are evicted once the stored responses exceed
+    `max_bytes`. A new connection is opened per operation, so one cache file can
+    be shared by threads and worker processes.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._initialize()
+
+    @contextlib.contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def _initialize(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+
+    @staticmethod
+    def make_key(model_name, prompt, **settings):
+        """Content address of a model call."""
+        payload = json.dumps([model_name, settings, prompt], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached response for `key`, or None on a miss or an expired entry."""
+        now = time.time()
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                connection.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                connection.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return None if row is None else row[0]
+
+    def set(self, key, response):
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            self._evict(connection, now)
+
+    def _evict(self, connection, now):
+        if self.ttl is not None:
+            connection.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+        if self.max_bytes is None:
+            return
+
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in connection.execute("SELECT key, size FROM llm_cache ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        connection.executemany("DELETE FROM llm_cache WHERE key = ?", evicted)
+        logging.info(f"Evicted {len(evicted)} LLM cache entries")
+
+    def clear(self):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM llm_cache")
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Hit/miss counters of this process and the current size of the cache."""
+        with self._connect() as connection:
+            entries, size = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
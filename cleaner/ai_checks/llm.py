@@ -1,27 +1,125 @@
-import google.generativeai as genai
-from dotenv import load_dotenv
 import os
 import logging
 import ast
+import contextvars
+import json
+import math
+import re
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-# Configure logging
-logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
+from .cache import LLMCache, DEFAULT_TTL, DEFAULT_MAX_BYTES
+from .providers import load_provider
+from ..instrumentation import metrics, span
 
-# Specify the model to use (e.g., "gemini-2.5-flash")
-load_dotenv()
+TEMPERATURE = 0.6
+provider = None
+_provider_lock = threading.Lock()
+llm_cache = None
+_cache_lock = threading.Lock()
+
+# Environment variables configuring model calls -> (default, type). They are read when a
+# value is needed, not at import, so the environment (and the .env file loaded by the
+# settings) can still change before the first model call.
+LLM_ENVIRONMENT = {
+    # Backend answering the prompts: "gemini", "offline" (no network, finds nothing) or the dotted
+    # path of a provider class (see providers.py). It is created on the first model call.
+    "LLM_PROVIDER": ("gemini", str),
+    # Concurrency, per-call timeout (seconds) and retry policy of model calls
+    "LLM_MAX_CONCURRENCY": (8, int),
+    "LLM_TIMEOUT": (30, float),
+    "LLM_MAX_RETRIES": (3, int),
+    "LLM_RETRY_BACKOFF": (1.0, float),
+    # Approximate prompt size (tokens) above which a batched request is split in several
+    "LLM_TOKEN_BUDGET": (8000, int),
+    # Responses are reused across renders and uploads with the same prompt. The cache is
+    # opened on the first model call, so importing this module creates no file.
+    "LLM_CACHE_PATH": (os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "llm_cache.sqlite3")), str),
+    "LLM_CACHE_TTL": (DEFAULT_TTL, int),
+    "LLM_CACHE_MAX_BYTES": (DEFAULT_MAX_BYTES, int),
+}
+
+
+def llm_setting(name):
+    """Current value of an LLM_ENVIRONMENT variable."""
+    default, cast = LLM_ENVIRONMENT[name]
+    return cast(os.getenv(name, default))
+
+
+def get_provider():
+    """The LLM_PROVIDER provider, created on first use and shared by every thread."""
+    global provider
+    if provider is None:
+        with _provider_lock:
+            if provider is None:
+                provider = load_provider(llm_setting("LLM_PROVIDER"))
+    return provider
+
+
+def get_cache():
+    """The LLM response cache at LLM_CACHE_PATH, opened on first use and shared by every thread."""
+    global llm_cache
+    if llm_cache is None:
+        with _cache_lock:
+            if llm_cache is None:
+                llm_cache = LLMCache(
+                    llm_setting("LLM_CACHE_PATH"),
+                    ttl=llm_setting("LLM_CACHE_TTL"),
+                    max_bytes=llm_setting("LLM_CACHE_MAX_BYTES"),
+                )
+    return llm_cache
 
-api_key = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=api_key)
-model = genai.GenerativeModel('gemini-2.0-flash')
 
 def generate_ai(input):
-    response = model.generate_content(
-        input,
-        generation_config=genai.types.GenerationConfig(
-            temperature=0.6
-        )
-    )
-    return response.text
+    current = get_provider()
+    cache = get_cache()
+    key = LLMCache.make_key(current.name, input, temperature=TEMPERATURE)
+    with span("llm_call", model=current.name, prompt_bytes=len(input.encode("utf-8"))) as record:
+        text = cache.get(key)
+        record["cached"] = text is not None
+        if text is None:
+            response = _generate_with_retries(current, input)
+            text = response.text
+            cache.set(key, text)
+            # Token counts are only known when the model reports them
+            usage = getattr(response, "usage_metadata", None)
+            record["prompt_tokens"] = getattr(usage, "prompt_token_count", None)
+            record["response_tokens"] = getattr(usage, "candidates_token_count", None)
+            _count_model_call(record, len(text.encode("utf-8")))
+        record["response_bytes"] = len(text.encode("utf-8"))
+
+    metrics.increment("cleaner_llm_calls_total", cached=str(record["cached"]).lower())
+    return text
+
+
+def _count_model_call(record, response_bytes):
+    metrics.increment("cleaner_llm_bytes_total", record["prompt_bytes"], direction="prompt")
+    metrics.increment("cleaner_llm_bytes_total", response_bytes, direction="response")
+    for direction in ("prompt", "response"):
+        if record[f"{direction}_tokens"] is not None:
+            metrics.increment("cleaner_llm_tokens_total", record[f"{direction}_tokens"], direction=direction)
+
+
+def _generate_with_retries(current, input):
+    """Call the model with a per-call timeout, retrying failures with exponential backoff and jitter."""
+    max_retries = llm_setting("LLM_MAX_RETRIES")
+    for attempt in range(max_retries + 1):
+        try:
+            return current.generate(input, temperature=TEMPERATURE, timeout=llm_setting("LLM_TIMEOUT"))
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = llm_setting("LLM_RETRY_BACKOFF") * (2 ** attempt) * (1 + random.random())
+            logging.warning(f"Model call failed ({e}), retrying in {delay:.1f}s")
+            metrics.increment("cleaner_llm_retries_total")
+            time.sleep(delay)
+
+
+def cache_stats():
+    """Hit/miss counters and size of the LLM response cache."""
+    return get_cache().stats()
 
 
 def categorical_columns(columns):
@@ -59,10 +157,9 @@ def categorical_columns(columns):
 
         # Try to evaluate as Python list
         try:
-            print(text_output)
-            categorical_cols = eval(text_output)
+            categorical_cols = ast.literal_eval(text_output)
             if isinstance(categorical_cols, list):
-                print(categorical_cols)
+                logging.info(f"Categorical columns: {categorical_cols}")
                 return categorical_cols
         except Exception:
             pass
@@ -71,11 +168,15 @@ def categorical_columns(columns):
         return []
 
     except Exception as e:
-        print(f"AI error: {e}")
+        logging.exception("An error occurred while classifying columns")
         return []
 
-def invalid_categorical_values(df, column_name):
+def invalid_categorical_values(df, column_name, unique_values=None):
     try:
+        if unique_values is None:
+            unique_values = list(df[column_name].unique())
+        # A stable order lets the same set of values hit the response cache
+        unique_values = sorted(unique_values, key=str)
         prompt = f"""You are a data validation expert. I will provide you with a list of unique values from a categorical column in a dataset. Your task is to analyze the values and determine which ones are likely outliers or invalid based on common patterns and domain knowledge.
         Return only the values that are likely invalid in a list format, if you do not find any invalid values, return empty list. Do not provide explanations, context, or any extra details—just a plain list.
         Step 1: Identify common values that logically belong in the column.
@@ -85,7 +186,7 @@ def invalid_categorical_values(df, column_name):
         user question: my column name: "Gender". unique values from my categorical column: ['F', 'M', 'Female', 'Male', nan, 'said']
         AI: "['F', 'M', 'nan', 'said']"
 
-        user question: my column name: {column_name}. unique values from my categorical column: {list(df[column_name].unique())}
+        user question: my column name: {column_name}. unique values from my categorical column: {list(unique_values)}
         AI:"""
         list_llm = generate_ai(prompt)
         list_llm = ast.literal_eval(list_llm)
@@ -108,4 +209,206 @@ def identify_id_column_prompt(columns):
     user question: column names, {columns} 
     """
 
-    return generate_ai(prompt)
\ No newline at end of file
+    return generate_ai(prompt)
+
+
+def invalid_categorical_values_concurrently(unique_values_by_column, max_workers=None):
+    """
+    Run invalid_categorical_values for several columns at once on a bounded thread pool.
+
+    Args:
+        unique_values_by_column (dict): Column name -> unique values of that column.
+        max_workers (int): Maximum number of concurrent model calls (LLM_MAX_CONCURRENCY if None).
+
+    Returns:
+        dict: Column name -> invalid values (list) or "error", in input order.
+    """
+    if not unique_values_by_column:
+        return {}
+
+    max_workers = max(1, min(max_workers or llm_setting("LLM_MAX_CONCURRENCY"), len(unique_values_by_column)))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm") as executor:
+        # Each call runs in a copy of the caller's context, so its timing span is collected with the analysis
+        futures = {
+            column: executor.submit(
+                contextvars.copy_context().run, invalid_categorical_values, None, column, unique_values=values
+            )
+            for column, values in unique_values_by_column.items()
+        }
+        return {column: future.result() for column, future in futures.items()}
+
+
+BATCH_PROMPT = """You are a data validation expert. You are given the column names of a dataset and, for some
+columns, a sample of their distinct values (most frequent first, then rarer ones).
+
+Return a single JSON object and nothing else (no markdown, no explanations) with these keys:
+{keys}
+
+Column names: {columns}
+Sampled values by column: {values}
+"""
+
+CATEGORICAL_KEY = """- "categorical_columns": list of the categorical columns among {columns}. Categorical columns
+  contain a limited set of labels (e.g. 'Gender', 'Country', 'Marital Status'); descriptive fields like
+  'Full Name', 'Street Address' or 'City' are not categorical.
+"""
+
+ID_KEY = """- "id_column": name of the column that most likely holds a row identifier, or null if none does.
+"""
+
+VALIDATION_KEY = """- "invalid_values": object mapping each column of the sampled values to the list of its values that
+  are likely outliers or invalid for that column, copied exactly as given (empty list if none).
+"""
+
+
+def estimate_tokens(text):
+    """Rough token count of a prompt (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+def _json_value(value):
+    """JSON-safe form of a sampled value: NaN/None as null, numpy scalars as Python numbers."""
+    if hasattr(value, "item"):
+        value = value.item()
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _batch_prompt(columns, value_samples, classification_keys=""):
+    keys = classification_keys + VALIDATION_KEY
+    values = {column: [_json_value(value) for value in sample] for column, sample in value_samples.items()}
+    return BATCH_PROMPT.format(keys=keys, columns=json.dumps(list(columns)), values=json.dumps(values))
+
+
+def _split_batches(columns, value_samples, token_budget, classification_keys=""):
+    """Group the sampled columns so each prompt stays within the token budget (one column at least)."""
+    batches = [{}]
+    for column, sample in value_samples.items():
+        candidate = {**batches[-1], column: sample}
+        keys = classification_keys if len(batches) == 1 else ""
+        if batches[-1] and estimate_tokens(_batch_prompt(columns, candidate, keys)) > token_budget:
+            batches.append({column: sample})
+        else:
+            batches[-1] = candidate
+    return batches
+
+
+def parse_json_object(text):
+    """
+    Strictly parse a model response holding one JSON object, tolerating a markdown code fence.
+
+    Raises:
+        ValueError: If the response is not a JSON object.
+    """
+    text = text.strip()
+    fenced = re.fullmatch(r"```(?:json)?\s*(.*?)\s*```", text, flags=re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    parsed = json.loads(text)
+    if not isinstance(parsed, dict):
+        raise ValueError(f"Expected a JSON object, got {type(parsed).__name__}")
+    return parsed
+
+
+def _match_sample(returned, sample):
+    """Map the values returned by the model back to the sampled values they name, dropping unknown ones."""
+    exact = {json.dumps(_json_value(value)): value for value in sample}
+    loose = {str(_json_value(value)): value for value in sample}
+    matched = []
+    for item in returned:
+        key = json.dumps(item)
+        if key in exact:
+            matched.append(exact[key])
+        elif str(item) in loose:
+            matched.append(loose[str(item)])
+    return matched
+
+
+def classify_and_validate_columns(columns, value_samples, token_budget=None, undecided=None, categorical=(),
+                                  id_column=None):
+    """
+    Classify the columns, pick the ID column and find invalid values of several columns
+    in as few structured JSON requests as the token budget allows (usually one).
+
+    The first request also asks for whatever classification is still unknown; if
+    the prompt grows past `token_budget`, the remaining value samples go to further
+    validation-only requests. Responses are parsed strictly as JSON. An item that
+    is missing or malformed falls back to the per-column call it replaces.
+
+    Args:
+        columns (list): Column names of the dataset.
+        value_samples (dict): Column name -> sampled distinct values to validate.
+        token_budget (int): Approximate maximum prompt size in tokens (LLM_TOKEN_BUDGET if None).
+        undecided (list): Columns to classify (all columns if None).
+        categorical (list): Columns already known to be categorical.
+        id_column (str): ID column if already known; asked if None.
+
+    Returns:
+        dict: `categorical_columns` (list), `id_column` (str or "not found") and
+            `invalid_values` (column -> list of invalid values, or "error"), for the
+            sampled columns that are categorical.
+    """
+    columns = list(columns)
+    undecided = columns if undecided is None else list(undecided)
+    classification_keys = (CATEGORICAL_KEY.format(columns=json.dumps(undecided)) if undecided else "") + \
+        (ID_KEY if id_column is None else "")
+    if not value_samples and not classification_keys:
+        return {"categorical_columns": list(categorical), "id_column": id_column, "invalid_values": {}}
+    token_budget = token_budget or llm_setting("LLM_TOKEN_BUDGET")
+    batches = _split_batches(columns, value_samples, token_budget, classification_keys)
+    logging.info(f"Validating {len(value_samples)} columns in {len(batches)} batched requests")
+
+    def request(index, batch):
+        try:
+            keys = classification_keys if index == 0 else ""
+            return parse_json_object(generate_ai(_batch_prompt(columns, batch, keys)))
+        except Exception as e:
+            logging.warning(f"Batched request {index} could not be used ({e}), falling back to per-column calls")
+            return {}
+
+    if len(batches) == 1:
+        responses = [request(0, batches[0])]
+    else:
+        max_workers = min(llm_setting("LLM_MAX_CONCURRENCY"), len(batches))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm") as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, request, index, batch)
+                for index, batch in enumerate(batches)
+            ]
+            responses = [future.result() for future in futures]
+
+    first = responses[0]
+    classified = []
+    if undecided:
+        classified = first.get("categorical_columns")
+        if not (isinstance(classified, list) and all(isinstance(column, str) for column in classified)):
+            classified = categorical_columns(undecided)
+    categorical = [column for column in columns if column in categorical or
+                   (column in undecided and column in classified)]
+
+    if id_column is None:
+        id_column = first.get("id_column", "")
+        if id_column is None:
+            id_column = "not found"
+        elif id_column not in columns:
+            id_column = identify_id_column_prompt(columns)
+
+    invalid_values = {}
+    retry = {}
+    for batch, response in zip(batches, responses):
+        returned = response.get("invalid_values")
+        returned = returned if isinstance(returned, dict) else {}
+        for column, sample in batch.items():
+            if column not in categorical:
+                continue
+            if isinstance(returned.get(column), list):
+                invalid_values[column] = _match_sample(returned[column], sample)
+            else:
+                retry[column] = sample
+    if retry:
+        invalid_values.update(invalid_categorical_values_concurrently(retry))
+
+    return {"categorical_columns": categorical, "id_column": id_column, "invalid_values": invalid_values}
@@ -0,0 +1,99 @@
+"""
+Model providers answering the prompts of cleaner.ai_checks.llm.
+
+A provider has a `name` (part of the response cache key) and a
+`generate(prompt, temperature, timeout)` method returning a response with a
+`text` attribute and, when the backend reports it, `usage_metadata`. Backend
+libraries are imported when the first prompt is sent, not when the provider
+is created, so processes that make no model call never load them.
+"""
+import importlib
+import json
+import logging
+import os
+import re
+import threading
+from types import SimpleNamespace
+
+GEMINI_MODEL = "gemini-2.0-flash"
+
+
+class GeminiProvider:
+    """Google Gemini, through one google.generativeai client configured on first use and shared by every thread."""
+
+    def __init__(self, model_name=GEMINI_MODEL, api_key=None):
+        self.name = model_name
+        self.api_key = api_key
+        self._genai = None
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _client(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import google.generativeai as genai
+
+                    genai.configure(api_key=self.api_key or os.getenv("GEMINI_API_KEY"))
+                    self._genai = genai
+                    self._model = genai.GenerativeModel(self.name)
+                    logging.info(f"Created the {self.name} client")
+        return self._genai, self._model
+
+    def generate(self, prompt, temperature, timeout):
+        genai, model = self._client()
+        return model.generate_content(
+            prompt,
+            generation_config=genai.types.GenerationConfig(temperature=temperature),
+            request_options={"timeout": timeout},
+        )
+
+
+class OfflineProvider:
+    """
+    Local stand-in for a model, for development and CI without network access or an API key.
+
+    It finds nothing: no categorical column, no ID column and no invalid value,
+    so an analysis relies on the local column classification alone.
+    """
+
+    name = "offline"
+
+    def generate(self, prompt, temperature, timeout):
+        values = re.search(r"Sampled values by column: (\{.*\})\s*$", prompt, flags=re.DOTALL)
+        if values:
+            columns = json.loads(values.group(1))
+            text = json.dumps({
+                "categorical_columns": [],
+                "id_column": None,
+                "invalid_values": {column: [] for column in columns},
+            })
+        elif "ID-related column" in prompt:
+            text = "not found"
+        else:
+            text = "[]"
+        return SimpleNamespace(text=text)
+
+
+# LLM_PROVIDER values -> provider class; any other value is the dotted path of a provider class
+PROVIDERS = {
+    "gemini": GeminiProvider,
+    "offline": OfflineProvider,
+}
+
+
+def load_provider(name):
+    """
+    Create the provider named `name`: a key of PROVIDERS or a dotted path such as "package.module.Class".
+
+    Raises:
+        ValueError: If no provider class has this name.
+    """
+    provider_class = PROVIDERS.get(name)
+    if provider_class is None:
+        module_name, _, class_name = name.rpartition(".")
+        try:
+            provider_class = getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError, ValueError):
+            raise ValueError(f"Unknown LLM provider: {name}")
+    return provider_class()
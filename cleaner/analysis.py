@@ -0,0 +1,373 @@
+import logging
+import os
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from .data_quality.checks import uniqueness_check_chunked, near_duplicate_check_chunked
+from .data_quality.checks import (
+    accuracy_check_chunked, consistency_check_chunked, integrity_check_chunked, timeliness_check_chunked,
+)
+from .data_quality.checks import completeness_check, check_categorical_validity_ai_chunked, categorical_value_samples
+from .data_quality.classification import classify_columns, identify_id_column
+from .data_quality.incremental import (
+    MAX_CHANGED_RATIO, build_snapshot, diff_rows, duplicate_id_strings, hash_rows, incremental_uniqueness,
+    load_snapshot, read_rows, snapshot_path, touched_values,
+)
+from .data_quality.ingestion import is_parquet, read_columns, spill_to_parquet, remove_spooled_file
+from .data_quality.scheduler import profile_columns
+from .ai_checks.llm import categorical_columns, classify_and_validate_columns, identify_id_column_prompt
+from .instrumentation import collect_spans, span
+
+# Bump when the checks change, so results stored for an identical file are recomputed
+RESULTS_VERSION = 6
+
+
+# Checks in dashboard order, with their descriptions
+CHECK_DESCRIPTIONS = {
+    "Completeness": "Missing values and null checks",
+    "Accuracy": "Correctness and validity of data",
+    "Consistency": "Format and standard compliance",
+    "Timeliness": "Freshness and update frequency",
+    "Uniqueness": "Duplicate record detection",
+    "Validity": "Business rule compliance",
+    "Integrity": "Referential integrity checks",
+}
+
+
+def check_status(score):
+    return "passed" if score > 90 else "warning" if score > 70 else "failed"
+
+
+def check_result(name, score, issues, approximate=False, **extra):
+    """Dashboard entry of one check; `approximate` if it was scored from the top values of a sketch profile."""
+    return dict(
+        name=name, description=CHECK_DESCRIPTIONS[name], status=check_status(score), score=score, issues=issues,
+        approximate=approximate, **extra,
+    )
+
+
+def _spill(path, dtypes, chunksize):
+    """Replace a spooled CSV file with its Parquet copy, keeping the CSV if the copy fails."""
+    try:
+        data_path = spill_to_parquet(path, dtypes, chunksize=chunksize)
+    except Exception:
+        logging.exception(f"Could not spill {path} to Parquet")
+        return path
+    if data_path != path:
+        remove_spooled_file(path)
+    return data_path
+
+
+def overall_score(checks):
+    """Mean score of the checks, as shown on the dashboard."""
+    return sum(check["score"] for check in checks) // len(checks)
+
+
+def resolve_id_column(profile):
+    """
+    Column identifying the rows of a dataset, decided once for every check that lists IDs.
+
+    The local classifier picks it where the statistics are clear; otherwise the
+    model picks it from the column names.
+
+    Returns:
+        str: A column of the profile, or "not found" (rows are then identified by position).
+    """
+    decision = identify_id_column(profile)
+    id_column = decision.column if decision.confidence >= settings.ANALYSIS_CLASSIFIER_CONFIDENCE else None
+    if id_column is None:
+        with span("identify_id_column"):
+            id_column = identify_id_column_prompt(profile.column_names).strip()
+    return id_column if id_column in profile.column_names else "not found"
+
+
+def use_approximation(path):
+    """Whether a file is large enough to be profiled with sketches (ANALYSIS_APPROXIMATE_MIN_BYTES)."""
+    min_bytes = settings.ANALYSIS_APPROXIMATE_MIN_BYTES
+    return min_bytes is not None and os.path.getsize(path) >= min_bytes
+
+
+def run_analysis(path, filename, spill=False, previous_path=None, save_snapshot=None, max_workers=None,
+                 approximate=None, progress=None, id_column=None):
+    """
+    Run every data quality check on a spooled CSV file.
+
+    Args:
+        path (str): Path of the CSV file on disk.
+        filename (str): Original name of the uploaded file.
+        spill (bool): Replace the CSV file with a compressed Parquet copy before profiling;
+            every pass then reads Parquet instead of re-parsing CSV, and the profile of
+            a large file is split across `max_workers` processes.
+        previous_path (str): Data file of the previous version of the same dataset. When
+            its snapshot is usable, only the rows added, changed or removed since are checked.
+        save_snapshot (bool): Keep a snapshot next to the data file for the next version
+            (ANALYSIS_INCREMENTAL if None).
+        max_workers (int): Processes used within the analysis (ANALYSIS_MAX_WORKERS_PER_JOB if None).
+        approximate (bool): Profile the file with constant-memory sketches in a single read; counts
+            of distinct and duplicated values become estimates (use_approximation if None).
+        progress (callable): Called as `progress(stage, profile)` while the analysis runs: with
+            the partial profile after each chunk of the parse, then with None as each later stage starts.
+        id_column (str): Column identifying the rows, as resolved by resolve_id_column
+            (resolved from the profile if None).
+
+    Returns:
+        results (dict): JSON-serializable results with `file_info`, the list of `checks`
+            and the timing spans of the analysis (`timings`).
+        data_path (str): Path of the file now holding the data (Parquet if spilled).
+    """
+    logging.info(f"Starting analysis of {filename}")
+    with collect_spans() as spans, span("analysis", filename=filename):
+        results, path = _run_analysis(path, filename, spill, previous_path, save_snapshot, max_workers, approximate,
+                                      progress or _no_progress, id_column)
+    results["timings"] = spans
+    return results, path
+
+
+def _no_progress(stage, profile=None):
+    pass
+
+
+def _run_analysis(path, filename, spill, previous_path, save_snapshot, max_workers, approximate, progress,
+                  id_column):
+    chunksize = settings.CSV_CHUNK_SIZE
+    if max_workers is None:
+        max_workers = settings.ANALYSIS_MAX_WORKERS_PER_JOB
+    if approximate is None:
+        approximate = use_approximation(path)
+    if approximate:
+        # Snapshots and the Parquet copy would each take another pass over the file
+        spill, previous_path, save_snapshot = False, None, False
+    if save_snapshot is None:
+        save_snapshot = settings.ANALYSIS_INCREMENTAL
+
+    snapshot = load_snapshot(previous_path) if previous_path and settings.ANALYSIS_INCREMENTAL else None
+    if snapshot is not None and read_columns(path) == snapshot.columns and id_column in (None, snapshot.id_column):
+        if spill:
+            with span("spill"):
+                path = _spill(path, snapshot.profile.dtypes, chunksize)
+        try:
+            progress("diff")
+            results = _run_incremental_analysis(path, filename, previous_path, snapshot, chunksize)
+            if results is not None:
+                return results, path
+        except Exception:
+            logging.exception(f"Incremental analysis of {filename} failed, checking every row")
+
+    # Spilled first, so the profile of a large file can be split across processes by column
+    if spill and not is_parquet(path):
+        with span("spill"):
+            path = _spill(path, None, chunksize)
+
+    # Single pass building the column profile every check reads from
+    with span("parse", approximate=approximate):
+        profile = profile_columns(path, chunksize=chunksize, max_workers=max_workers, approximate=approximate,
+                                  on_chunk=lambda partial: progress("parse", partial))
+    progress("checks")
+
+    columns = profile.column_names
+    total_fields = profile.total_fields  # total cells
+    if id_column is None:
+        id_column = resolve_id_column(profile)
+
+    # Run uniqueness check
+    with span("uniqueness_check"):
+        uniqueness = uniqueness_check_chunked(
+            path,
+            columns=columns,
+            id_column=id_column,
+            total_fields=total_fields,
+            excluded_category_columns=[],
+            chunksize=chunksize,
+            profile=profile,
+            max_ids_per_group=settings.UNIQUENESS_MAX_IDS_PER_GROUP,
+            max_workers=max_workers,
+        )
+    results = _results(path, filename, profile, uniqueness, id_column, chunksize)
+
+    if save_snapshot:
+        with span("snapshot"):
+            _save_snapshot(path, profile, id_column, uniqueness[0], chunksize)
+    return results, path
+
+
+def _save_snapshot(path, profile, id_column, results_df, chunksize):
+    try:
+        snapshot = build_snapshot(path, profile, id_column, results_df, chunksize=chunksize)
+        if snapshot is not None:
+            snapshot.save(snapshot_path(path))
+    except Exception:
+        logging.exception(f"Could not save the dataset snapshot of {path}")
+
+
+def _run_incremental_analysis(path, filename, previous_path, snapshot, chunksize):
+    """
+    Check a new version of a dataset from the rows that differ from its snapshot.
+
+    The previous column profile is patched with the removed and added rows, so
+    completeness, uniqueness and validity scores follow from the changed rows.
+
+    Returns:
+        dict or None: Results as in run_analysis, or None when too much changed.
+    """
+    id_column = snapshot.id_column
+    with span("parse", incremental=True):
+        ids, hashes, new_rows = hash_rows(path, snapshot.columns, id_column, chunksize, snapshot=snapshot)
+    if not pd.Index(ids).is_unique:
+        logging.info(f"Column '{id_column}' is not unique in {filename}, checking every row")
+        return None
+    diff = diff_rows(snapshot, ids, hashes)
+    if diff.changed_ratio > MAX_CHANGED_RATIO:
+        logging.info(f"{diff.changed_ratio:.0%} of the rows of {filename} changed, checking every row")
+        return None
+    logging.info(f"Incremental analysis of {filename}: {diff.summary()}")
+
+    with span("diff", **diff.summary()):
+        old_rows = read_rows(previous_path, id_column, np.concatenate([diff.removed, diff.changed]), chunksize)
+        if new_rows is None:
+            # No row added or changed, or more than hash_rows keeps in memory
+            new_rows = read_rows(path, id_column, np.concatenate([diff.changed, diff.added]), chunksize)
+        profile = snapshot.profile
+        if old_rows is not None:
+            profile.remove(old_rows)
+        if new_rows is not None:
+            profile.update(new_rows)
+
+    with span("uniqueness_check", incremental=True):
+        uniqueness = incremental_uniqueness(
+            path,
+            profile,
+            snapshot.duplicate_ids,
+            touched_values([old_rows, new_rows], snapshot.columns),
+            id_column,
+            profile.total_fields,
+            max_ids_per_group=settings.UNIQUENESS_MAX_IDS_PER_GROUP,
+            chunksize=chunksize,
+        )
+    results = _results(path, filename, profile, uniqueness, id_column, chunksize)
+    results["file_info"]["changes"] = diff.summary()
+
+    snapshot.ids, snapshot.hashes = ids, hashes
+    snapshot.duplicate_ids = duplicate_id_strings(uniqueness[0], profile)
+    with span("snapshot"):
+        snapshot.save(snapshot_path(path))
+    return results
+
+
+def _results(path, filename, profile, uniqueness, id_column, chunksize):
+    """Run the profile-based checks and assemble the results of an analysis."""
+    results_df, uniqueness_score, total_duplicates = uniqueness
+    columns = profile.column_names
+    total_fields = profile.total_fields
+
+    # Columns whose statistics make the answer obvious are classified without the LLM
+    with span("local_classification"):
+        classification = classify_columns(profile, settings.ANALYSIS_CLASSIFIER_CONFIDENCE)
+    undecided = classification.undecided
+
+    invalid_values = None
+    if settings.ANALYSIS_LLM_BATCHED:
+        # Classification and value validation of every column in one or two model calls
+        with span("classify_and_validate_columns", undecided=len(undecided)):
+            batch = classify_and_validate_columns(
+                columns, categorical_value_samples(profile, classification.categorical + undecided),
+                undecided=undecided, categorical=classification.categorical, id_column=id_column,
+            )
+        categorical_columns_ = batch["categorical_columns"]
+        invalid_values = batch["invalid_values"]
+    else:
+        classified = []
+        if undecided:
+            with span("categorical_columns"):
+                classified = categorical_columns(undecided)
+        categorical_columns_ = [column for column in columns if column in classification.categorical
+                                or column in undecided and column in classified]
+    classification.resolve(categorical_columns_, id_column)
+    text_columns = [column for column in columns if not pd.api.types.is_numeric_dtype(profile[column].dtype)]
+    near_duplicates_df, total_near_duplicates = pd.DataFrame([]), 0
+    # Near duplicates need every distinct value, which an approximate profile does not keep
+    if settings.ANALYSIS_NEAR_DUPLICATES and not profile.approximate:
+        # Text columns other than the ID, whose values may differ only in case, spacing or punctuation
+        with span("near_duplicate_check"):
+            near_duplicates_df, _, total_near_duplicates = near_duplicate_check_chunked(
+                path, [column for column in text_columns if column != id_column], id_column,
+                keys=settings.ANALYSIS_DUPLICATE_KEYS,
+                fuzzy=settings.ANALYSIS_NEAR_DUPLICATES == "fuzzy", threshold=settings.ANALYSIS_FUZZY_THRESHOLD,
+                chunksize=chunksize, profile=profile, max_ids_per_group=settings.UNIQUENESS_MAX_IDS_PER_GROUP,
+            )
+
+    # Run completeness check
+    with span("completeness_check"):
+        completeness_score, completeness_issues = completeness_check(
+            None, total_fields=total_fields, profile=profile
+        )
+
+    # One error per invalid row, or grouped per value and counted from the profile without another pass
+    with span("categorical_validity_check"):
+        error_df, categorical_validity_score, total_invalid = check_categorical_validity_ai_chunked(
+            path, categorical_columns_, id_column, total_fields, chunksize=chunksize, profile=profile,
+            group_errors=settings.ANALYSIS_GROUP_INVALID_VALUES, invalid_values=invalid_values,
+        )
+
+    # Rule-based checks, each a vectorized pass over the distinct values in the profile
+    with span("accuracy_check"):
+        accuracy_df, accuracy_score, accuracy_issues = accuracy_check_chunked(
+            path, [column for column in columns if column != id_column], ranges=settings.ANALYSIS_VALUE_RANGES,
+            outlier_iqr=settings.ANALYSIS_OUTLIER_IQR, chunksize=chunksize, profile=profile,
+        )
+    with span("consistency_check"):
+        consistency_df, consistency_score, consistency_issues = consistency_check_chunked(
+            path, text_columns, formats=settings.ANALYSIS_FORMATS, chunksize=chunksize, profile=profile,
+        )
+    with span("timeliness_check"):
+        timeliness_df, timeliness_score, timeliness_issues = timeliness_check_chunked(
+            path, columns, freshness_days=settings.ANALYSIS_FRESHNESS_DAYS, chunksize=chunksize, profile=profile,
+        )
+    with span("integrity_check"):
+        integrity_df, integrity_score, integrity_issues = integrity_check_chunked(
+            path, settings.ANALYSIS_REFERENCES, chunksize=chunksize, profile=profile,
+        )
+
+    uniqueness_margin = None
+    if profile.approximate:
+        # Duplicates are estimated: the dashboard shows the half-width of their bounds
+        bounds = [profile[column].duplicate_rows_bounds() for column in columns]
+        uniqueness_margin = (sum(high for _, _, high in bounds) - sum(low for _, low, _ in bounds)) // 2
+
+    # An approximate profile keeps only the most frequent values of each column, so the
+    # checks reading values from it (rather than counts) score those values alone
+    estimated = profile.approximate
+    checks = [
+        check_result("Completeness", completeness_score, completeness_issues),
+        check_result("Accuracy", accuracy_score, accuracy_issues, approximate=estimated),
+        check_result("Consistency", consistency_score, consistency_issues, approximate=estimated),
+        check_result("Timeliness", timeliness_score, timeliness_issues, approximate=estimated),
+        check_result("Uniqueness", uniqueness_score, total_duplicates, margin=uniqueness_margin),
+        check_result("Validity", categorical_validity_score, total_invalid,
+                     approximate=estimated and settings.ANALYSIS_GROUP_INVALID_VALUES),
+        check_result("Integrity", integrity_score, integrity_issues, approximate=estimated),
+    ]
+
+    return {
+        "file_info": {
+            "filename": filename,
+            "rows": profile.rows,
+            "columns": len(columns),
+            "approximate": profile.report() if profile.approximate else None,
+            "uniqueness_score": uniqueness_score,
+            "total_duplicates": total_duplicates,
+            "uniqueness_results": results_df.to_dict(orient="records"),
+            "total_near_duplicates": total_near_duplicates,
+            "near_duplicate_results": near_duplicates_df.to_dict(orient="records"),
+            "accuracy_results": accuracy_df.to_dict(orient="records"),
+            "consistency_results": consistency_df.to_dict(orient="records"),
+            "timeliness_results": timeliness_df.to_dict(orient="records"),
+            "integrity_results": integrity_df.to_dict(orient="records"),
+            # Invalid values as strings, so values of any dtype can be stored as JSON
+            "categorical_validity_results": (
+                error_df.assign(**{"Invalid Value": error_df["Invalid Value"].map(str)})
+                if not error_df.empty else error_df
+            ).to_dict(orient="records"),
+        },
+        "checks": checks,
+        "classification": classification.report(),
+    }
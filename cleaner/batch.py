@@ -0,0 +1,192 @@
+import csv
+import glob
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .analysis import RESULTS_VERSION, overall_score, run_analysis
+
+# Output directory layout: the results of each file under RESULTS_DIR, one score
+# line per finished file in REPORT_NAME (read back to resume), and the scores of
+# every file in SUMMARY_NAME
+
+DATA_EXTENSIONS = (".csv", ".parquet")
+REPORT_NAME = "report.jsonl"
+SUMMARY_NAME = "report.csv"
+RESULTS_DIR = "results"
+# Worker processes are replaced after this many files, returning whatever memory they held
+MAX_FILES_PER_WORKER = 50
+
+
+def expand_inputs(inputs):
+    """
+    Data files named by a list of files, directories (searched recursively) and glob patterns.
+
+    Returns:
+        list: Absolute paths, sorted and without duplicates.
+    """
+    paths = set()
+    for entry in inputs:
+        if os.path.isdir(entry):
+            for directory, _, filenames in os.walk(entry):
+                paths.update(
+                    os.path.join(directory, filename) for filename in filenames
+                    if filename.lower().endswith(DATA_EXTENSIONS)
+                )
+        elif os.path.isfile(entry):
+            paths.add(entry)
+        else:
+            paths.update(path for path in glob.glob(entry, recursive=True) if os.path.isfile(path))
+    return sorted(os.path.abspath(path) for path in paths)
+
+
+def file_key(path):
+    """Identity of a file version: a file edited since it was validated is validated again."""
+    stat = os.stat(path)
+    return f"{path}:{stat.st_size}:{stat.st_mtime_ns}:{RESULTS_VERSION}"
+
+
+def _results_path(output_dir, path):
+    digest = hashlib.sha1(path.encode("utf-8")).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(output_dir, RESULTS_DIR, f"{stem}-{digest}.json")
+
+
+def validate_file(path, output_dir, max_workers=1):
+    """
+    Run every check on one file and write its results.
+
+    The file is read in place: it is not spilled to Parquet and no snapshot is
+    written next to it.
+
+    Returns:
+        dict: Score report of the file (status, scores per check, timing, error).
+    """
+    key = file_key(path)
+    start = time.perf_counter()
+    report = {"file": path, "key": key}
+    try:
+        results, _ = run_analysis(path, os.path.basename(path), spill=False, save_snapshot=False,
+                                  max_workers=max_workers)
+        results_path = _results_path(output_dir, path)
+        with open(results_path, "w") as handle:
+            json.dump(results, handle, default=str)
+        report.update(
+            status="done",
+            rows=results["file_info"]["rows"],
+            columns=results["file_info"]["columns"],
+            overall_score=overall_score(results["checks"]),
+            scores={check["name"]: check["score"] for check in results["checks"]},
+            results=results_path,
+        )
+    except Exception as e:
+        logging.exception(f"Validation of {path} failed")
+        report.update(status="failed", error=str(e))
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def read_report(output_dir):
+    """Score reports already written to the output directory, by file key."""
+    reports = {}
+    path = os.path.join(output_dir, REPORT_NAME)
+    if not os.path.exists(path):
+        return reports
+    with open(path) as handle:
+        for line in handle:
+            try:
+                report = json.loads(line)
+            except ValueError:  # a line cut short by an interruption
+                continue
+            reports[report["key"]] = report
+    return reports
+
+
+def write_summary(output_dir, reports):
+    """Write the score of every file and check as one CSV table."""
+    checks = sorted({name for report in reports for name in report.get("scores", {})})
+    path = os.path.join(output_dir, SUMMARY_NAME)
+    with open(path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["file", "status", "rows", "columns", "overall_score", *checks, "seconds", "error"])
+        for report in sorted(reports, key=lambda report: report["file"]):
+            scores = report.get("scores", {})
+            writer.writerow([
+                report["file"], report["status"], report.get("rows", ""), report.get("columns", ""),
+                report.get("overall_score", ""), *[scores.get(name, "") for name in checks],
+                report["seconds"], report.get("error", ""),
+            ])
+    return path
+
+
+def _initialize_worker():
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _validate_in_pool(paths, output_dir, workers, record):
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths)))
+    # Spawned workers do not inherit the state (open connections, threads) of the calling process;
+    # the LLM response cache is a SQLite file they all share
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_initialize_worker,
+                             max_tasks_per_child=MAX_FILES_PER_WORKER) as executor:
+        futures = [executor.submit(validate_file, path, output_dir) for path in paths]
+        try:
+            for future in as_completed(futures):
+                record(future.result())
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+
+def validate_files(inputs, output_dir, workers=None, resume=True, retry_failed=False, progress=None):
+    """
+    Validate many files in parallel, resuming an earlier run into the same output directory.
+
+    Args:
+        inputs (list): Files, directories or glob patterns (see expand_inputs).
+        output_dir (str): Directory receiving the reports and the results of each file.
+        workers (int): Number of worker processes (CPU count if None, 0 to validate in this process).
+        resume (bool): Skip the files whose report is already in `output_dir`.
+        retry_failed (bool): When resuming, validate again the files that failed.
+        progress (callable): Called with the report of each file as it finishes.
+
+    Returns:
+        list: Score report of every file, including the ones validated by earlier runs.
+    """
+    os.makedirs(os.path.join(output_dir, RESULTS_DIR), exist_ok=True)
+    paths = expand_inputs(inputs)
+    done = read_report(output_dir) if resume else {}
+    if retry_failed:
+        done = {key: report for key, report in done.items() if report["status"] == "done"}
+    keys = {path: file_key(path) for path in paths}
+    reports = {keys[path]: done[keys[path]] for path in paths if keys[path] in done}
+    pending = [path for path in paths if keys[path] not in reports]
+    logging.info(f"Validating {len(pending)} files ({len(reports)} already done) into {output_dir}")
+
+    def record(report):
+        # One line per finished file, flushed at once, is what a resumed run reads back
+        report_file.write(json.dumps(report) + "\n")
+        report_file.flush()
+        reports[report["key"]] = report
+        if progress is not None:
+            progress(report)
+
+    with open(os.path.join(output_dir, REPORT_NAME), "a" if resume else "w") as report_file:
+        if workers == 0:
+            for path in pending:
+                record(validate_file(path, output_dir))
+        elif pending:
+            _validate_in_pool(pending, output_dir, workers, record)
+
+    reports = list(reports.values())
+    write_summary(output_dir, reports)
+    return reports
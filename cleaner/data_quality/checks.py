@@ -1,7 +1,86 @@
+import os
+import numpy as np
 import pandas as pd
 import logging
-from ..ai_checks.llm import invalid_categorical_values
-def uniqueness_check(df, columns, id_column, total_fields, excluded_category_columns=None):
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype
+from ..ai_checks.llm import invalid_categorical_values_concurrently
+from .ingestion import DEFAULT_CHUNK_SIZE, read_data_chunks
+from .duplicates import DuplicateIdCollector, findings_table
+from .near_duplicates import composite_keys, group_keys, key_name
+from .profile import profile_chunks
+from .rules import (
+    FORMATS, detect_format, dominant_shape, matches, parse_dates, reference_keys, reference_keys_of, shapes,
+    text_values, weighted_quantiles,
+)
+from .scheduler import duplicate_findings_task, run_column_tasks, should_parallelize
+
+# Values sent to the LLM per categorical column: most frequent ones plus a sample of the rare ones
+CATEGORICAL_TOP_K = 50
+CATEGORICAL_RARE_SAMPLE = 50
+# Offending values listed per column in the findings of the rule-based checks (all are counted)
+MAX_FINDINGS_PER_COLUMN = 20
+# Outliers are only looked for in columns with at least this many values
+OUTLIER_MIN_ROWS = 20
+# Dates up to this far ahead of the current time are not flagged (clock skew, time zones)
+FUTURE_TOLERANCE = pd.Timedelta(days=1)
+
+
+def _frame_chunks(df):
+    """Chunk source yielding an in-memory DataFrame as a single chunk."""
+    return lambda: [df]
+
+
+def _file_chunks(path, chunksize):
+    """Chunk source re-reading a CSV or Parquet file from disk on every pass."""
+    return lambda: read_data_chunks(path, chunksize=chunksize)
+
+
+INVALID_CATEGORY_ERROR = "Invalid categorical value"
+ERROR_COLUMNS = ["ID", "Field", "Invalid Value", "Error", "Explanation"]
+GROUPED_ERROR_COLUMNS = ["Field", "Invalid Value", "Count", "Error", "Explanation"]
+
+
+def _invalid_category_explanation(value):
+    return f"'{value}' is not among the predefined valid categories, which may impact data consistency."
+
+
+def _explanations(values):
+    """Explanation of each value, templated once per distinct value."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    templated = np.array([_invalid_category_explanation(value) for value in uniques], dtype=object)
+    return templated[codes]
+
+
+def _invalid_rows_to_errors(invalid_rows, column, id_column):
+    """Build the error table of one column's invalid rows column-wise."""
+    values = invalid_rows[column]
+    return pd.DataFrame({
+        # Use index if ID column is missing
+        "ID": (invalid_rows[id_column] if id_column in invalid_rows.columns else invalid_rows.index).to_numpy(),
+        "Field": column,
+        "Invalid Value": values.to_numpy(),
+        "Error": INVALID_CATEGORY_ERROR,
+        "Explanation": _explanations(values),
+    }, columns=ERROR_COLUMNS)
+
+
+def _grouped_errors(invalid_counts):
+    """Build the (field, value) -> count error table from per-column value counts."""
+    tables = []
+    for column, counts in invalid_counts.items():
+        counts = counts.astype("int64").sort_values(ascending=False, kind="stable")
+        tables.append(pd.DataFrame({
+            "Field": column,
+            "Invalid Value": counts.index.to_numpy(),
+            "Count": counts.to_numpy(),
+            "Error": INVALID_CATEGORY_ERROR,
+            "Explanation": _explanations(counts.index),
+        }, columns=GROUPED_ERROR_COLUMNS))
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame([])
+
+
+def uniqueness_check(df, columns, id_column, total_fields, excluded_category_columns=None, profile=None,
+                     max_ids_per_group=None):
     """
     Check for duplicate values across given columns.
 
@@ -11,14 +90,24 @@ def uniqueness_check(df, columns, id_column, total_fields, excluded_category_col
         id_column (str): Identifier column (used to return duplicate row IDs).
         total_fields (int): Total number of fields to calculate uniqueness score.
         excluded_category_columns (list): Columns to exclude from uniqueness check.
+        profile (DatasetProfile): Column profile of `df`, built here if not given. With an
+            approximate profile (sketches.SketchDatasetProfile), counts are estimates, findings
+            cover its most frequent values and no IDs are collected.
+        max_ids_per_group (int): Maximum number of IDs listed per duplicated value (all if None).
 
     Returns:
         results_df (pd.DataFrame): Detailed duplicate findings.
         uniqueness_score (float): Score between 0-100.
         total_duplicates (int): Number of duplicate entries found.
     """
+    return _uniqueness_check(_frame_chunks(df), columns, id_column, total_fields,
+                             excluded_category_columns, profile, max_ids_per_group, "uniqueness_check")
+
+
+def _uniqueness_check(read_chunks, columns, id_column, total_fields, excluded_category_columns, profile,
+                      max_ids_per_group, name, path=None, chunksize=DEFAULT_CHUNK_SIZE, max_workers=None):
     try:
-        logging.info("Starting uniqueness_check")
+        logging.info(f"Starting {name}")
 
         if not columns or columns == "error":
             logging.warning("Invalid or empty columns list provided.")
@@ -27,38 +116,46 @@ def uniqueness_check(df, columns, id_column, total_fields, excluded_category_col
         if excluded_category_columns and excluded_category_columns != "error":
             columns = [col for col in columns if col not in excluded_category_columns]
 
-        use_index_as_id = id_column not in df.columns
-        total_duplicates = 0
-        results = []
+        if profile is None:
+            profile = profile_chunks(read_chunks(), columns)
 
+        # Duplicate counts come from the column profile; only the IDs of the
+        # duplicated rows need another look at the data.
+        duplicates = {}
         for column in columns:
-            if column not in df.columns:
+            if column not in profile:
                 logging.warning(f"Column '{column}' not found in DataFrame. Skipping.")
                 continue
-
-            duplicate_mask = df[column].duplicated(keep=False)
-            duplicate_df = df[duplicate_mask]
-
-            total_duplicates += duplicate_mask.sum()
-
-            if not duplicate_df.empty:
-                duplicate_counts = duplicate_df[column].value_counts()
-
-                for value, count in duplicate_counts.items():
-                    id_values = "; ".join(
-                        map(
-                            str,
-                            duplicate_df.loc[duplicate_df[column] == value, id_column]
-                            if not use_index_as_id else duplicate_df.index
-                        )
-                    )
-                    results.append({
-                        "Column Name": column,
-                        "Findings": f"{value}: {count} duplicates",
-                        "ID": id_values
-                    })
-
-        results_df = pd.DataFrame(results)
+            duplicate_counts = profile[column].duplicate_counts()
+            if not duplicate_counts.empty:
+                duplicates[column] = duplicate_counts
+
+        total_duplicates = sum(profile[column].duplicate_rows for column in columns if column in profile)
+
+        if profile.approximate:
+            # Estimated counts of the most frequent values only: the IDs would take another pass
+            results = [findings_table(column, duplicate_counts, np.full(len(duplicate_counts), "", dtype=object),
+                                      approximate=True)
+                       for column, duplicate_counts in duplicates.items()]
+        elif path is not None and should_parallelize(path, profile.total_fields, duplicates, max_workers):
+            # One task per column on a process pool, each reading only its columns from Parquet
+            results = run_column_tasks(duplicate_findings_task, [
+                (path, column, id_column, duplicate_counts, max_ids_per_group, chunksize)
+                for column, duplicate_counts in duplicates.items()
+            ], max_workers)
+        else:
+            collectors = {
+                column: DuplicateIdCollector(duplicate_counts, max_ids_per_group)
+                for column, duplicate_counts in duplicates.items()
+            }
+            if collectors:
+                for chunk in read_chunks():
+                    ids = chunk[id_column] if id_column in chunk.columns else chunk.index
+                    for column, collector in collectors.items():
+                        collector.update(chunk[column], ids)
+            results = [collector.findings(column) for column, collector in collectors.items()]
+
+        results_df = pd.concat(results, ignore_index=True) if results else pd.DataFrame([])
 
         if total_fields == 0:
             uniqueness_score = 100
@@ -69,30 +166,118 @@ def uniqueness_check(df, columns, id_column, total_fields, excluded_category_col
         return results_df, round(uniqueness_score, 2), total_duplicates
 
     except Exception as e:
-        logging.exception("An error occurred in uniqueness_check")
+        logging.exception(f"An error occurred in {name}")
+        return pd.DataFrame([]), 100, 0
+
+
+def near_duplicate_check(df, columns, id_column, keys=None, fuzzy=False, threshold=0.8, profile=None,
+                         max_ids_per_group=None):
+    """
+    Check for near-duplicate values in single columns and for duplicate rows over composite keys.
+
+    In each of `columns`, values that differ only by case, whitespace or punctuation
+    (or, with `fuzzy`, whose normalized forms are similar) are grouped; exact
+    duplicates are left to uniqueness_check. For each composite key, rows whose
+    normalized values of the key's columns match (or are similar) are grouped.
+    Fuzzy groups are found with MinHash/LSH over the distinct values, so the cost
+    grows with the number of distinct values, not with the number of pairs.
+
+    Args:
+        df (pd.DataFrame): Input dataframe.
+        columns (list): Columns to check one by one.
+        id_column (str): Identifier column (used to return the IDs of grouped rows).
+        keys (list): Composite keys to check, each a list of column names.
+        fuzzy (bool): Group similar values, not only equal normalized ones.
+        threshold (float): Minimum estimated Jaccard similarity of fuzzy matches (0-1).
+        profile (DatasetProfile): Column profile of `df`, built here if not given.
+        max_ids_per_group (int): Maximum number of IDs listed per group (all if None).
+
+    Returns:
+        results_df (pd.DataFrame): Findings, in the uniqueness_check result shape.
+        near_duplicate_score (float): Score between 0-100.
+        total_near_duplicates (int): Number of cells in a near-duplicate group.
+    """
+    return _near_duplicate_check(_frame_chunks(df), columns, keys, id_column, profile, fuzzy, threshold,
+                                 max_ids_per_group, "near_duplicate_check")
+
+
+def _near_duplicate_check(read_chunks, columns, keys, id_column, profile, fuzzy, threshold, max_ids_per_group,
+                          name):
+    try:
+        logging.info(f"Starting {name}")
+        keys = [tuple(key) for key in keys or []]
+        if profile is None:
+            profile = profile_chunks(read_chunks())
+        columns = [column for column in columns if column in profile]
+        keys = [key for key in keys if all(column in profile for column in key)]
+
+        # Single columns are grouped from the distinct values of the profile
+        groups = [group_keys(column, profile[column].value_counts, fuzzy, threshold) for column in columns]
+
+        # Composite keys need one pass to count their distinct values
+        if keys:
+            key_counts = {key: pd.Series(dtype="int64") for key in keys}
+            for chunk in read_chunks():
+                for key in keys:
+                    key_counts[key] = key_counts[key].add(composite_keys(chunk, key).value_counts(), fill_value=0)
+            groups.extend(group_keys(key, counts, fuzzy, threshold, min_variants=1)
+                          for key, counts in key_counts.items())
+        groups = [key_groups for key_groups in groups if key_groups is not None]
+
+        # Another pass collects the IDs of the rows of each group, by group code
+        collectors = [DuplicateIdCollector(pd.Series(key_groups.counts.to_numpy()), max_ids_per_group)
+                      for key_groups in groups]
+        if groups:
+            for chunk in read_chunks():
+                ids = chunk[id_column] if id_column in chunk.columns else chunk.index
+                for key_groups, collector in zip(groups, collectors):
+                    values = chunk[key_groups.key] if isinstance(key_groups.key, str) else \
+                        composite_keys(chunk, key_groups.key)
+                    collector.update(key_groups.group_codes(values), ids)
+        results = [findings_table(key_name(key_groups.key), key_groups.counts, collector.id_strings())
+                   for key_groups, collector in zip(groups, collectors)]
+        results_df = pd.concat(results, ignore_index=True) if results else pd.DataFrame([])
+
+        total_near_duplicates = sum(int(key_groups.counts.sum()) for key_groups in groups)
+        checked_fields = profile.rows * (len(columns) + len(keys))
+        if checked_fields == 0:
+            near_duplicate_score = 100
+        else:
+            near_duplicate_score = max(0, 100 * ((checked_fields - total_near_duplicates) / checked_fields))
+
+        logging.info(f"Near-duplicate check completed. Score: {near_duplicate_score:.2f}")
+        return results_df, round(near_duplicate_score, 2), total_near_duplicates
+
+    except Exception as e:
+        logging.exception(f"An error occurred in {name}")
         return pd.DataFrame([]), 100, 0
 
-def completeness_check(input_df, total_fields):
+
+def completeness_check(input_df, total_fields, profile=None):
     """
     Computes completeness score and total missing values.
 
     Args:
         input_df (pd.DataFrame): Input dataset.
-        id_column (str): Unique identifier column (not used directly here).
         total_fields (int): Total number of fields in the dataset.
+        profile (DatasetProfile): Column profile of `input_df`, built here if not given.
 
     Returns:
         completeness_score (float): Data completeness score (0–100).
         total_issues (int): Number of missing values detected.
     """
+    return _completeness_check(_frame_chunks(input_df), total_fields, profile, "completeness_check")
+
+
+def _completeness_check(read_chunks, total_fields, profile, name):
     try:
-        print("completeness_check")
+        logging.info(f"Starting {name}")
 
-        # Replace blank or whitespace-only strings with NaN
-        df = input_df.replace(r'^\s*$', pd.NA, regex=True)
+        if profile is None:
+            profile = profile_chunks(read_chunks())
 
-        # Count missing values across all columns
-        total_issues = df.isna().sum().sum()
+        # Null and blank or whitespace-only cells, counted from the value frequencies
+        total_issues = profile.total_missing
 
         # Compute completeness score
         completeness_score = 100 if total_fields == 0 else max(
@@ -104,10 +289,30 @@ def completeness_check(input_df, total_fields):
         return round(completeness_score, 2), int(total_issues)
 
     except Exception as e:
-        logging.exception("An error occurred in completeness_check")
+        logging.exception(f"An error occurred in {name}")
         return 100.0, 0
 
-def check_categorical_validity_ai(df, categorical_columns, id_column, total_fields):
+
+def categorical_value_samples(profile, columns):
+    """
+    Values sent to the LLM for each of `columns` that looks categorical in the profile:
+    the most frequent ones plus a sample of the rare ones.
+    """
+    samples = {}
+    for column in columns:
+        if column not in profile:
+            continue
+        column_profile = profile[column]
+        if not column_profile.looks_categorical():
+            logging.info(f"Column '{column}' is not categorical (distinct={column_profile.distinct}, "
+                         f"entropy={column_profile.entropy:.2f}). Skipping LLM validation.")
+            continue
+        samples[column] = column_profile.value_sample(top_k=CATEGORICAL_TOP_K, rare_sample=CATEGORICAL_RARE_SAMPLE)
+    return samples
+
+
+def check_categorical_validity_ai(df, categorical_columns, id_column, total_fields, profile=None,
+                                  group_errors=False, invalid_values=None):
     """
     Checks categorical validity using AI and calculates a validity score.
 
@@ -115,54 +320,472 @@ def check_categorical_validity_ai(df, categorical_columns, id_column, total_fiel
         df (pd.DataFrame): The DataFrame to validate.
         categorical_columns (list): Categorical columns to check.
         id_column (str): The name of the ID column.
+        profile (DatasetProfile): Column profile of `df`, built here if not given.
+        group_errors (bool): Return one row per (field, invalid value) with its count
+            instead of one row per invalid cell.
+        invalid_values (dict): Column -> invalid values already obtained from the LLM
+            (e.g. by classify_and_validate_columns); asked per column if None.
 
     Returns:
         - DataFrame with each invalid value, its ID, field, error, and explanation.
         - Validity score (0-100).
         - Invalid-to-total ratio.
     """
+    return _check_categorical_validity_ai(_frame_chunks(df), categorical_columns, id_column, total_fields,
+                                          profile, group_errors, invalid_values, "check_categorical_validity_ai")
+
+
+def _check_categorical_validity_ai(read_chunks, categorical_columns, id_column, total_fields, profile,
+                                   group_errors, invalid_values, name):
     try:
-        print("check_categorical_validity_ai")
+        logging.info(f"Starting {name}")
         if categorical_columns == "error" or not categorical_columns:
             return pd.DataFrame([]), 100, 0
 
-        total_checked = 0  # Total checked values (excluding NaN)
-        total_invalid = 0  # Total invalid values found
-        errors = []
-
-        for column in categorical_columns:
-            if column in df.columns:
-                invalid_values = invalid_categorical_values(df, column)  # Get invalid values (list)
+        if profile is None:
+            profile = profile_chunks(read_chunks(), categorical_columns)
 
-                if not invalid_values:
-                    continue  # Skip if no invalid values
+        total_invalid = 0  # Total invalid values found
+        invalid_by_column = {}
 
-                # Find rows where the column contains invalid values
-                invalid_rows = df[df[column].isin(invalid_values)]
+        # The LLM sees a bounded sample; its verdict is applied to every row with isin below
+        unique_values_by_column = categorical_value_samples(profile, categorical_columns)
+        total_checked = sum(profile[column].non_null for column in unique_values_by_column)  # excluding NaN
 
-                for _, row in invalid_rows.iterrows():
-                    error_entry = {
-                        "ID": row[id_column] if id_column in df.columns else row.name,
-                        # Use index if ID column is missing
-                        "Field": column,
-                        "Invalid Value": row[column],
-                        "Error": "Invalid categorical value",
-                        "Explanation": f"'{row[column]}' is not among the predefined valid categories, which may impact data consistency."
-                    }
+        # Get invalid values (list) for every column, with the model calls in flight concurrently
+        if invalid_values is None:
+            invalid_values = invalid_categorical_values_concurrently(unique_values_by_column)
+        for column in unique_values_by_column:
+            column_invalid = invalid_values.get(column)
+            if column_invalid and column_invalid != "error":
+                invalid_by_column[column] = column_invalid
 
-                    errors.append(error_entry)
+        errors = []
+        invalid_counts = {}
+        if group_errors:
+            # Counts per invalid value are already in the profile: no pass over the rows
+            for column, invalid_values in invalid_by_column.items():
+                counts = profile[column].value_counts
+                counts = counts[counts.index.isin(invalid_values)]
+                if not counts.empty:
+                    invalid_counts[column] = counts
+                    total_invalid += int(counts.sum())
+        elif invalid_by_column:
+            for chunk in read_chunks():
+                for column, invalid_values in invalid_by_column.items():
+                    # Find rows where the column contains invalid values
+                    invalid_rows = chunk[chunk[column].isin(invalid_values)]
+                    if invalid_rows.empty:
+                        continue
+                    total_invalid += len(invalid_rows)
+                    errors.append(_invalid_rows_to_errors(invalid_rows, column, id_column))
 
-                total_invalid += len(invalid_rows)
         # Convert results to DataFrame
-        errors_df = pd.DataFrame(errors)
+        if group_errors:
+            errors_df = _grouped_errors(invalid_counts)
+        else:
+            errors_df = pd.concat(errors, ignore_index=True) if errors else pd.DataFrame([])
 
         # Compute validity score
-        if total_checked == 0:
+        if total_checked == 0 or total_fields == 0:
             score = 100  # No categorical values to check
         else:
             score = max(0, (total_fields - total_invalid) / total_fields * 100)
         return errors_df, round(score, 2), total_invalid
 
     except Exception as e:
-        logging.exception("An error occurred in check_categorical_validity_ai")
-        return pd.DataFrame([]), 100, 0
\ No newline at end of file
+        logging.exception(f"An error occurred in {name}")
+        return pd.DataFrame([]), 100, 0
+
+
+def _rule_findings(column, values, counts, error, explanation):
+    """Findings of one rule in one column: its offending values (as strings), most frequent first."""
+    order = np.argsort(-counts, kind="stable")[:MAX_FINDINGS_PER_COLUMN]
+    values = [str(value) for value in np.asarray(values, dtype=object)[order]]
+    return pd.DataFrame({
+        "Field": column,
+        "Invalid Value": values,
+        "Count": counts[order],
+        "Error": error,
+        "Explanation": [explanation(value) for value in values],
+    }, columns=GROUPED_ERROR_COLUMNS)
+
+
+def _rule_score(total_issues, checked_fields):
+    if checked_fields == 0:
+        return 100
+    return round(max(0, 100 * (checked_fields - total_issues) / checked_fields), 2)
+
+
+def consistency_check(df, columns, formats=None, profile=None):
+    """
+    Check that the values of each text column follow one format.
+
+    The format of a column is its regex in `formats` if configured, else the
+    first known format (FORMATS) followed by most of its rows, else the layout
+    shared by most of its values when they hold digits (codes such as "AB-1234").
+    Each distinct value of the profile is matched once, with vectorized regexes.
+
+    Args:
+        df (pd.DataFrame): Input dataframe.
+        columns (list): Text columns to check.
+        formats (dict): Column -> regex its values must fully match.
+        profile (DatasetProfile): Column profile of `df`, built here if not given.
+
+    Returns:
+        results_df (pd.DataFrame): Offending values and their counts (GROUPED_ERROR_COLUMNS).
+        consistency_score (float): Score between 0-100.
+        total_issues (int): Number of cells not following the format of their column.
+    """
+    return _consistency_check(_frame_chunks(df), columns, formats, profile, "consistency_check")
+
+
+def _consistency_check(read_chunks, columns, formats, profile, name):
+    try:
+        logging.info(f"Starting {name}")
+        formats = formats or {}
+        if profile is None:
+            profile = profile_chunks(read_chunks())
+
+        results, total_issues, checked_columns = [], 0, 0
+        for column in columns:
+            if column not in profile:
+                continue
+            values, counts = text_values(profile[column].value_counts)
+            if not len(values):
+                continue
+            if column in formats:
+                rule, valid = "configured format", matches(values, formats[column])
+            elif (format_name := detect_format(values, counts)) is not None:
+                rule, valid = f"{format_name} format", matches(values, FORMATS[format_name])
+            elif (layout := dominant_shape(values, counts)) is not None:
+                rule, valid = f"'{layout}' layout", (shapes(values) == layout).to_numpy()
+            else:
+                continue
+            checked_columns += 1
+            invalid = ~valid
+            if invalid.any():
+                total_issues += int(counts[invalid].sum())
+                results.append(_rule_findings(
+                    column, values[invalid], counts[invalid], "Inconsistent format",
+                    lambda value, rule=rule: f"'{value}' does not follow the {rule} of the column.",
+                ))
+        results_df = pd.concat(results, ignore_index=True) if results else pd.DataFrame([])
+
+        consistency_score = _rule_score(total_issues, profile.rows * checked_columns)
+        logging.info(f"Consistency check completed. Score: {consistency_score:.2f}, Issues: {total_issues}")
+        return results_df, consistency_score, total_issues
+
+    except Exception as e:
+        logging.exception(f"An error occurred in {name}")
+        return pd.DataFrame([]), 100, 0
+
+
+def timeliness_check(df, columns, freshness_days=None, now=None, profile=None):
+    """
+    Check the dates of a dataset.
+
+    Date columns are datetime columns and text columns whose values read as dates,
+    each distinct value parsed once with the date format reading the most rows.
+    Values that do not parse or lie in the future are issues; a latest date older
+    than `freshness_days` makes the dataset stale, which caps the score at
+    100 * freshness_days / age of the latest date.
+
+    Args:
+        df (pd.DataFrame): Input dataframe.
+        columns (list): Columns that may hold dates.
+        freshness_days (int): Maximum age of the latest date (no freshness window if None).
+        now (pd.Timestamp): Current time, in UTC (now if None).
+        profile (DatasetProfile): Column profile of `df`, built here if not given.
+
+    Returns:
+        results_df (pd.DataFrame): Offending values and their counts (GROUPED_ERROR_COLUMNS).
+        timeliness_score (float): Score between 0-100.
+        total_issues (int): Number of invalid or future dates, plus one for a stale dataset.
+    """
+    return _timeliness_check(_frame_chunks(df), columns, freshness_days, now, profile, "timeliness_check")
+
+
+def _column_dates(column_profile):
+    """Distinct values of a column, their counts and their dates (UTC), or None if it holds no dates."""
+    dtype = column_profile.dtype
+    counts = column_profile.value_counts
+    counts = counts[counts.index.notna()]
+    if counts.empty:
+        return None
+    if dtype is not None and is_datetime64_any_dtype(dtype):
+        dates = pd.DatetimeIndex(counts.index)
+        dates = dates.tz_localize("UTC") if dates.tz is None else dates.tz_convert("UTC")
+        return pd.Series(counts.index.map(str), dtype=object), counts.to_numpy(dtype=np.int64), dates
+    if dtype is not None and (is_numeric_dtype(dtype) or is_bool_dtype(dtype)):
+        return None
+    values, counts = text_values(counts)
+    dates = parse_dates(values, counts)
+    return None if dates is None else (values, counts, dates)
+
+
+def _timeliness_check(read_chunks, columns, freshness_days, now, profile, name):
+    try:
+        logging.info(f"Starting {name}")
+        now = pd.Timestamp.now(tz="UTC") if now is None else pd.Timestamp(now)
+        if now.tz is None:
+            now = now.tz_localize("UTC")
+        if profile is None:
+            profile = profile_chunks(read_chunks())
+
+        results, total_issues, checked_columns = [], 0, 0
+        latest, latest_column = None, None
+        for column in columns:
+            if column not in profile:
+                continue
+            column_dates = _column_dates(profile[column])
+            if column_dates is None:
+                continue
+            values, counts, dates = column_dates
+            checked_columns += 1
+            unparsed = dates.isna()
+            future = np.asarray(dates > now + FUTURE_TOLERANCE, dtype=bool)
+            for invalid, error, explanation in (
+                (unparsed, "Invalid date", lambda value: f"'{value}' is not a date in the format of the column."),
+                (future, "Future date", lambda value: f"'{value}' lies in the future."),
+            ):
+                if invalid.any():
+                    total_issues += int(counts[invalid].sum())
+                    results.append(_rule_findings(column, values[invalid], counts[invalid], error, explanation))
+            column_latest = dates[~unparsed & ~future].max()
+            if pd.notna(column_latest) and (latest is None or column_latest > latest):
+                latest, latest_column = column_latest, column
+
+        timeliness_score = _rule_score(total_issues, profile.rows * checked_columns)
+        if freshness_days and latest is not None:
+            age = now - latest
+            if age > pd.Timedelta(days=freshness_days):
+                total_issues += 1
+                results.append(_rule_findings(
+                    latest_column, [latest.strftime("%Y-%m-%d")], np.array([1]), "Stale data",
+                    lambda value: f"The latest date, {value}, is {age.days} days old "
+                                  f"(freshness window: {freshness_days} days).",
+                ))
+                timeliness_score = round(min(timeliness_score, 100 * freshness_days / age.days), 2)
+        results_df = pd.concat(results, ignore_index=True) if results else pd.DataFrame([])
+
+        logging.info(f"Timeliness check completed. Score: {timeliness_score:.2f}, Issues: {total_issues}")
+        return results_df, timeliness_score, total_issues
+
+    except Exception as e:
+        logging.exception(f"An error occurred in {name}")
+        return pd.DataFrame([]), 100, 0
+
+
+def accuracy_check(df, columns, ranges=None, outlier_iqr=3.0, profile=None):
+    """
+    Check numeric values against expected ranges and for outliers.
+
+    Values outside the range configured for their column are issues, and so are
+    values beyond `outlier_iqr` interquartile ranges from the quartiles of their
+    column (Tukey's far-out fences). Quartiles are weighted quantiles of the
+    distinct values of the profile, so no pass over the rows is needed. Columns
+    with a range but a text dtype are read as numbers; values that are not
+    numbers are issues.
+
+    Args:
+        df (pd.DataFrame): Input dataframe.
+        columns (list): Numeric columns to check for outliers.
+        ranges (dict): Column -> [minimum, maximum] (either may be None) of its values.
+        outlier_iqr (float): Width of the outlier fences in interquartile ranges (no outliers if None).
+        profile (DatasetProfile): Column profile of `df`, built here if not given.
+
+    Returns:
+        results_df (pd.DataFrame): Offending values and their counts (GROUPED_ERROR_COLUMNS).
+        accuracy_score (float): Score between 0-100.
+        total_issues (int): Number of cells out of range or outlying.
+    """
+    return _accuracy_check(_frame_chunks(df), columns, ranges, outlier_iqr, profile, "accuracy_check")
+
+
+def _accuracy_check(read_chunks, columns, ranges, outlier_iqr, profile, name):
+    try:
+        logging.info(f"Starting {name}")
+        ranges = ranges or {}
+        if profile is None:
+            profile = profile_chunks(read_chunks())
+
+        results, total_issues, checked_columns = [], 0, 0
+        for column in list(dict.fromkeys([*columns, *ranges])):
+            if column not in profile:
+                continue
+            column_profile = profile[column]
+            counts = column_profile.value_counts
+            counts = counts[counts.index.notna()]
+            dtype = column_profile.dtype
+            numeric = dtype is not None and is_numeric_dtype(dtype) and not is_bool_dtype(dtype)
+            if counts.empty or not numeric and column not in ranges:
+                continue
+            checked_columns += 1
+            values = counts.index.to_numpy(dtype=object)
+            counts = counts.to_numpy(dtype=np.int64)
+            numbers = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float)
+
+            checks = []
+            not_number = np.isnan(numbers)
+            checks.append((not_number, "Not a number", lambda value: f"'{value}' is not a number."))
+            low, high = (list(ranges.get(column) or []) + [None, None])[:2]
+            out_of_range = np.zeros(len(numbers), dtype=bool)
+            if low is not None:
+                out_of_range |= numbers < low
+            if high is not None:
+                out_of_range |= numbers > high
+            checks.append((out_of_range, "Out of range", lambda value, low=low, high=high:
+                           f"{value} is outside the expected range [{low}, {high}]."))
+
+            candidates = ~not_number & ~out_of_range
+            if outlier_iqr and counts[candidates].sum() >= OUTLIER_MIN_ROWS:
+                q1, q3 = weighted_quantiles(numbers[candidates], counts[candidates], [0.25, 0.75])
+                iqr = q3 - q1
+                if iqr > 0:  # with one dominant value, every other value would be an outlier
+                    lower, upper = q1 - outlier_iqr * iqr, q3 + outlier_iqr * iqr
+                    outliers = candidates & ((numbers < lower) | (numbers > upper))
+                    checks.append((outliers, "Outlier", lambda value, lower=lower, upper=upper:
+                                   f"{value} is far outside the range of most values ({lower:g} to {upper:g})."))
+
+            for invalid, error, explanation in checks:
+                if invalid.any():
+                    total_issues += int(counts[invalid].sum())
+                    results.append(_rule_findings(column, values[invalid], counts[invalid], error, explanation))
+        results_df = pd.concat(results, ignore_index=True) if results else pd.DataFrame([])
+
+        accuracy_score = _rule_score(total_issues, profile.rows * checked_columns)
+        logging.info(f"Accuracy check completed. Score: {accuracy_score:.2f}, Issues: {total_issues}")
+        return results_df, accuracy_score, total_issues
+
+    except Exception as e:
+        logging.exception(f"An error occurred in {name}")
+        return pd.DataFrame([]), 100, 0
+
+
+def integrity_check(df, references, profile=None):
+    """
+    Check foreign keys: every value of a referencing column must exist in a column of a reference file.
+
+    Values are compared as strings, integral numbers without their decimal part,
+    so a float column read with missing values still matches integer keys. The
+    keys of a reference file are read once per file version.
+
+    Args:
+        df (pd.DataFrame): Input dataframe.
+        references (dict): Column -> {"path": reference CSV or Parquet file, "column": referenced column}.
+        profile (DatasetProfile): Column profile of `df`, built here if not given.
+
+    Returns:
+        results_df (pd.DataFrame): Dangling values and their counts (GROUPED_ERROR_COLUMNS).
+        integrity_score (float): Score between 0-100.
+        total_issues (int): Number of cells referencing a missing key.
+    """
+    return _integrity_check(_frame_chunks(df), references, profile, "integrity_check")
+
+
+def _integrity_check(read_chunks, references, profile, name):
+    try:
+        logging.info(f"Starting {name}")
+        references = references or {}
+        if not references:
+            return pd.DataFrame([]), 100, 0
+        if profile is None:
+            profile = profile_chunks(read_chunks())
+
+        results, total_issues, checked_columns = [], 0, 0
+        for column, reference in references.items():
+            if column not in profile:
+                continue
+            try:
+                keys = reference_keys_of(reference["path"], reference["column"])
+            except Exception:
+                logging.exception(f"Could not read the keys referenced by '{column}' from {reference}")
+                continue
+            counts = profile[column].value_counts
+            counts = counts[counts.index.notna()]
+            checked_columns += 1
+            dangling = ~pd.Index(reference_keys(counts.index)).isin(keys)
+            if dangling.any():
+                total_issues += int(counts[dangling].sum())
+                results.append(_rule_findings(
+                    column, counts.index[dangling], counts.to_numpy(dtype=np.int64)[dangling], "Missing reference",
+                    lambda value, reference=reference: f"'{value}' is not in column '{reference['column']}' "
+                                                       f"of {os.path.basename(reference['path'])}.",
+                ))
+        results_df = pd.concat(results, ignore_index=True) if results else pd.DataFrame([])
+
+        integrity_score = _rule_score(total_issues, profile.rows * checked_columns)
+        logging.info(f"Integrity check completed. Score: {integrity_score:.2f}, Issues: {total_issues}")
+        return results_df, integrity_score, total_issues
+
+    except Exception as e:
+        logging.exception(f"An error occurred in {name}")
+        return pd.DataFrame([]), 100, 0
+
+
+def uniqueness_check_chunked(path, columns, id_column, total_fields, excluded_category_columns=None,
+                             chunksize=DEFAULT_CHUNK_SIZE, profile=None, max_ids_per_group=None, max_workers=None):
+    """
+    uniqueness_check over the file at `path`, read `chunksize` rows at a time.
+
+    Duplicate counts come from the column profile (one pass, built here if not
+    given); a second pass collects the IDs of rows holding a duplicated value.
+    Peak memory is bounded by the chunk size plus the distinct values of each column.
+    For large Parquet files and `max_workers` > 1, the second pass runs one
+    column per task on a process pool (see scheduler.should_parallelize).
+    """
+    return _uniqueness_check(_file_chunks(path, chunksize), columns, id_column, total_fields,
+                             excluded_category_columns, profile, max_ids_per_group, "uniqueness_check_chunked",
+                             path=path, chunksize=chunksize, max_workers=max_workers)
+
+
+def near_duplicate_check_chunked(path, columns, id_column, keys=None, fuzzy=False, threshold=0.8,
+                                 chunksize=DEFAULT_CHUNK_SIZE, profile=None, max_ids_per_group=None):
+    """near_duplicate_check over the file at `path`; composite `keys` and row IDs take a pass each."""
+    return _near_duplicate_check(_file_chunks(path, chunksize), columns, keys, id_column, profile, fuzzy,
+                                 threshold, max_ids_per_group, "near_duplicate_check_chunked")
+
+
+def completeness_check_chunked(path, total_fields, chunksize=DEFAULT_CHUNK_SIZE, profile=None):
+    """completeness_check from the null counts of `profile`, or of the file at `path` read in chunks."""
+    return _completeness_check(_file_chunks(path, chunksize), total_fields, profile, "completeness_check_chunked")
+
+
+def check_categorical_validity_ai_chunked(path, categorical_columns, id_column, total_fields,
+                                          chunksize=DEFAULT_CHUNK_SIZE, profile=None, group_errors=False,
+                                          invalid_values=None):
+    """
+    check_categorical_validity_ai over the file at `path`, read `chunksize` rows at a time.
+
+    The distinct values sent to the LLM come from the column profile; a second
+    pass flags the rows holding an invalid value, unless `group_errors` is set,
+    in which case the per-value counts are read from the profile directly.
+    `invalid_values` (column -> values already obtained from the LLM) replaces the LLM call.
+    """
+    return _check_categorical_validity_ai(_file_chunks(path, chunksize), categorical_columns, id_column,
+                                          total_fields, profile, group_errors, invalid_values,
+                                          "check_categorical_validity_ai_chunked")
+
+
+def consistency_check_chunked(path, columns, formats=None, chunksize=DEFAULT_CHUNK_SIZE, profile=None):
+    """consistency_check of the distinct values in `profile`, or in the file at `path` read in chunks."""
+    return _consistency_check(_file_chunks(path, chunksize), columns, formats, profile, "consistency_check_chunked")
+
+
+def timeliness_check_chunked(path, columns, freshness_days=None, now=None, chunksize=DEFAULT_CHUNK_SIZE,
+                             profile=None):
+    """timeliness_check of the distinct dates in `profile`, or in the file at `path` read in chunks."""
+    return _timeliness_check(_file_chunks(path, chunksize), columns, freshness_days, now, profile,
+                             "timeliness_check_chunked")
+
+
+def accuracy_check_chunked(path, columns, ranges=None, outlier_iqr=3.0, chunksize=DEFAULT_CHUNK_SIZE, profile=None):
+    """accuracy_check of the distinct values in `profile`, or in the file at `path` read in chunks."""
+    return _accuracy_check(_file_chunks(path, chunksize), columns, ranges, outlier_iqr, profile,
+                           "accuracy_check_chunked")
+
+
+def integrity_check_chunked(path, references, chunksize=DEFAULT_CHUNK_SIZE, profile=None):
+    """integrity_check of the distinct keys in `profile`, or in the file at `path` read in chunks."""
+    return _integrity_check(_file_chunks(path, chunksize), references, profile, "integrity_check_chunked")
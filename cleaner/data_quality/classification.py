@@ -0,0 +1,188 @@
+import logging
+import re
+import numpy as np
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+# Column names that say they hold an identifier: "id", "customer_id", "order-uuid", "customerId", "UserID"
+ID_NAME = re.compile(r"(?:^|[\W_])(?:id|uuid|guid)$", re.IGNORECASE)
+CAMEL_ID_NAME = re.compile(r"[a-z0-9](?:Id|ID|Uuid|UUID|Guid|GUID)$")
+
+# Below this many non-null values, frequencies say little about a column
+MIN_ROWS = 100
+# A text column with at most this many distinct short labels, each repeated a lot, is categorical
+CATEGORICAL_MAX_DISTINCT = 50
+CATEGORICAL_MAX_RATIO = 0.01
+CATEGORICAL_MAX_LENGTH = 40
+
+HEURISTIC = "heuristic"
+LLM = "llm"
+
+
+def looks_like_id_name(name):
+    return bool(ID_NAME.search(name) or CAMEL_ID_NAME.search(name))
+
+
+class ColumnDecision:
+    """Whether a column is categorical, how confident the decision is and which path made it."""
+
+    def __init__(self, column, categorical, confidence, reason, path=HEURISTIC):
+        self.column = column
+        self.categorical = categorical
+        self.confidence = confidence
+        self.reason = reason
+        self.path = path
+
+    def as_dict(self):
+        return {
+            "column": self.column,
+            "categorical": self.categorical,
+            "confidence": round(self.confidence, 3) if self.confidence is not None else None,
+            "reason": self.reason,
+            "path": self.path,
+        }
+
+
+def _mean_label_length(column_profile):
+    labels = column_profile.value_counts.index
+    labels = labels[labels.notna()]
+    if len(labels) == 0:
+        return 0.0
+    return float(np.mean([len(str(label)) for label in labels]))
+
+
+def classify_column(column_profile):
+    """
+    Decide from its statistics whether a column is categorical.
+
+    Confident cases are columns with no values, with mostly distinct values, with
+    many distinct numbers, and text columns holding a few short labels repeated
+    over many rows. Anything else gets a confidence of 0.5, to be left to the LLM.
+
+    Returns:
+        ColumnDecision: The decision and its confidence (0-1).
+    """
+    name = column_profile.name
+    distinct = column_profile.distinct
+    non_null = column_profile.non_null
+    dtype = column_profile.dtype
+
+    if distinct == 0:
+        return ColumnDecision(name, False, 0.99, "no values")
+    if not column_profile.looks_categorical():
+        return ColumnDecision(name, False, 0.95, "too many or too evenly spread distinct values")
+    if non_null >= MIN_ROWS and distinct == non_null:
+        return ColumnDecision(name, False, 0.95, "every value is distinct")
+    if dtype is not None and is_bool_dtype(dtype):
+        return ColumnDecision(name, False, 0.9, "boolean values")
+    if dtype is not None and is_numeric_dtype(dtype):
+        if distinct > CATEGORICAL_MAX_DISTINCT:
+            return ColumnDecision(name, False, 0.9, "numeric measure with many distinct values")
+        return ColumnDecision(name, None, 0.5, "few distinct numbers, may be codes")
+
+    ratio = distinct / non_null
+    if (non_null >= MIN_ROWS and distinct <= CATEGORICAL_MAX_DISTINCT and ratio <= CATEGORICAL_MAX_RATIO
+            and _mean_label_length(column_profile) <= CATEGORICAL_MAX_LENGTH):
+        # 3 labels over 1M rows is near certain; 50 labels over 5000 rows just passes
+        confidence = 0.9 + 0.09 * (1 - ratio / CATEGORICAL_MAX_RATIO)
+        return ColumnDecision(name, True, confidence, f"{distinct} short labels repeated over {non_null} rows")
+    return ColumnDecision(name, None, 0.5, "ambiguous statistics")
+
+
+def identify_id_column(profile):
+    """
+    Pick the ID column from the column names and their statistics.
+
+    A column is a confident pick when its name says it is an identifier and its
+    values are all present and distinct, and it is the only such column (or the
+    only one named plainly "id"). When no column is unique and no name looks
+    like an identifier, the confident answer is "not found".
+
+    Returns:
+        ColumnDecision: `column` is the ID column, "not found", or None when the
+            statistics cannot decide.
+    """
+    unique = [
+        column.name for column in profile.columns.values()
+        if profile.rows > 1 and column.nulls == 0 and column.distinct == profile.rows
+    ]
+    named = [name for name in profile.column_names if looks_like_id_name(name)]
+    candidates = [name for name in named if name in unique]
+
+    if len(candidates) == 1:
+        return ColumnDecision(candidates[0], None, 0.98, "only unique column with an identifier name")
+    plain = [name for name in candidates if name.strip().lower() == "id"]
+    if len(plain) == 1:
+        return ColumnDecision(plain[0], None, 0.92, "unique column named 'id'")
+    if not unique and not named:
+        return ColumnDecision("not found", None, 0.9, "no unique column and no identifier name")
+    reason = f"{len(candidates)} unique columns with identifier names" if candidates else \
+        "identifier names and unique columns do not agree"
+    return ColumnDecision(None, None, 0.5, reason)
+
+
+class ColumnClassification:
+    """
+    Local decisions about every column of a dataset, and the ones left to the LLM.
+
+    Decisions at or above the confidence threshold are final; the others are
+    `undecided` until resolve() records the model's answers.
+    """
+
+    def __init__(self, decisions, id_decision, threshold):
+        self.decisions = decisions
+        self.id_decision = id_decision
+        self.threshold = threshold
+
+    def _confident(self, decision):
+        return decision.path == LLM or decision.confidence >= self.threshold
+
+    @property
+    def categorical(self):
+        """Columns decided categorical."""
+        return [d.column for d in self.decisions.values() if self._confident(d) and d.categorical]
+
+    @property
+    def undecided(self):
+        """Columns whose classification is left to the LLM."""
+        return [d.column for d in self.decisions.values() if not self._confident(d)]
+
+    @property
+    def id_column(self):
+        """The ID column or "not found" if decided, else None."""
+        return self.id_decision.column if self._confident(self.id_decision) else None
+
+    def resolve(self, categorical_columns=None, id_column=None):
+        """Record the LLM's answers for the undecided columns and ID column."""
+        if categorical_columns is not None:
+            for column in self.undecided:
+                self.decisions[column] = ColumnDecision(
+                    column, column in categorical_columns, None, "classified by the model", path=LLM
+                )
+        if id_column is not None and self.id_column is None:
+            self.id_decision = ColumnDecision(id_column, None, None, "picked by the model", path=LLM)
+
+    def report(self):
+        """Every decision with the path (heuristic or llm) that made it."""
+        return {
+            "threshold": self.threshold,
+            "columns": [decision.as_dict() for decision in self.decisions.values()],
+            "id_column": self.id_decision.as_dict(),
+        }
+
+
+def classify_columns(profile, threshold=0.9):
+    """
+    Classify every column of a profile and pick its ID column without the LLM where the statistics are clear.
+
+    Args:
+        profile (DatasetProfile): Column statistics of the dataset.
+        threshold (float): Minimum confidence of a local decision; the LLM decides below it.
+
+    Returns:
+        ColumnClassification
+    """
+    decisions = {column.name: classify_column(column) for column in profile.columns.values()}
+    classification = ColumnClassification(decisions, identify_id_column(profile), threshold)
+    logging.info(f"Local classification: {len(classification.categorical)} categorical, "
+                 f"{len(classification.undecided)} undecided, ID column {classification.id_column!r}")
+    return classification
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+
+class DuplicateIdCollector:
+    """
+    Collect the row IDs of each duplicated value of one column.
+
+    Rows are mapped to their duplicate group with a single vectorized
+    `get_indexer` lookup per chunk and grouped with one stable sort, instead
+    of one boolean scan of the column per duplicated value.
+    """
+
+    separator = "; "
+
+    def __init__(self, duplicate_counts, max_ids_per_group=None):
+        self.duplicate_counts = duplicate_counts
+        self.groups = pd.Index(duplicate_counts.index)
+        self.max_ids_per_group = max_ids_per_group
+        self.seen = np.zeros(len(self.groups), dtype=np.int64)
+        self.codes = []
+        self.ids = []
+
+    def update(self, values, ids):
+        codes = self.groups.get_indexer(values)
+        mask = codes >= 0
+        order = np.argsort(codes[mask], kind="stable")
+        codes = codes[mask][order]
+        ids = np.asarray(ids)[mask][order]
+
+        if self.max_ids_per_group is not None and len(codes):
+            # Rank of each row within its group, counting rows kept from earlier chunks
+            positions = np.arange(len(codes))
+            is_start = np.concatenate(([True], codes[1:] != codes[:-1]))
+            group_start = np.maximum.accumulate(np.where(is_start, positions, 0))
+            rank = positions - group_start + self.seen[codes]
+            self.seen += np.bincount(codes, minlength=len(self.groups))
+            keep = rank < self.max_ids_per_group
+            codes, ids = codes[keep], ids[keep]
+
+        self.codes.append(codes)
+        self.ids.append(ids.astype(str))
+
+    def id_strings(self):
+        """Return the '; '-joined IDs of each group, aligned with duplicate_counts."""
+        id_strings = np.full(len(self.groups), "", dtype=object)
+        codes = np.concatenate(self.codes) if self.codes else np.array([], dtype=np.intp)
+        if not len(codes):
+            return id_strings
+
+        # Chunks are sorted already, so this stable sort only merges them
+        ids = np.concatenate(self.ids)
+        order = np.argsort(codes, kind="stable")
+        codes, ids = codes[order], ids[order]
+
+        # Join every ID once, then slice each group out of the joined string
+        offsets = np.concatenate(([0], np.cumsum(np.char.str_len(ids) + len(self.separator))))
+        joined = self.separator.join(ids.tolist())
+        bounds = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [len(codes)]))
+        id_strings[codes[starts]] = [
+            joined[start:end - len(self.separator)]
+            for start, end in zip(offsets[starts].tolist(), offsets[ends].tolist())
+        ]
+
+        if self.max_ids_per_group is not None:
+            hidden = self.duplicate_counts.to_numpy() - self.max_ids_per_group
+            for position in np.flatnonzero(hidden > 0):
+                id_strings[position] += f"{self.separator}... (+{hidden[position]} more)"
+        return id_strings
+
+    def findings(self, column):
+        """Findings table of this column in the uniqueness_check result shape."""
+        return findings_table(column, self.duplicate_counts, self.id_strings())
+
+
+def findings_table(column, duplicate_counts, id_strings, approximate=False):
+    """Findings table of one column: each duplicated value, its (estimated) count and the IDs holding it."""
+    return pd.DataFrame({
+        "Column Name": column,
+        # map(str) rather than astype(str), which keeps NaN as a missing value
+        "Findings": duplicate_counts.index.map(str) + (": ~" if approximate else ": ")
+                    + duplicate_counts.astype(str).to_numpy() + " duplicates",
+        "ID": id_strings,
+    })
@@ -0,0 +1,233 @@
+import csv
+import io
+import logging
+import sqlite3
+import zlib
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+from .ingestion import DEFAULT_CHUNK_SIZE, pa, pq, read_data_chunks, storage_dtype
+
+try:
+    import zstandard
+except ImportError:  # zstd compression of downloads is optional
+    zstandard = None
+
+# Column added to the cleaned dataset: the fields of each row holding an invalid categorical value
+INVALID_FIELDS_COLUMN = "invalid_fields"
+
+# Compression -> file name suffix
+COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def available_compressions():
+    return [name for name in COMPRESSIONS if name != "zstd" or zstandard is not None]
+
+
+def compress_stream(chunks, compression=None):
+    """
+    Compress a stream of bytes chunk by chunk.
+
+    Args:
+        chunks (iterable): Bytes to compress.
+        compression (str): "gzip", "zstd" or None for no compression.
+
+    Raises:
+        ValueError: If the compression is unknown or its library is not installed.
+    """
+    if compression is None:
+        yield from chunks
+        return
+    if compression not in available_compressions():
+        raise ValueError(f"Unsupported compression: {compression}")
+
+    if compression == "gzip":
+        compressor = zlib.compressobj(wbits=31)  # 31: gzip container
+        compress, finish = compressor.compress, compressor.flush
+    else:
+        compressor = zstandard.ZstdCompressor().compressobj()
+        compress, finish = compressor.compress, compressor.flush
+    for chunk in chunks:
+        data = compress(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def invalid_values_by_field(error_records):
+    """Invalid values of each field, as strings, from grouped check_categorical_validity_ai records."""
+    invalid = {}
+    for record in error_records:
+        invalid.setdefault(record["Field"], set()).add(str(record["Invalid Value"]))
+    return invalid
+
+
+def _normalize_blanks(values):
+    """Strip the whitespace around text values and make blank ones missing."""
+    stripped = values.str.strip()
+    # .str gives NaN for non-string cells of object columns; those keep their value
+    cleaned = stripped.where(stripped.notna(), values) if values.dtype == object else stripped
+    return cleaned.mask(cleaned == "")
+
+
+class SeenRows:
+    """
+    Set of the row hashes seen so far, kept in a temporary SQLite database.
+
+    SQLite pages it out to a temporary file, so memory stays bounded however
+    many distinct rows the dataset has. The database is deleted on close.
+    """
+
+    # Pages of the database kept in memory (a negative size is in KiB)
+    CACHE_SIZE = -16 * 1024
+
+    def __init__(self):
+        # "": temporary database on disk; the generator of clean_chunks may be resumed from another thread
+        self._connection = sqlite3.connect("", check_same_thread=False)
+        self._connection.execute(f"PRAGMA cache_size = {self.CACHE_SIZE}")
+        self._connection.execute("CREATE TABLE seen (hash INTEGER PRIMARY KEY)")
+        self._connection.execute("CREATE TEMP TABLE batch (hash INTEGER PRIMARY KEY)")
+
+    def add(self, hashes):
+        """
+        Add distinct uint64 hashes to the set.
+
+        Returns:
+            np.ndarray: Whether each hash was new to the set.
+        """
+        keys = hashes.astype(np.uint64).view(np.int64).tolist()  # SQLite integers are signed
+        with self._connection:
+            self._connection.executemany("INSERT INTO batch VALUES (?)", ((key,) for key in keys))
+            known = {row[0] for row in self._connection.execute(
+                "SELECT hash FROM batch WHERE hash IN (SELECT hash FROM seen)")}
+            self._connection.execute("INSERT OR IGNORE INTO seen SELECT hash FROM batch")
+            self._connection.execute("DELETE FROM batch")
+        return np.fromiter((key not in known for key in keys), dtype=bool, count=len(keys))
+
+    def close(self):
+        self._connection.close()
+
+
+def clean_chunks(chunks, invalid_values=None):
+    """
+    Clean a dataset chunk by chunk.
+
+    Rows repeating an earlier row are dropped, text values are stripped and
+    blank ones made missing, and the fields of each row holding an invalid
+    categorical value are listed in INVALID_FIELDS_COLUMN. The hashes of the
+    rows already written are kept on disk (see SeenRows), not in memory.
+
+    Args:
+        chunks (iterable): DataFrame chunks of the dataset.
+        invalid_values (dict): Field -> invalid values (as strings) to flag.
+    """
+    invalid_values = invalid_values or {}
+    seen = SeenRows()
+    try:
+        for chunk in chunks:
+            hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+            first = ~pd.Series(hashes).duplicated().to_numpy()
+            first[first] = seen.add(hashes[first])
+            chunk = chunk[first]
+
+            flagged = pd.Series("", index=chunk.index, dtype=object)
+            for field, values in invalid_values.items():
+                if field in chunk.columns:
+                    invalid = chunk[field].astype(str).isin(values)
+                    flagged = flagged.where(~invalid, flagged + "; " + field)
+
+            cleaned = {}
+            for column in chunk.columns:
+                values = chunk[column]
+                if not is_numeric_dtype(values.dtype) and not is_bool_dtype(values.dtype):
+                    values = _normalize_blanks(values.astype(object) if isinstance(values.dtype, pd.CategoricalDtype)
+                                               else values)
+                cleaned[column] = values
+            cleaned[INVALID_FIELDS_COLUMN] = flagged.str[2:]
+            yield pd.DataFrame(cleaned, index=chunk.index)
+    finally:
+        seen.close()
+
+
+def csv_stream(frames):
+    """Encode DataFrame chunks as one CSV file, yielding the bytes of each chunk."""
+    header = True
+    for frame in frames:
+        yield frame.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+
+class _BytesSink(io.RawIOBase):
+    """Write-only file collecting what a ParquetWriter writes until it is taken."""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def take(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def parquet_stream(frames):
+    """
+    Encode DataFrame chunks as one Parquet file, yielding one row group per chunk.
+
+    Every chunk is written with the storage dtypes of the first one.
+    """
+    if pq is None:
+        raise ValueError("Parquet export needs pyarrow")
+    sink = _BytesSink()
+    writer = None
+    dtypes = None
+    for frame in frames:
+        if dtypes is None:
+            dtypes = {column: storage_dtype(dtype) for column, dtype in frame.dtypes.items()}
+        table = pa.Table.from_pandas(frame.astype(dtypes), preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema, compression="zstd")
+        writer.write_table(table)
+        yield sink.take()
+    if writer is not None:
+        writer.close()
+        yield sink.take()
+
+
+def records_csv_stream(records, columns, batch_rows=1000):
+    """Encode result records (dicts) as a CSV file, `batch_rows` rows at a time."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for start in range(0, len(records), batch_rows):
+        writer.writerows(records[start:start + batch_rows])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def cleaned_dataset_stream(path, file_format="csv", invalid_values=None, chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    Cleaned copy of an analysed CSV or Parquet file, as CSV or Parquet bytes.
+
+    Args:
+        path (str): Path of the analysed file.
+        file_format (str): "csv" or "parquet".
+        invalid_values (dict): Field -> invalid values (as strings) to flag.
+    """
+    logging.info(f"Exporting cleaned {path} as {file_format}")
+    frames = clean_chunks(read_data_chunks(path, chunksize=chunksize), invalid_values)
+    return parquet_stream(frames) if file_format == "parquet" else csv_stream(frames)
@@ -0,0 +1,292 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import pandas_dtype
+
+from .duplicates import DuplicateIdCollector, findings_table
+from .ingestion import DEFAULT_CHUNK_SIZE, is_parquet, pa, pq, read_data_chunks, read_parquet_chunks
+from .profile import ColumnProfile, DatasetProfile
+
+# Above this share of changed rows, re-checking everything is cheaper than patching the previous analysis
+MAX_CHANGED_RATIO = 0.5
+
+
+def dataset_key(columns, id_column):
+    """Identity of a dataset across versions: its schema and its ID column."""
+    payload = json.dumps([list(columns), id_column])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def snapshot_path(data_path):
+    """Path of the snapshot directory stored next to an analysed data file."""
+    return os.path.splitext(data_path)[0] + ".snapshot"
+
+
+def _write_series(series, path):
+    # Index and values go to Parquet with the pandas schema, so both read back with their dtypes
+    pq.write_table(pa.Table.from_pandas(series.rename_axis(None).to_frame("value")), path)
+
+
+def _read_series(path, name=None):
+    series = pq.read_table(path).to_pandas()["value"]
+    series.index.name = name
+    return series.rename(None)
+
+
+class DatasetSnapshot:
+    """
+    State kept from the analysis of one dataset version, so the next version can
+    be checked from its changed rows only.
+
+    Holds the hash of every row by ID, the column profile, and the IDs listed
+    for each duplicated value of each column. It is stored as a directory of
+    plain data (JSON, a NumPy archive and Parquet files), never pickled, since
+    it is read back from the upload directory.
+    """
+
+    def __init__(self, columns, id_column, ids, hashes, profile, duplicate_ids):
+        self.columns = list(columns)
+        self.id_column = id_column
+        self.ids = ids
+        self.hashes = hashes
+        self.profile = profile
+        self.duplicate_ids = duplicate_ids
+
+    def save(self, path):
+        if pq is None:
+            raise ValueError("Dataset snapshots need pyarrow")
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        # Text IDs are stored as strings, so the archive loads without pickle
+        ids = self.ids.astype(str) if self.ids.dtype == object else self.ids
+        np.savez(os.path.join(path, "rows.npz"), ids=ids, hashes=self.hashes)
+        columns = list(self.profile.columns.values())
+        for index, column in enumerate(columns):
+            _write_series(column.value_counts, os.path.join(path, f"values-{index}.parquet"))
+        duplicates = list(self.duplicate_ids.items())
+        for index, (_, id_strings) in enumerate(duplicates):
+            _write_series(id_strings, os.path.join(path, f"duplicates-{index}.parquet"))
+        metadata = {
+            "columns": self.columns,
+            "id_column": self.id_column,
+            "rows": self.profile.rows,
+            "profile": [
+                {"name": column.name, "dtype": str(column.dtype) if column.dtype is not None else None,
+                 "rows": column.rows}
+                for column in columns
+            ],
+            "duplicates": [name for name, _ in duplicates],
+        }
+        with open(os.path.join(path, "snapshot.json"), "w") as handle:
+            json.dump(metadata, handle)
+        logging.info(f"Saved dataset snapshot {path}")
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, "snapshot.json")) as handle:
+            metadata = json.load(handle)
+        with np.load(os.path.join(path, "rows.npz"), allow_pickle=False) as rows:
+            ids, hashes = rows["ids"], rows["hashes"]
+        columns = []
+        for index, entry in enumerate(metadata["profile"]):
+            column = ColumnProfile(entry["name"])
+            column.dtype = pandas_dtype(entry["dtype"]) if entry["dtype"] is not None else None
+            column.rows = entry["rows"]
+            column.value_counts = _read_series(os.path.join(path, f"values-{index}.parquet"), entry["name"])
+            columns.append(column)
+        duplicate_ids = {
+            name: _read_series(os.path.join(path, f"duplicates-{index}.parquet"))
+            for index, name in enumerate(metadata["duplicates"])
+        }
+        profile = DatasetProfile.from_columns(columns, rows=metadata["rows"])
+        return cls(metadata["columns"], metadata["id_column"], ids, hashes, profile, duplicate_ids)
+
+
+def load_snapshot(data_path):
+    """Snapshot of a previous analysis, or None if it has none."""
+    path = snapshot_path(data_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        return DatasetSnapshot.load(path)
+    except Exception:
+        logging.exception(f"Could not load dataset snapshot {path}")
+        return None
+
+
+def hash_rows(path, columns, id_column, chunksize=DEFAULT_CHUNK_SIZE, snapshot=None):
+    """
+    Hash every row of a CSV or Parquet file.
+
+    With the snapshot of a previous version, the rows added or changed since are
+    kept as they are hashed, so the diff needs no second read of the file. At most
+    MAX_CHANGED_RATIO of the previous row count is kept; past that, `changed_rows` is None.
+
+    Returns:
+        ids (np.ndarray): Value of `id_column` of each row.
+        hashes (np.ndarray): uint64 hash of each row's values, in file order.
+        changed_rows (pd.DataFrame or None): Rows added or changed since `snapshot`, in file
+            order (None without a snapshot, without such rows, or past the limit).
+    """
+    if snapshot is not None:
+        previous_index = pd.Index(snapshot.ids)
+        max_changed_rows = MAX_CHANGED_RATIO * len(snapshot.ids)
+    ids, hashes, changed, changed_count = [], [], [], 0
+    for chunk in read_data_chunks(path, chunksize=chunksize):
+        chunk_ids = chunk[id_column].to_numpy()
+        chunk_hashes = pd.util.hash_pandas_object(chunk[columns], index=False).to_numpy()
+        ids.append(chunk_ids)
+        hashes.append(chunk_hashes)
+        if snapshot is not None and changed is not None:
+            positions = previous_index.get_indexer(chunk_ids)
+            differs = positions < 0
+            matched = ~differs
+            differs[matched] = snapshot.hashes[positions[matched]] != chunk_hashes[matched]
+            changed_count += int(differs.sum())
+            if changed_count > max_changed_rows:
+                changed = None
+            elif differs.any():
+                changed.append(chunk[differs])
+    changed_rows = pd.concat(changed) if changed else None
+    if not ids:
+        return np.array([], dtype=object), np.array([], dtype=np.uint64), changed_rows
+    return np.concatenate(ids), np.concatenate(hashes), changed_rows
+
+
+def duplicate_id_strings(results_df, profile):
+    """Per column, the IDs listed for each duplicated value in a uniqueness_check result."""
+    id_strings = {}
+    if results_df.empty:
+        return id_strings
+    for column, findings in results_df.groupby("Column Name", sort=False):
+        # Findings rows follow the order of the profile's duplicate counts
+        id_strings[column] = pd.Series(findings["ID"].to_numpy(), index=profile[column].duplicate_counts().index)
+    return id_strings
+
+
+def build_snapshot(path, profile, id_column, results_df, chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    Snapshot of an analysed file, or None if its rows cannot be told apart by ID.
+
+    Args:
+        path (str): Path of the analysed CSV or Parquet file.
+        profile (DatasetProfile): Column profile of the file.
+        id_column (str): Column identifying rows across versions.
+        results_df (pd.DataFrame): Findings of uniqueness_check on the file.
+    """
+    columns = profile.column_names
+    if id_column not in columns:
+        return None
+    ids, hashes, _ = hash_rows(path, columns, id_column, chunksize)
+    if not pd.Index(ids).is_unique:
+        logging.info(f"Column '{id_column}' is not unique, no incremental analysis for {path}")
+        return None
+    return DatasetSnapshot(columns, id_column, ids, hashes, profile, duplicate_id_strings(results_df, profile))
+
+
+class RowDiff:
+    """IDs of the rows removed, changed and added between two versions of a dataset."""
+
+    def __init__(self, removed, changed, added, rows):
+        self.removed = removed
+        self.changed = changed
+        self.added = added
+        self.rows = rows
+
+    @property
+    def changed_ratio(self):
+        return (len(self.removed) + len(self.changed) + len(self.added)) / max(1, self.rows)
+
+    def summary(self):
+        return {"removed": len(self.removed), "changed": len(self.changed), "added": len(self.added)}
+
+
+def diff_rows(snapshot, ids, hashes):
+    """Compare the row hashes of a new version with those of a snapshot, matching rows by ID."""
+    old_index = pd.Index(snapshot.ids)
+    new_index = pd.Index(ids)
+    positions = old_index.get_indexer(new_index)
+    matched = positions >= 0
+    changed = np.zeros(len(ids), dtype=bool)
+    changed[matched] = snapshot.hashes[positions[matched]] != hashes[matched]
+    return RowDiff(
+        removed=old_index[~old_index.isin(new_index)].to_numpy(),
+        changed=new_index[changed].to_numpy(),
+        added=new_index[~matched].to_numpy(),
+        rows=max(len(old_index), len(new_index)),
+    )
+
+
+def read_rows(path, id_column, ids, chunksize=DEFAULT_CHUNK_SIZE):
+    """Rows of a CSV or Parquet file whose ID is in `ids`."""
+    rows = []
+    if len(ids):
+        for chunk in read_data_chunks(path, chunksize=chunksize):
+            selected = chunk[chunk[id_column].isin(ids)]
+            if not selected.empty:
+                rows.append(selected)
+    return pd.concat(rows) if rows else None
+
+
+def touched_values(frames, columns):
+    """Per column, the distinct values held by any of the given rows."""
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        return {}
+    return {column: pd.Index(pd.concat([frame[column] for frame in frames]).unique()) for column in columns}
+
+
+def incremental_uniqueness(path, profile, previous_ids, touched, id_column, total_fields,
+                           max_ids_per_group=None, chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    uniqueness_check of a new dataset version from its updated profile.
+
+    Duplicate counts come from the profile. The IDs listed for a duplicated
+    value are reused from the previous version unless a changed row holds that
+    value; only those groups are collected again, in one pass over the columns
+    that have any.
+
+    Returns:
+        Same as uniqueness_check.
+    """
+    duplicates = {}
+    for column in profile.column_names:
+        duplicate_counts = profile[column].duplicate_counts()
+        if not duplicate_counts.empty:
+            duplicates[column] = duplicate_counts
+    total_duplicates = sum(int(duplicate_counts.sum()) for duplicate_counts in duplicates.values())
+
+    id_strings = {}
+    rescan = {}
+    for column, duplicate_counts in duplicates.items():
+        known = previous_ids.get(column, pd.Series(dtype=object)).reindex(duplicate_counts.index)
+        stale = duplicate_counts.index.isin(touched.get(column, [])) | known.isna().to_numpy()
+        id_strings[column] = known.to_numpy(dtype=object, copy=True)
+        if stale.any():
+            rescan[column] = (np.flatnonzero(stale), DuplicateIdCollector(duplicate_counts[stale], max_ids_per_group))
+
+    if rescan:
+        logging.info(f"Collecting duplicate IDs again for {len(rescan)} columns")
+        columns = list(dict.fromkeys([*rescan, id_column]))
+        if is_parquet(path):
+            chunks = read_parquet_chunks(path, chunksize=chunksize, columns=columns)
+        else:
+            chunks = read_data_chunks(path, chunksize=chunksize)
+        for chunk in chunks:
+            for column, (positions, collector) in rescan.items():
+                collector.update(chunk[column], chunk[id_column])
+        for column, (positions, collector) in rescan.items():
+            id_strings[column][positions] = collector.id_strings()
+
+    results = [findings_table(column, duplicate_counts, id_strings[column])
+               for column, duplicate_counts in duplicates.items()]
+    results_df = pd.concat(results, ignore_index=True) if results else pd.DataFrame([])
+
+    uniqueness_score = 100 if total_fields == 0 else max(0, 100 * ((total_fields - total_duplicates) / total_fields))
+    return results_df, round(uniqueness_score, 2), total_duplicates
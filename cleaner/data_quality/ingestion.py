@@ -0,0 +1,281 @@
+import functools
+import hashlib
+import os
+import tempfile
+import logging
+import pandas as pd
+import numpy as np
+from pandas.api.types import is_numeric_dtype
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet spilling and the pyarrow CSV engine are optional
+    pa = pa_csv = pq = None
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Typed CSV loading: dtypes are inferred once per file from its first SAMPLE_ROWS rows.
+# Text columns whose sample has at most CATEGORY_MAX_RATIO distinct values per
+# non-null value are stored as categoricals, other text columns as (Arrow-backed,
+# when available) strings. Numeric columns keep their parsed dtype: downcasting
+# from a sample could silently overflow or lose precision on later rows.
+TYPED_LOADING = True
+SAMPLE_ROWS = 10_000
+CATEGORY_MAX_RATIO = 0.05
+CSV_ENGINE = os.getenv("CSV_ENGINE", "c")  # "c" or "pyarrow"
+
+
+def spool_upload(uploaded_file, directory=None):
+    """
+    Copy an uploaded file to disk chunk by chunk, hashing its content on the way.
+
+    Args:
+        uploaded_file (UploadedFile): File received by a Django view.
+        directory (str): Directory for the spooled file (system temp dir if None).
+
+    Returns:
+        path (str): Path of the spooled file.
+        content_hash (str): SHA-256 hex digest of the file content.
+    """
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    digest = hashlib.sha256()
+    suffix = os.path.splitext(uploaded_file.name)[1] or ".csv"
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=directory) as handle:
+        for chunk in uploaded_file.chunks():
+            digest.update(chunk)
+            handle.write(chunk)
+
+    logging.info(f"Spooled upload '{uploaded_file.name}' to {handle.name}")
+    return handle.name, digest.hexdigest()
+
+
+def string_dtype():
+    """Arrow-backed string dtype with NaN as missing value, or None (plain object) without pyarrow."""
+    if pa is None:
+        return None
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except TypeError:  # pandas < 2.3
+        return None
+
+
+def infer_csv_dtypes(path, sample_rows=SAMPLE_ROWS, category_max_ratio=CATEGORY_MAX_RATIO):
+    """
+    Infer compact dtypes for the text columns of a CSV file from a sample of its first rows.
+
+    Args:
+        path (str): Path of the CSV file.
+        sample_rows (int): Number of leading rows the dtypes are inferred from.
+        category_max_ratio (float): Largest distinct/non-null ratio of a categorical column.
+
+    Returns:
+        dict: Column name -> "category" or string dtype, for text columns only.
+    """
+    stat = os.stat(path)
+    return dict(_infer_csv_dtypes(str(path), stat.st_mtime_ns, stat.st_size, sample_rows, category_max_ratio))
+
+
+@functools.lru_cache(maxsize=64)
+def _infer_csv_dtypes(path, mtime_ns, size, sample_rows, category_max_ratio):
+    # Cached per file version, so every pass over a file reads it with the same dtypes
+    sample = pd.read_csv(path, nrows=sample_rows)
+    dtypes = {}
+    for column in sample.columns:
+        values = sample[column]
+        if is_numeric_dtype(values.dtype):
+            continue
+        non_null = values.count()
+        if non_null and values.nunique() / non_null <= category_max_ratio:
+            dtypes[column] = "category"
+        elif string_dtype() is not None:
+            dtypes[column] = string_dtype()
+    return tuple(dtypes.items())
+
+
+def _arrow_type(dtype):
+    if dtype == "category":
+        return pa.dictionary(pa.int32(), pa.string())
+    return pa.string()
+
+
+def _average_row_bytes(path, sample_rows=SAMPLE_ROWS):
+    with open(path, "rb") as handle:
+        lines = handle.readlines(sample_rows * 256)[:sample_rows]
+    return max(1, sum(len(line) for line in lines) // max(1, len(lines)))
+
+
+def _arrow_convert_options(dtypes):
+    # Text columns get the explicit types pandas would use, so e.g. ISO dates stay strings
+    return pa_csv.ConvertOptions(
+        column_types={column: _arrow_type(dtype) for column, dtype in dtypes.items()},
+        strings_can_be_null=True,
+    )
+
+
+def _arrow_dtypes(path, typed):
+    dtypes = infer_csv_dtypes(path)
+    return dtypes if typed else {column: "string" for column in dtypes}
+
+
+def _read_csv_chunks_arrow(path, chunksize, dtypes):
+    """Stream a CSV file with the multi-threaded pyarrow reader, about `chunksize` rows per block."""
+    # Arrow blocks are sized in bytes, estimated from the average row length
+    block_size = max(1 << 16, chunksize * _average_row_bytes(path))
+    reader = pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        convert_options=_arrow_convert_options(dtypes),
+    )
+    offset = 0
+    for batch in reader:
+        chunk = batch.to_pandas()
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+
+def read_csv_chunks(path, chunksize=DEFAULT_CHUNK_SIZE, typed=None, engine=None, **kwargs):
+    """
+    Read a CSV file as an iterator of DataFrames with at most `chunksize` rows.
+
+    Args:
+        path (str): Path of the CSV file.
+        chunksize (int): Maximum number of rows per chunk.
+        typed (bool): Read text columns with the compact dtypes of infer_csv_dtypes
+            (TYPED_LOADING if None).
+        engine (str): "c" for pandas' parser or "pyarrow" for Arrow's streaming reader
+            (CSV_ENGINE if None). The pyarrow engine only supports the default options.
+
+    Returns:
+        Iterator[pd.DataFrame]: Chunks with a running RangeIndex across the file.
+    """
+    typed = TYPED_LOADING if typed is None else typed
+    engine = engine or CSV_ENGINE
+
+    if engine == "pyarrow" and pa_csv is not None and not kwargs:
+        return _read_csv_chunks_arrow(path, chunksize, _arrow_dtypes(path, typed))
+
+    dtypes = infer_csv_dtypes(path) if typed else {}
+    if dtypes and "usecols" not in kwargs:
+        kwargs.setdefault("dtype", dtypes)
+    return pd.read_csv(path, chunksize=chunksize, **kwargs)
+
+
+def load_csv(path, typed=None, engine=None):
+    """Read a whole CSV file into one DataFrame, with the dtypes and engine of read_csv_chunks."""
+    typed = TYPED_LOADING if typed is None else typed
+    engine = engine or CSV_ENGINE
+    if engine == "pyarrow" and pa_csv is not None:
+        return pa_csv.read_csv(path, convert_options=_arrow_convert_options(_arrow_dtypes(path, typed))).to_pandas()
+    return pd.read_csv(path, dtype=infer_csv_dtypes(path) if typed else None)
+
+
+def read_parquet_chunks(path, chunksize=DEFAULT_CHUNK_SIZE, columns=None):
+    """
+    Read a Parquet file as an iterator of DataFrames with at most `chunksize` rows.
+
+    Chunks keep a running RangeIndex across the file, like read_csv_chunks.
+    """
+    offset = 0
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+        chunk = batch.to_pandas()
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+
+def is_parquet(path):
+    return str(path).endswith(".parquet")
+
+
+def estimate_rows(path):
+    """Row count of a Parquet file, or an estimate for a CSV file from the length of its first lines."""
+    if is_parquet(path) and pq is not None:
+        return pq.ParquetFile(path).metadata.num_rows
+    return os.path.getsize(path) // _average_row_bytes(path)
+
+
+def read_data_chunks(path, chunksize=DEFAULT_CHUNK_SIZE):
+    """Read a spooled CSV or spilled Parquet file chunk by chunk."""
+    if is_parquet(path):
+        return read_parquet_chunks(path, chunksize=chunksize)
+    return read_csv_chunks(path, chunksize=chunksize)
+
+
+def storage_dtype(dtype):
+    """Dtype a column is written with: numeric and boolean columns as they are, anything else as strings."""
+    if dtype is not None and is_numeric_dtype(dtype):
+        return dtype
+    # NaN-backed strings, so missing cells read back as NaN like the ones parsed from CSV
+    return string_dtype() or "string"
+
+
+def spill_to_parquet(path, dtypes, chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    Convert a spooled CSV file to a compressed Parquet file, chunk by chunk.
+
+    Args:
+        path (str): Path of the CSV file.
+        dtypes (dict): Column name -> dtype common to every chunk (see ColumnProfile.dtype), or None
+            to write every chunk with the column types of the first one.
+        chunksize (int): Maximum number of rows held in memory at once.
+
+    Returns:
+        str: Path of the Parquet file, or the CSV path when pyarrow is not installed.
+
+    Raises:
+        pyarrow.ArrowInvalid: If `dtypes` is None and a later chunk does not fit the
+            types of the first one (e.g. 1.5 in a column of integers).
+    """
+    if pq is None:
+        logging.warning("pyarrow is not installed, keeping the upload as CSV")
+        return path
+
+    target = os.path.splitext(path)[0] + ".parquet"
+    writer = None
+    try:
+        for chunk in read_csv_chunks(path, chunksize=chunksize):
+            chunk_dtypes = dtypes if dtypes is not None else chunk.dtypes.to_dict()
+            chunk = chunk.astype({column: storage_dtype(dtype) for column, dtype in chunk_dtypes.items()})
+            # Integer columns stay integers when a later chunk has nulls, as they are read back per chunk
+            table = pa.Table.from_pandas(chunk, schema=writer.schema if writer else None, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(target, table.schema, compression="zstd")
+            writer.write_table(table)
+    except Exception:
+        if writer is not None:
+            writer.close()
+        remove_spooled_file(target)
+        raise
+    if writer is None:
+        return path
+    writer.close()
+
+    logging.info(f"Spilled {path} to {target}")
+    return target
+
+
+def read_csv_header(path):
+    """Return the column names of a CSV file without reading its rows."""
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
+def read_columns(path):
+    """Return the column names of a spooled CSV or spilled Parquet file without reading its rows."""
+    if is_parquet(path):
+        return pq.ParquetFile(path).schema_arrow.names
+    return read_csv_header(path)
+
+
+def remove_spooled_file(path):
+    """Delete a spooled upload, ignoring files that are already gone."""
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,219 @@
+import logging
+import numpy as np
+import pandas as pd
+
+# Joins the values of a composite key; shown as KEY_DISPLAY_SEPARATOR in findings
+KEY_SEPARATOR = "\x1f"
+KEY_DISPLAY_SEPARATOR = " | "
+# Variants of a group listed in its findings label
+LABEL_VARIANTS = 3
+
+# MinHash signature length and LSH banding: 16 bands of 4 rows make pairs above
+# ~0.5 Jaccard similarity likely to share a bucket; candidates are then checked
+# against the similarity threshold on the full signature.
+NUM_PERM = 64
+BANDS = 16
+SHINGLE_SIZE = 3  # at most 3, see _shingles
+# Characters of a value compared by fuzzy matching, and values shingled at once
+MAX_FUZZY_CHARS = 64
+SIGNATURE_BLOCK = 20_000
+# Odd constant mixing the terms of a band into one bucket hash
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def normalize_values(values):
+    """
+    Canonical form of text values for duplicate matching: lower case, punctuation
+    removed and whitespace collapsed. Nulls and values left empty become NaN.
+    """
+    values = pd.Series(values, dtype=object)
+    normalized = (
+        values.astype(str)
+        .str.lower()
+        # The separator of composite keys is kept, so values do not merge across columns
+        .str.replace(rf"[^\w\s{KEY_SEPARATOR}]", "", regex=True)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.replace(rf" ?{KEY_SEPARATOR} ?", KEY_SEPARATOR, regex=True)
+        .str.strip()
+    )
+    return normalized.mask(values.isna() | (normalized.str.replace(KEY_SEPARATOR, "") == ""))
+
+
+def composite_keys(chunk, columns):
+    """Raw key of each row over several columns, its values joined (nulls as empty strings)."""
+    parts = [chunk[column].astype(object).where(chunk[column].notna(), "").astype(str) for column in columns]
+    keys = parts[0]
+    for part in parts[1:]:
+        keys = keys + KEY_SEPARATOR + part
+    return keys
+
+
+def key_name(key):
+    """Column name of a key in findings: the column, or its columns joined with '+'."""
+    return key if isinstance(key, str) else " + ".join(key)
+
+
+def _shingles(texts, size):
+    """
+    Character n-grams of each text (padded with a space, truncated to MAX_FUZZY_CHARS),
+    packed into one uint64 per n-gram. Rows shorter than the longest text repeat
+    their first n-gram, which leaves their minimum hashes unchanged.
+    """
+    padded = np.array([f" {text[:MAX_FUZZY_CHARS]} " for text in texts])
+    width = padded.dtype.itemsize // 4
+    codes = padded.view(np.uint32).reshape(len(texts), width).astype(np.uint64)
+    codes = np.pad(codes, ((0, 0), (0, size - 1)))
+    positions = max(1, width - size + 1)
+    grams = np.zeros((len(texts), positions), dtype=np.uint64)
+    for offset in range(size):
+        # Code points fit in 21 bits, so up to three of them pack into one uint64
+        grams |= codes[:, offset:offset + positions] << np.uint64(21 * offset)
+    lengths = np.char.str_len(padded)
+    beyond = np.arange(positions) > np.maximum(lengths - size, 0)[:, None]
+    return np.where(beyond, grams[:, :1], grams)
+
+
+def minhash_signatures(texts, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, seed=0):
+    """
+    MinHash signature of each text over its character shingles.
+
+    Each of the `num_perm` hash functions is a random multiply-shift hash; a
+    signature term is the minimum of one function over the text's shingles.
+    The share of equal terms of two signatures estimates their Jaccard similarity.
+
+    Returns:
+        np.ndarray: (len(texts), num_perm) uint64 signatures.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+    shift = np.uint64(32)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    for start in range(0, len(texts), SIGNATURE_BLOCK):
+        grams = _shingles(texts[start:start + SIGNATURE_BLOCK], shingle_size)
+        for index in range(num_perm):
+            # Multiplication wraps modulo 2**64; the high bits are the well-mixed ones
+            signatures[start:start + len(grams), index] = ((a[index] * grams + b[index]) >> shift).min(axis=1)
+    return signatures
+
+
+def _connected_components(size, left, right):
+    """Component label (smallest member) of each of `size` nodes linked by the edges left[i] - right[i]."""
+    labels = np.arange(size)
+    while True:
+        low = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, low)
+        np.minimum.at(updated, right, low)
+        updated = updated[updated]  # pointer jumping
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def lsh_clusters(signatures, threshold, bands=BANDS):
+    """
+    Cluster texts whose MinHash signatures agree on at least `threshold` of their terms.
+
+    Signatures are split into `bands`; texts sharing a band bucket are compared
+    with the first text of that bucket only, so the cost grows linearly with
+    the number of texts rather than with the number of pairs.
+
+    Returns:
+        np.ndarray: Cluster label of each text.
+    """
+    count, num_perm = signatures.shape
+    if count < 2:
+        return np.arange(count)
+    rows = num_perm // bands
+    left, right = [], []
+    for band in range(bands):
+        terms = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        buckets = np.zeros(count, dtype=np.uint64)
+        for column in range(rows):
+            buckets = (buckets ^ terms[:, column]) * _MIX
+        _, first, codes = np.unique(buckets, return_index=True, return_inverse=True)
+        representative = first[codes]
+        candidates = np.flatnonzero(representative != np.arange(count))
+        similarity = (signatures[candidates] == signatures[representative[candidates]]).mean(axis=1)
+        matched = candidates[similarity >= threshold]
+        left.append(matched)
+        right.append(representative[matched])
+    return _connected_components(count, np.concatenate(left), np.concatenate(right))
+
+
+class KeyGroups:
+    """
+    Near-duplicate groups of the distinct values of one key, and the row count of each group.
+
+    `codes` gives the group of each distinct value (-1 when it is in none), so
+    the rows of a chunk are mapped to their groups with one index lookup.
+    """
+
+    def __init__(self, key, values, codes, counts):
+        self.key = key
+        self.values = pd.Index(values)
+        self.codes = codes
+        self.counts = counts
+
+    def group_codes(self, values):
+        positions = self.values.get_indexer(np.asarray(values, dtype=object))
+        return np.where(positions >= 0, self.codes[positions], -1)
+
+
+def _label(variants, counts):
+    """Findings label of a group: its most frequent variants."""
+    order = np.argsort(-counts, kind="stable")
+    shown = [str(variants[position]).replace(KEY_SEPARATOR, KEY_DISPLAY_SEPARATOR)
+             for position in order[:LABEL_VARIANTS]]
+    more = len(variants) - len(shown)
+    return " ~ ".join(shown) + (f" (+{more} more variants)" if more > 0 else "")
+
+
+def group_keys(key, value_counts, fuzzy=False, threshold=0.8, min_variants=2):
+    """
+    Group the distinct values of a key that are the same once normalized or, with
+    `fuzzy`, similar once normalized.
+
+    Args:
+        key: Column name, or tuple of column names for a composite key.
+        value_counts (pd.Series): Row count of each distinct raw value of the key.
+        fuzzy (bool): Also group normalized values with a MinHash similarity of at least `threshold`.
+        min_variants (int): Minimum number of distinct raw values in a reported group
+            (2 leaves exact duplicates to uniqueness_check).
+
+    Returns:
+        KeyGroups, or None if no group is reported.
+    """
+    value_counts = value_counts[value_counts.index.notna()]
+    normalized = normalize_values(value_counts.index)
+    kept = normalized.notna().to_numpy()
+    values = value_counts.index[kept]
+    counts = value_counts.to_numpy()[kept].astype(np.int64)
+    if not len(values):
+        return None
+
+    key_codes, distinct_keys = pd.factorize(normalized[kept])
+    if fuzzy and len(distinct_keys) > 1:
+        clusters = lsh_clusters(minhash_signatures(list(distinct_keys)), threshold)
+        key_codes = pd.factorize(clusters[key_codes])[0]
+
+    group_rows = np.bincount(key_codes, weights=counts).astype(np.int64)
+    group_variants = np.bincount(key_codes)
+    reported = (group_rows > 1) & (group_variants >= min_variants)
+    if not reported.any():
+        return None
+
+    # Renumber the reported groups by decreasing row count, like duplicate_counts
+    order = np.flatnonzero(reported)[np.argsort(-group_rows[reported], kind="stable")]
+    renumber = np.full(len(group_rows), -1)
+    renumber[order] = np.arange(len(order))
+    codes = renumber[key_codes]
+
+    # Members of every reported group, split out of one sort by group
+    members = np.flatnonzero(codes >= 0)
+    members = members[np.argsort(codes[members], kind="stable")]
+    bounds = np.flatnonzero(np.diff(codes[members])) + 1
+    labels = [_label(values[group], counts[group]) for group in np.split(members, bounds)]
+    logging.info(f"{len(order)} near-duplicate groups in '{key_name(key)}'")
+    return KeyGroups(key, values, codes, pd.Series(group_rows[order], index=pd.Index(labels, dtype=object)))
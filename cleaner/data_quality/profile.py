@@ -0,0 +1,255 @@
+import logging
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype, is_object_dtype, is_string_dtype
+from .ingestion import DEFAULT_CHUNK_SIZE, read_data_chunks
+
+
+def common_dtype(left, right):
+    """Dtype able to hold values of both dtypes (object unless both are numeric)."""
+    if left is None or left == right:
+        return right
+    if all(is_numeric_dtype(dtype) and not is_bool_dtype(dtype) for dtype in (left, right)):
+        try:
+            return np.promote_types(left, right)
+        except TypeError:  # pandas extension dtypes
+            pass
+    return np.dtype(object)
+
+
+class ColumnProfile:
+    """
+    Running statistics of one column, built from its value frequencies.
+
+    Every statistic is derived from a single `value_counts(dropna=False)` per
+    chunk, so nulls, blanks, distinct counts and duplicate groups cost one scan
+    of the column and no copy of the frame.
+    """
+
+    approximate = False
+
+    def __init__(self, name):
+        self.name = name
+        self.dtype = None
+        self.rows = 0
+        self.value_counts = pd.Series(dtype="int64")
+        self._frequencies = None
+
+    @staticmethod
+    def _counts(series):
+        counts = series.value_counts(dropna=False, sort=False)
+        if isinstance(counts.index, pd.CategoricalIndex):
+            # Categoricals report every category, including ones absent from this chunk
+            counts = counts[counts > 0]
+            counts.index = counts.index.astype(object)
+        return counts
+
+    def update(self, series):
+        # Chunks of one column may be parsed with different dtypes (e.g. int, then float with NaN)
+        self.dtype = common_dtype(self.dtype, series.dtype)
+        self.rows += len(series)
+        counts = self._counts(series)
+        self._frequencies = None
+        if self.value_counts.empty:
+            self.value_counts = counts
+        else:
+            self.value_counts = self.value_counts.add(counts, fill_value=0)
+
+    def remove(self, series):
+        """Take the values of rows that left the dataset out of the statistics."""
+        self.rows -= len(series)
+        remaining = self.value_counts.sub(self._counts(series), fill_value=0)
+        if (remaining < 0).any():
+            # The values were parsed differently from the ones this profile was built from
+            raise ValueError(f"Column '{self.name}' does not hold the removed values")
+        self.value_counts = remaining[remaining > 0]
+        self._frequencies = None
+
+    def _non_null_counts(self):
+        counts = self.value_counts
+        return counts[counts.index.notna()]
+
+    @property
+    def nulls(self):
+        counts = self.value_counts
+        return int(counts[counts.index.isna()].sum())
+
+    @property
+    def blanks(self):
+        """Number of whitespace-only string cells."""
+        counts = self._non_null_counts()
+        if counts.empty or not (is_object_dtype(counts.index) or is_string_dtype(counts.index)):
+            return 0
+        labels = pd.Series(counts.index, dtype="object")
+        blank_mask = labels.str.fullmatch(r"\s*", na=False).to_numpy(dtype=bool)
+        return int(counts[blank_mask].sum())
+
+    @property
+    def missing(self):
+        return self.nulls + self.blanks
+
+    @property
+    def non_null(self):
+        return self.rows - self.nulls
+
+    @property
+    def distinct(self):
+        return len(self._non_null_counts())
+
+    @property
+    def frequencies(self):
+        """Value frequencies, most frequent first, then in value order (NaN included)."""
+        if self._frequencies is None:
+            counts = self.value_counts.astype("int64")
+            # Ties follow the values, not the order in which the chunks were folded
+            try:
+                counts = counts.sort_index(kind="stable")
+            except TypeError:  # values of mixed types
+                counts = counts.iloc[np.argsort(counts.index.map(str).to_numpy(), kind="stable")]
+            self._frequencies = counts.sort_values(ascending=False, kind="stable")
+        return self._frequencies
+
+    def unique_values(self):
+        return list(self.value_counts.index)
+
+    @property
+    def entropy(self):
+        """Shannon entropy of the non-null values, normalized to 0-1 by its maximum log2(distinct)."""
+        counts = self._non_null_counts().to_numpy(dtype=float)
+        if len(counts) < 2:
+            return 0.0
+        p = counts / counts.sum()
+        return float(-(p * np.log2(p)).sum() / np.log2(len(counts)))
+
+    def looks_categorical(self, max_distinct=5000, max_distinct_ratio=0.5, max_entropy=0.98, min_distinct=50):
+        """
+        Cheap statistical test ruling out columns that cannot be categorical.
+
+        A column is rejected when it has too many distinct values, when most of
+        its values are distinct, or when many distinct values are spread almost
+        uniformly (high normalized entropy), as in free text or identifiers.
+        """
+        distinct = self.distinct
+        if distinct > max_distinct:
+            return False
+        if self.non_null and distinct > min_distinct and distinct / self.non_null > max_distinct_ratio:
+            return False
+        if distinct > min_distinct and self.entropy > max_entropy:
+            return False
+        return True
+
+    def value_sample(self, top_k=50, rare_sample=50, seed=0):
+        """
+        Representative values of the column: the `top_k` most frequent ones plus a
+        sample of the rarer ones, stratified by frequency band (powers of two) so
+        values seen a handful of times are represented alongside singletons.
+        """
+        counts = self.frequencies
+        top = list(counts.index[:top_k])
+        rare = counts.iloc[top_k:]
+        if len(rare) <= rare_sample:
+            return top + list(rare.index)
+
+        bands = np.floor(np.log2(rare.to_numpy()))
+        rng = np.random.default_rng(seed)
+        chosen = []
+        for band in np.unique(bands):
+            positions = np.flatnonzero(bands == band)
+            size = min(len(positions), max(1, round(rare_sample * len(positions) / len(rare))))
+            chosen.extend(rng.choice(positions, size=size, replace=False))
+        return top + list(rare.index[np.sort(chosen)])
+
+    def duplicate_counts(self):
+        """Counts of values seen more than once, most frequent first (NaN included)."""
+        counts = self.frequencies
+        return counts[counts > 1]
+
+    @property
+    def duplicate_rows(self):
+        """Number of cells holding a value that appears more than once."""
+        return int(self.duplicate_counts().sum())
+
+
+class DatasetProfile:
+    """Column profiles of a dataset, folded chunk by chunk."""
+
+    column_profile = ColumnProfile
+    approximate = False
+
+    def __init__(self, columns=None):
+        self.columns = {} if columns is None else {name: self.column_profile(name) for name in columns}
+        self.rows = 0
+
+    def update(self, chunk):
+        if self.rows == 0:
+            if not self.columns:
+                self.columns = {name: self.column_profile(name) for name in chunk.columns}
+            for name in [name for name in self.columns if name not in chunk.columns]:
+                logging.warning(f"Column '{name}' not found in DataFrame. Skipping.")
+                del self.columns[name]
+        self.rows += len(chunk)
+        for name, column_profile in self.columns.items():
+            column_profile.update(chunk[name])
+        return self
+
+    def remove(self, chunk):
+        """Take rows that left the dataset (e.g. in a newer version of it) out of the profile."""
+        self.rows -= len(chunk)
+        for name, column_profile in self.columns.items():
+            column_profile.remove(chunk[name])
+        return self
+
+    @classmethod
+    def from_columns(cls, column_profiles, rows):
+        """Assemble a profile from column profiles built separately (e.g. in worker processes)."""
+        profile = cls()
+        profile.columns = {column.name: column for column in column_profiles}
+        profile.rows = rows
+        return profile
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    @property
+    def column_names(self):
+        return list(self.columns)
+
+    @property
+    def total_fields(self):
+        return self.rows * len(self.columns)
+
+    @property
+    def total_missing(self):
+        return sum(column.missing for column in self.columns.values())
+
+    @property
+    def dtypes(self):
+        return {name: column.dtype for name, column in self.columns.items()}
+
+
+def profile_dataframe(df, columns=None):
+    """Build a DatasetProfile from an in-memory DataFrame."""
+    return DatasetProfile(columns if columns is not None else df.columns).update(df)
+
+
+def profile_chunks(chunks, columns=None, on_chunk=None):
+    """
+    Build a DatasetProfile by folding an iterable of DataFrame chunks.
+
+    `on_chunk`, if given, is called with the partial profile after each chunk.
+    """
+    profile = DatasetProfile(columns)
+    for chunk in chunks:
+        profile.update(chunk)
+        if on_chunk is not None:
+            on_chunk(profile)
+    return profile
+
+
+def profile_file(path, columns=None, chunksize=DEFAULT_CHUNK_SIZE, on_chunk=None):
+    """Build a DatasetProfile with a single streaming read of a CSV or Parquet file."""
+    logging.info(f"Profiling {path}")
+    return profile_chunks(read_data_chunks(path, chunksize=chunksize), columns, on_chunk=on_chunk)
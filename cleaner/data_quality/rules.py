@@ -0,0 +1,156 @@
+import functools
+import os
+import numpy as np
+import pandas as pd
+from .ingestion import string_dtype
+from .profile import profile_file
+
+# Formats recognised in text columns without configuration, tried in this order
+FORMATS = {
+    "email": r"[^@\s]+@[^@\s]+\.[A-Za-z]{2,}",
+    "url": r"https?://[^\s/$.?#][^\s]*",
+    "uuid": r"[0-9A-Fa-f]{8}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{12}",
+    "iso date": r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?",
+    "phone number": r"\+?\(?\d[\d\s().-]{5,18}\d",
+}
+# Share of a column's rows that must follow a format (or pattern) for it to become the column's rule
+FORMAT_MIN_SHARE = 0.9
+# Formats are first tried on this many of the most frequent distinct values, and only
+# matched against every value when they cover at least SCREEN_MIN_SHARE of their rows
+SCREEN_VALUES = 1000
+SCREEN_MIN_SHARE = 0.5
+
+# Text values that look like dates, and the formats tried to parse them
+DATE_LIKE = r"\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}(?:[ T].*)?"
+DATE_FORMATS = ["ISO8601", "%d/%m/%Y", "%m/%d/%Y", "%d.%m.%Y", "%d-%m-%Y", "mixed"]
+
+
+def text_values(counts):
+    """
+    Distinct non-null values of a column as strings, and the row count of each.
+
+    Strings are Arrow-backed when pyarrow is installed, so regexes run over
+    the whole array rather than value by value.
+    """
+    counts = counts[counts.index.notna()]
+    values = pd.Series(counts.index.map(str), dtype=object)
+    return values.astype(string_dtype() or object), counts.to_numpy(dtype=np.int64)
+
+
+def share(mask, counts):
+    """Share of the rows whose distinct value is selected by `mask`."""
+    total = counts.sum()
+    return float(counts[mask].sum() / total) if total else 0.0
+
+
+def matches(values, pattern):
+    return values.str.fullmatch(pattern, na=False).to_numpy(dtype=bool)
+
+
+def _screen(values, counts):
+    """The most frequent distinct values and their counts, to rule formats out cheaply."""
+    if len(values) <= SCREEN_VALUES:
+        return values, counts
+    top = np.argpartition(-counts, SCREEN_VALUES)[:SCREEN_VALUES]
+    return values.iloc[top].reset_index(drop=True), counts[top]
+
+
+def detect_format(values, counts, min_share=FORMAT_MIN_SHARE):
+    """Name of the first known format followed by at least `min_share` of the rows, or None."""
+    screen_values, screen_counts = _screen(values, counts)
+    for name, pattern in FORMATS.items():
+        if share(matches(screen_values, pattern), screen_counts) < SCREEN_MIN_SHARE:
+            continue
+        if share(matches(values, pattern), counts) >= min_share:
+            return name
+    return None
+
+
+def shapes(values):
+    """
+    Layout of each value: runs of upper case letters become "A", of lower case
+    letters "a" and of digits "9" ("AB-1234" and "XY-99" are both "A-9").
+    """
+    return (
+        values.str.replace(r"[A-Z]+", "A", regex=True)
+        .str.replace(r"[a-z]+", "a", regex=True)
+        .str.replace(r"[0-9]+", "9", regex=True)
+    )
+
+
+def dominant_shape(values, counts, min_share=FORMAT_MIN_SHARE):
+    """
+    Layout shared by at least `min_share` of the rows of a code-like column, or None.
+
+    Only layouts holding digits are patterns: text without digits (names, free
+    text) varies in layout too much to flag the values that differ.
+    """
+    screen_values, screen_counts = _screen(values, counts)
+    if not share(shapes(screen_values).str.contains("9", regex=False).to_numpy(dtype=bool),
+                 screen_counts) >= SCREEN_MIN_SHARE:
+        return None
+    layouts = shapes(values)
+    totals = pd.Series(counts).groupby(layouts.to_numpy()).sum()
+    layout = totals.idxmax()
+    if "9" not in layout or totals[layout] / counts.sum() < min_share:
+        return None
+    return layout
+
+
+def parse_dates(values, counts, min_share=FORMAT_MIN_SHARE):
+    """
+    Parse the distinct text values of a column as UTC timestamps, with the date
+    format reading the most rows.
+
+    Returns:
+        pd.DatetimeIndex, or None when fewer than `min_share` of the rows look like dates.
+    """
+    screen_values, screen_counts = _screen(values, counts)
+    if share(matches(screen_values, DATE_LIKE), screen_counts) < SCREEN_MIN_SHARE:
+        return None
+    if share(matches(values, DATE_LIKE), counts) < min_share:
+        return None
+    best, best_share = None, 0.0
+    for date_format in DATE_FORMATS:
+        try:
+            parsed = pd.to_datetime(values, errors="coerce", utc=True, format=date_format)
+        except (ValueError, TypeError):
+            continue
+        parsed_share = share(parsed.notna().to_numpy(), counts)
+        if parsed_share > best_share:
+            best, best_share = parsed, parsed_share
+        if parsed_share == 1:
+            break
+    return pd.DatetimeIndex(best) if best_share >= min_share else None
+
+
+def weighted_quantiles(values, counts, quantiles):
+    """Quantiles of a column from its distinct values and their row counts."""
+    order = np.argsort(values, kind="stable")
+    values, cumulative = values[order], np.cumsum(counts[order])
+    positions = np.searchsorted(cumulative, np.asarray(quantiles) * cumulative[-1], side="left")
+    return values[np.minimum(positions, len(values) - 1)]
+
+
+def reference_keys(index):
+    """Values of a key as strings, integral numbers without a decimal part ("7.0" and 7 are both "7")."""
+    values = pd.Series(index, dtype=object)
+    numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+    # Beyond 2**53, floats no longer hold every integer
+    integral = np.isfinite(numbers) & (numbers == np.floor(numbers)) & (np.abs(numbers) < 2**53)
+    keys = values.map(str).to_numpy(dtype=object)
+    keys[integral] = numbers[integral].astype(np.int64).astype(str)
+    return keys
+
+
+def reference_keys_of(path, column):
+    """Distinct values (as reference_keys) of a column of a reference CSV or Parquet file."""
+    stat = os.stat(path)
+    return _reference_keys_of(str(path), stat.st_mtime_ns, stat.st_size, column)
+
+
+@functools.lru_cache(maxsize=16)
+def _reference_keys_of(path, mtime_ns, size, column):
+    # Cached per file version: batch runs check many files against the same reference
+    profile = profile_file(path, columns=[column])
+    return pd.Index(reference_keys(profile[column].value_counts.index.dropna()))
@@ -0,0 +1,99 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from .duplicates import DuplicateIdCollector
+from .ingestion import DEFAULT_CHUNK_SIZE, is_parquet, pq, read_parquet_chunks
+from .profile import DatasetProfile, profile_file
+from .sketches import sketch_file
+
+# Below this many cells the process start-up costs more than the serial path
+PARALLEL_MIN_CELLS = 5_000_000
+
+
+def should_parallelize(path, cells, columns, max_workers):
+    """
+    Whether column-level work on `path` should run on a process pool.
+
+    Only Parquet files qualify: each task reads just its own columns from the
+    file (memory-mapped by Arrow), so no column data is pickled to the workers.
+    """
+    return bool(
+        max_workers and max_workers > 1
+        and len(columns) > 1
+        and cells >= PARALLEL_MIN_CELLS
+        and pq is not None and is_parquet(path)
+    )
+
+
+def run_column_tasks(function, tasks, max_workers):
+    """
+    Run `function(*task)` for every task on a process pool.
+
+    Results are returned in task order, whatever order the tasks finish in,
+    so merged results are deterministic.
+    """
+    if not tasks:
+        return []
+    workers = min(max_workers, len(tasks))
+    logging.info(f"Running {len(tasks)} column tasks on {workers} processes")
+    # Spawned workers are safe to start from the threads of the web process
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        return list(executor.map(function, *zip(*tasks)))
+
+
+def _batches(columns, count):
+    """Split columns into at most `count` contiguous, evenly sized batches."""
+    size = -(-len(columns) // count)
+    return [columns[start:start + size] for start in range(0, len(columns), size)]
+
+
+def profile_columns_task(path, columns, chunksize):
+    profile = DatasetProfile(columns)
+    for chunk in read_parquet_chunks(path, chunksize=chunksize, columns=columns):
+        profile.update(chunk)
+    return [profile[column] for column in columns]
+
+
+def duplicate_findings_task(path, column, id_column, duplicate_counts, max_ids_per_group, chunksize):
+    collector = DuplicateIdCollector(duplicate_counts, max_ids_per_group)
+    schema_columns = pq.ParquetFile(path).schema_arrow.names
+    columns = [column] + ([id_column] if id_column in schema_columns and id_column != column else [])
+    for chunk in read_parquet_chunks(path, chunksize=chunksize, columns=columns):
+        ids = chunk[id_column] if id_column in chunk.columns else chunk.index
+        collector.update(chunk[column], ids)
+    return collector.findings(column)
+
+
+def profile_columns(path, columns=None, chunksize=DEFAULT_CHUNK_SIZE, max_workers=None, approximate=False,
+                    on_chunk=None):
+    """
+    Build a DatasetProfile of a CSV or Parquet file, splitting the columns of
+    large Parquet files across a process pool.
+
+    With `approximate`, build a constant-memory SketchDatasetProfile in one
+    serial read instead. `on_chunk` is called with the partial profile after
+    each chunk of a serial read (the process pool reports nothing until done).
+
+    Returns:
+        DatasetProfile: Same result as profile_file (or sketch_file).
+    """
+    if approximate:
+        return sketch_file(path, columns, chunksize=chunksize, on_chunk=on_chunk)
+    if pq is None or not is_parquet(path):
+        return profile_file(path, columns, chunksize=chunksize, on_chunk=on_chunk)
+
+    metadata = pq.ParquetFile(path).metadata
+    columns = list(columns) if columns is not None else pq.ParquetFile(path).schema_arrow.names
+    if not should_parallelize(path, metadata.num_rows * len(columns), columns, max_workers):
+        return profile_file(path, columns, chunksize=chunksize, on_chunk=on_chunk)
+
+    # A few batches per worker keeps the pool busy when columns differ in cost
+    batches = _batches(columns, max_workers * 4)
+    column_profiles = run_column_tasks(profile_columns_task, [
+        (path, batch, chunksize) for batch in batches
+    ], max_workers)
+    return DatasetProfile.from_columns(
+        [column for batch in column_profiles for column in batch], rows=metadata.num_rows
+    )
@@ -0,0 +1,309 @@
+import logging
+import math
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+from .ingestion import DEFAULT_CHUNK_SIZE, read_data_chunks
+from .profile import ColumnProfile, DatasetProfile, common_dtype
+
+# Approximate profiles keep, per column, a HyperLogLog of 2**HLL_PRECISION one-byte
+# registers (distinct counts within ~0.8%), a CMS_DEPTH x CMS_WIDTH Count-Min sketch
+# of value counts, the TOP_K most frequent values and a sample of SAMPLE_SIZE distinct
+# values with their exact counts: under 1 MB whatever the file size.
+HLL_PRECISION = 14
+CMS_WIDTH = 2**14
+CMS_DEPTH = 4
+TOP_K = 1000
+SAMPLE_SIZE = 4096
+# Width of the reported error bounds, in standard errors (~95% coverage)
+BOUND_SIGMAS = 2
+
+
+def hash_values(values):
+    """
+    64-bit hash of each value. Numbers are hashed as floats, so a column read
+    as integers in one chunk and as floats (with missing values) in the next
+    hashes the same values alike.
+    """
+    values = pd.Index(values)
+    if is_bool_dtype(values.dtype):
+        array = values.to_numpy(dtype=np.uint8)
+    elif is_numeric_dtype(values.dtype):
+        array = values.to_numpy(dtype=np.float64)
+    else:
+        array = values.to_numpy(dtype=object)
+    return pd.util.hash_array(array)
+
+
+def _bit_length(values):
+    """Number of significant bits of each uint64 (exact: each 32-bit half fits a float)."""
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    with np.errstate(divide="ignore"):
+        return np.where(high > 0, 33 + np.floor(np.log2(high)), np.where(low > 0, 1 + np.floor(np.log2(low)), 0))
+
+
+class HyperLogLog:
+    """Distinct count estimate from the longest runs of leading zero bits seen in each register."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes):
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        # A set bit below the shifted hash caps the rank when the remaining bits are all zero
+        rest = (hashes << p) | (np.uint64(1) << (p - np.uint64(1)))
+        rank = (65 - _bit_length(rest)).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # linear counting is more accurate for small counts
+        return estimate
+
+    @property
+    def relative_error(self):
+        """Standard error of count() relative to the true distinct count."""
+        return 1.04 / math.sqrt(len(self.registers))
+
+
+class CountMinSketch:
+    """
+    Upper-bound estimate of the count of any value.
+
+    Each of the `depth` rows counts values in `width` buckets chosen by its own
+    multiply-shift hash; a value's estimate is its smallest bucket, which exceeds
+    its true count by at most e / width of all counted rows with probability
+    1 - exp(-depth).
+    """
+
+    def __init__(self, width=CMS_WIDTH, depth=CMS_DEPTH, seed=0):
+        rng = np.random.default_rng(seed)
+        self.width = width
+        self.shift = np.uint64(64 - int(math.log2(width)))
+        self.multipliers = rng.integers(1, 2**63, size=depth, dtype=np.uint64) | np.uint64(1)
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    def _buckets(self, hashes):
+        # Multiplication wraps modulo 2**64; the high bits are the well-mixed ones
+        return ((self.multipliers[:, None] * hashes[None, :]) >> self.shift).astype(np.intp)
+
+    def update(self, hashes, counts):
+        for row, buckets in enumerate(self._buckets(hashes)):
+            self.table[row] += np.bincount(buckets, weights=counts, minlength=self.width).astype(np.int64)
+        self.total += int(counts.sum())
+
+    def query(self, hashes):
+        buckets = self._buckets(hashes)
+        return self.table[np.arange(len(buckets))[:, None], buckets].min(axis=0)
+
+    @property
+    def error(self):
+        """Bound on the overestimate of any count."""
+        return math.e / self.width * self.total
+
+
+class DistinctSample:
+    """
+    Uniform sample of the distinct values of a column, with the exact count of each.
+
+    The sample holds the values with the `size` smallest hashes seen so far. As
+    that threshold only decreases, a value in the final sample entered it on its
+    first occurrence and was counted on every later one; a value evicted once can
+    never come back.
+    """
+
+    def __init__(self, size=SAMPLE_SIZE):
+        self.size = size
+        self.hashes = np.array([], dtype=np.uint64)
+        self.counts = np.array([], dtype=np.int64)
+        self.evicted = False
+
+    def update(self, hashes, counts):
+        hashes, codes = np.unique(np.concatenate((self.hashes, hashes)), return_inverse=True)
+        counts = np.bincount(codes, weights=np.concatenate((self.counts, counts))).astype(np.int64)
+        # Hashes come out of np.unique sorted: the smallest ones are the first
+        self.evicted = self.evicted or len(hashes) > self.size
+        self.hashes, self.counts = hashes[:self.size], counts[:self.size]
+
+    @property
+    def complete(self):
+        """Whether every distinct value seen is in the sample, i.e. none was ever evicted."""
+        return not self.evicted
+
+    def duplicate_share(self):
+        """Mean over distinct values of their count when repeated (0 otherwise), and its standard error."""
+        repeated = np.where(self.counts > 1, self.counts, 0).astype(np.float64)
+        if not len(repeated):
+            return 0.0, 0.0
+        error = 0.0 if self.complete else repeated.std() / math.sqrt(len(repeated))
+        return float(repeated.mean()), error
+
+
+class SketchColumnProfile(ColumnProfile):
+    """
+    Column statistics in constant memory.
+
+    `value_counts` holds the TOP_K most frequent values (Count-Min estimates)
+    and the exact null count, so the checks reading it see the values that
+    matter most. Row, null and blank counts are exact; distinct values
+    (HyperLogLog) and duplicated cells (distinct sample) are estimated with
+    error bounds.
+    """
+
+    approximate = True
+
+    def __init__(self, name, top_k=TOP_K):
+        super().__init__(name)
+        self.top_k = top_k
+        self.hll = HyperLogLog()
+        self.cms = CountMinSketch()
+        self.sample = DistinctSample()
+        self.null_count = 0
+        self.blank_count = 0
+        self.heavy = pd.Series(dtype="int64")
+        self.heavy_hashes = np.array([], dtype=np.uint64)
+
+    def update(self, series):
+        self.dtype = common_dtype(self.dtype, series.dtype)
+        self.rows += len(series)
+        counts = self._counts(series)
+        missing = counts.index.isna()
+        self.null_count += int(counts[missing].sum())
+        counts = counts[~missing].astype("int64")
+        if counts.empty:
+            return
+        self.blank_count += self._blank_count(counts)
+
+        hashes = hash_values(counts.index)
+        self.hll.update(hashes)
+        self.cms.update(hashes, counts.to_numpy())
+        self.sample.update(hashes, counts.to_numpy())
+
+        # Heavy hitters: the current ones and this chunk's values, re-estimated from the sketch
+        candidates = self.heavy.index.append(counts.index) if len(self.heavy) else counts.index
+        candidate_hashes, first = np.unique(np.concatenate((self.heavy_hashes, hashes)), return_index=True)
+        estimates = self.cms.query(candidate_hashes)
+        keep = np.argsort(-estimates, kind="stable")[:self.top_k]
+        self.heavy = pd.Series(estimates[keep], index=candidates[first[keep]])
+        self.heavy_hashes = candidate_hashes[keep]
+        self._frequencies = None
+        self.value_counts = self.heavy if not self.null_count else pd.concat(
+            [self.heavy, pd.Series([self.null_count], index=pd.Index([np.nan], dtype=object))]
+        )
+
+    def remove(self, series):
+        raise ValueError(f"Rows cannot be removed from the approximate profile of column '{self.name}'")
+
+    @staticmethod
+    def _blank_count(counts):
+        labels = counts.index
+        if not (labels.dtype == object or pd.api.types.is_string_dtype(labels.dtype)):
+            return 0
+        blank = pd.Series(labels, dtype=object).str.fullmatch(r"\s*", na=False).to_numpy(dtype=bool)
+        return int(counts[blank].sum())
+
+    @property
+    def nulls(self):
+        return self.null_count
+
+    @property
+    def blanks(self):
+        return self.blank_count
+
+    def distinct_bounds(self):
+        """Estimated distinct non-null values, with its lower and upper bounds."""
+        estimate = self.hll.count()
+        margin = BOUND_SIGMAS * self.hll.relative_error * estimate
+        if self.sample.complete:
+            count = len(self.sample.hashes)
+            return count, count, count
+        # There are at least as many distinct values as sampled ones, and at most one per row
+        low, high = len(self.sample.hashes), self.non_null
+
+        def clamp(value):
+            return int(round(min(max(value, low), high)))
+
+        return clamp(estimate), clamp(estimate - margin), clamp(estimate + margin)
+
+    @property
+    def distinct(self):
+        return self.distinct_bounds()[0]
+
+    def duplicate_counts(self):
+        """
+        Counts of the frequent values that are repeated even after removing the
+        Count-Min error from their estimate, most frequent first (NaN included).
+        """
+        counts = self.frequencies
+        return counts[(counts > 1) & ((counts - self.cms.error > 1) | counts.index.isna())]
+
+    def duplicate_rows_bounds(self):
+        """
+        Estimated cells holding a repeated value, with its lower and upper bounds:
+        the distinct count times the mean repeated count of the sampled distinct values.
+        """
+        distinct, distinct_low, distinct_high = self.distinct_bounds()
+        mean, error = self.sample.duplicate_share()
+        nulls = self.null_count if self.null_count > 1 else 0
+        if self.sample.complete:
+            # Every distinct value is sampled, with its exact count
+            exact = int(self.sample.counts[self.sample.counts > 1].sum()) + nulls
+            return exact, exact, exact
+
+        def cells(count, share):
+            return int(round(min(self.non_null, count * max(share, 0.0)))) + nulls
+
+        margin = BOUND_SIGMAS * error
+        return cells(distinct, mean), cells(distinct_low, mean - margin), cells(distinct_high, mean + margin)
+
+    @property
+    def duplicate_rows(self):
+        return self.duplicate_rows_bounds()[0]
+
+    def report(self):
+        """Estimates of this column and their bounds, for the dashboard."""
+        distinct, distinct_low, distinct_high = self.distinct_bounds()
+        duplicates, duplicates_low, duplicates_high = self.duplicate_rows_bounds()
+        return {
+            "column": self.name,
+            "distinct": distinct,
+            "distinct_low": distinct_low,
+            "distinct_high": distinct_high,
+            "duplicates": duplicates,
+            "duplicates_low": duplicates_low,
+            "duplicates_high": duplicates_high,
+            "count_error": int(math.ceil(self.cms.error)),
+        }
+
+
+class SketchDatasetProfile(DatasetProfile):
+    """Dataset profile of SketchColumnProfiles, built in one streaming read and constant memory."""
+
+    column_profile = SketchColumnProfile
+    approximate = True
+
+    def report(self):
+        return {
+            "distinct_error_percent": round(100 * BOUND_SIGMAS * HyperLogLog().relative_error, 2),
+            "top_k": TOP_K,
+            "columns": [column.report() for column in self.columns.values()],
+        }
+
+
+def sketch_file(path, columns=None, chunksize=DEFAULT_CHUNK_SIZE, on_chunk=None):
+    """Build a SketchDatasetProfile with a single streaming read of a CSV or Parquet file."""
+    logging.info(f"Profiling {path} approximately")
+    profile = SketchDatasetProfile(columns)
+    for chunk in read_data_chunks(path, chunksize=chunksize):
+        profile.update(chunk)
+        if on_chunk is not None:
+            on_chunk(profile)
+    return profile
@@ -0,0 +1,127 @@
+import contextlib
+import contextvars
+import json
+import logging
+import threading
+import time
+
+# Structured span records, one JSON object per line
+logger = logging.getLogger("cleaner.timing")
+
+# Upper bounds (seconds) of the span duration histogram buckets
+BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+_collected = contextvars.ContextVar("collected_spans", default=None)
+_parent = contextvars.ContextVar("parent_span", default=None)
+
+
+class Metrics:
+    """
+    Process-wide span durations and counters, rendered in the Prometheus text format.
+
+    Durations go to one histogram per span name; counters are keyed on a name
+    and a set of labels (e.g. LLM bytes sent and received).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.setdefault(name, {"buckets": [0] * len(BUCKETS), "count": 0, "sum": 0.0})
+            for index, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    histogram["buckets"][index] += 1
+            histogram["count"] += 1
+            histogram["sum"] += seconds
+
+    def increment(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def render(self, extra_gauges=None):
+        """
+        Prometheus exposition text of every metric.
+
+        Args:
+            extra_gauges (dict): Gauge name -> value read at scrape time (e.g. cache size).
+        """
+        lines = []
+        with self._lock:
+            if self.histograms:
+                lines.append("# HELP cleaner_span_seconds Duration of instrumented stages.")
+                lines.append("# TYPE cleaner_span_seconds histogram")
+            for name, histogram in sorted(self.histograms.items()):
+                for bound, count in zip(BUCKETS, histogram["buckets"]):
+                    lines.append(f'cleaner_span_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+                lines.append(f'cleaner_span_seconds_bucket{{span="{name}",le="+Inf"}} {histogram["count"]}')
+                lines.append(f'cleaner_span_seconds_sum{{span="{name}"}} {histogram["sum"]:.6f}')
+                lines.append(f'cleaner_span_seconds_count{{span="{name}"}} {histogram["count"]}')
+
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f"# TYPE {name} counter")
+                for (counter, labels), value in sorted(self.counters.items()):
+                    if counter == name:
+                        lines.append(f"{name}{_labels(labels)} {value}")
+
+        for name, value in (extra_gauges or {}).items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+metrics = Metrics()
+
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """
+    Time a stage of the request or analysis.
+
+    On exit the span is logged as one JSON line on the `cleaner.timing` logger,
+    added to the duration histogram of `name`, and appended to the spans being
+    collected by collect_spans, if any. The yielded dict takes attributes set
+    while the stage runs (e.g. byte counts).
+    """
+    record = {"span": name, "parent": _parent.get(), **attributes}
+    token = _parent.set(name)
+    start = time.perf_counter()
+    try:
+        yield record
+    except Exception:
+        record["error"] = True
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        _parent.reset(token)
+        record["duration_ms"] = round(seconds * 1000, 3)
+        metrics.observe(name, seconds)
+        logger.info(json.dumps(record, default=str))
+        collected = _collected.get()
+        if collected is not None:
+            collected.append(record)
+
+
+@contextlib.contextmanager
+def collect_spans():
+    """Collect the spans finished in this context (and in threads started with its copy) into a list."""
+    spans = []
+    token = _collected.set(spans)
+    try:
+        yield spans
+    finally:
+        _collected.reset(token)
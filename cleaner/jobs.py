@@ -0,0 +1,165 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .analysis import RESULTS_VERSION, resolve_id_column, run_analysis
+from .data_quality.incremental import dataset_key
+from .data_quality.ingestion import SAMPLE_ROWS, remove_spooled_file
+from .models import AnalysisJob
+from .preview import JobProgress, head_profile
+
+_wakeup = threading.Event()
+_workers = []
+_workers_lock = threading.Lock()
+
+
+def find_analysis(content_hash):
+    """Latest queued, running or finished job for the same file content and checks version."""
+    if not content_hash:
+        return None
+    return (
+        AnalysisJob.objects
+        .filter(content_hash=content_hash, results_version=RESULTS_VERSION)
+        .exclude(status=AnalysisJob.FAILED)
+        .order_by("-created_at")
+        .first()
+    )
+
+
+def find_previous_version(job):
+    """Latest finished analysis of an earlier version of the job's dataset."""
+    if not job.dataset_key:
+        return None
+    return (
+        AnalysisJob.objects
+        .filter(dataset_key=job.dataset_key, results_version=RESULTS_VERSION, status=AnalysisJob.DONE)
+        .exclude(pk=job.pk)
+        .order_by("-finished_at")
+        .first()
+    )
+
+
+def enqueue_analysis(path, filename, content_hash=""):
+    """
+    Persist a queued analysis job for a spooled upload and wake the local workers.
+
+    An upload whose content was already analysed, or is being analysed, reuses
+    that job: its spooled copy is removed and no check runs again.
+
+    Returns:
+        AnalysisJob: The queued job, or the existing job for the same content.
+    """
+    existing = find_analysis(content_hash)
+    if existing is not None:
+        logging.info(f"Reusing analysis job {existing.pk} for {filename}")
+        remove_spooled_file(path)
+        return existing
+
+    job = AnalysisJob.objects.create(
+        filename=filename, path=path, content_hash=content_hash, results_version=RESULTS_VERSION
+    )
+    logging.info(f"Queued analysis job {job.pk} for {filename}")
+    if settings.ANALYSIS_RUN_WORKERS_IN_PROCESS:
+        start_workers()
+    _wakeup.set()
+    return job
+
+
+def claim_next_job():
+    """
+    Atomically move the oldest queued job to running.
+
+    The conditional UPDATE only succeeds for one worker, so several threads or
+    processes can poll the same table without an external broker.
+
+    Returns:
+        AnalysisJob or None: The claimed job, or None if the queue is empty.
+    """
+    for job_id in AnalysisJob.objects.filter(status=AnalysisJob.QUEUED).values_list("pk", flat=True)[:5]:
+        claimed = AnalysisJob.objects.filter(pk=job_id, status=AnalysisJob.QUEUED).update(
+            status=AnalysisJob.RUNNING, started_at=timezone.now()
+        )
+        if claimed:
+            return AnalysisJob.objects.get(pk=job_id)
+    return None
+
+
+def process_job(job):
+    """Run the analysis of a claimed job and store its results or error."""
+    try:
+        # A new version of a dataset has the same schema and ID column, decided from its first rows
+        sample = head_profile(job.path, SAMPLE_ROWS)
+        id_column = resolve_id_column(sample) if sample is not None else None
+        job.dataset_key = dataset_key(sample.column_names, id_column) if sample is not None else ""
+        previous = find_previous_version(job)
+        # Provisional scores from the first rows, then from the partial profile as the full scan runs
+        progress = JobProgress(job)
+        progress.preview()
+        job.results, job.path = run_analysis(
+            job.path, job.filename, spill=settings.ANALYSIS_SPILL_TO_PARQUET,
+            previous_path=previous.path if previous is not None else None, progress=progress, id_column=id_column,
+        )
+        job.status = AnalysisJob.DONE
+    except Exception as e:
+        logging.exception(f"Analysis job {job.pk} failed")
+        job.error = str(e)
+        job.status = AnalysisJob.FAILED
+    job.finished_at = timezone.now()
+    job.save(update_fields=["results", "path", "dataset_key", "status", "error", "finished_at"])
+    return job
+
+
+def run_pending_jobs():
+    """Process queued jobs in the calling thread until the queue is empty."""
+    processed = 0
+    while True:
+        job = claim_next_job()
+        if job is None:
+            return processed
+        process_job(job)
+        processed += 1
+
+
+def requeue_stale_jobs():
+    """Put back running jobs whose worker died before finishing them."""
+    cutoff = timezone.now() - timedelta(seconds=settings.ANALYSIS_JOB_TIMEOUT)
+    requeued = AnalysisJob.objects.filter(status=AnalysisJob.RUNNING, started_at__lt=cutoff).update(
+        status=AnalysisJob.QUEUED, started_at=None
+    )
+    if requeued:
+        logging.warning(f"Requeued {requeued} stale analysis jobs")
+    return requeued
+
+
+def worker_loop(stop_event=None):
+    """Poll the job table forever, sleeping until woken by a new job or the poll interval."""
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        close_old_connections()
+        try:
+            job = claim_next_job()
+            if job is not None:
+                process_job(job)
+                continue
+        except Exception:
+            logging.exception("Analysis worker error")
+        _wakeup.wait(settings.ANALYSIS_POLL_INTERVAL)
+        _wakeup.clear()
+
+
+def start_workers(count=None):
+    """Start the in-process worker pool once per process."""
+    with _workers_lock:
+        if _workers:
+            return _workers
+        requeue_stale_jobs()
+        for index in range(count or settings.ANALYSIS_WORKERS):
+            worker = threading.Thread(target=worker_loop, name=f"analysis-worker-{index}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+        logging.info(f"Started {len(_workers)} analysis workers")
+        return _workers
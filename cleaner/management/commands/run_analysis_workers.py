@@ -0,0 +1,41 @@
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from cleaner.jobs import requeue_stale_jobs, run_pending_jobs, worker_loop
+
+
+class Command(BaseCommand):
+    help = "Process queued analysis jobs from the database in a pool of worker threads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=settings.ANALYSIS_WORKERS,
+                            help="Number of worker threads (ANALYSIS_WORKERS by default).")
+        parser.add_argument("--once", action="store_true", help="Process the queued jobs and exit.")
+
+    def handle(self, *args, **options):
+        requeue_stale_jobs()
+
+        if options["once"]:
+            processed = run_pending_jobs()
+            self.stdout.write(self.style.SUCCESS(f"Processed {processed} jobs"))
+            return
+
+        stop_event = threading.Event()
+        workers = [
+            threading.Thread(target=worker_loop, args=(stop_event,), name=f"analysis-worker-{index}")
+            for index in range(options["workers"])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {len(workers)} analysis workers, press Ctrl+C to stop")
+
+        try:
+            for worker in workers:
+                while worker.is_alive():
+                    worker.join(timeout=1)
+        except KeyboardInterrupt:
+            stop_event.set()
+            for worker in workers:
+                worker.join()
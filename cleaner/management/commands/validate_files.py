@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from cleaner.batch import SUMMARY_NAME, expand_inputs, validate_files
+
+
+class Command(BaseCommand):
+    help = (
+        "Run every check over CSV and Parquet files, directories or glob patterns in a pool of "
+        "worker processes, writing a score report per file. Resumes an interrupted run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("inputs", nargs="+", help="Files, directories or glob patterns to validate.")
+        parser.add_argument("--output", default="validation-report", help="Directory receiving the reports.")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Number of worker processes (default: CPU count, 0: no pool).")
+        parser.add_argument("--no-resume", action="store_true",
+                            help="Validate again the files already in the output directory.")
+        parser.add_argument("--retry-failed", action="store_true", help="Validate again the files that failed.")
+
+    def handle(self, *args, **options):
+        if not expand_inputs(options["inputs"]):
+            raise CommandError("No CSV or Parquet files found")
+
+        def progress(report):
+            if report["status"] == "done":
+                self.stdout.write(f"{report['file']}: {report['overall_score']}% in {report['seconds']}s")
+            else:
+                self.stderr.write(self.style.ERROR(f"{report['file']}: {report['error']}"))
+
+        try:
+            reports = validate_files(
+                options["inputs"],
+                options["output"],
+                workers=options["workers"],
+                resume=not options["no_resume"],
+                retry_failed=options["retry_failed"],
+                progress=progress,
+            )
+        except KeyboardInterrupt:
+            raise CommandError("Interrupted, run the same command again to resume")
+
+        failed = sum(report["status"] != "done" for report in reports)
+        self.stdout.write(self.style.SUCCESS(
+            f"Validated {len(reports) - failed} files, {failed} failed; scores in {options['output']}/{SUMMARY_NAME}"
+        ))
@@ -1,3 +1,43 @@
+import uuid
 from django.db import models
 
-# Create your models here.
+
+class AnalysisJob(models.Model):
+    """An uploaded file queued for, or holding the results of, a data quality analysis."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    path = models.CharField(max_length=1024)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    # Schema and ID column, shared by every version of the same dataset
+    dataset_key = models.CharField(max_length=64, blank=True, db_index=True)
+    results_version = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED, db_index=True)
+    results = models.JSONField(null=True, blank=True)
+    # Stage, rows read and provisional scores of a running job (see cleaner.preview)
+    progress = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED)
@@ -0,0 +1,141 @@
+import logging
+import time
+
+import pandas as pd
+from django.conf import settings
+from django.utils import timezone
+
+from .analysis import check_result, overall_score
+from .data_quality.checks import (
+    accuracy_check, completeness_check, consistency_check, integrity_check, timeliness_check,
+)
+from .data_quality.classification import classify_columns
+from .data_quality.ingestion import estimate_rows, read_data_chunks
+from .data_quality.profile import profile_dataframe
+from .models import AnalysisJob
+
+# A refresh of the provisional scores waits at least this many times as long as the last
+# one took, so refreshing stays a small share of the scan however large the profile grows
+REFRESH_COST_RATIO = 10
+
+
+def provisional_results(profile):
+    """
+    Scores of the checks that need neither the LLM nor another read of the data, from a partial profile.
+
+    Validity is left out (the model decides which values are invalid), and
+    duplicates are counted without the rows holding them.
+
+    Returns:
+        dict: Rows profiled, `checks` and `overall_score` as on the dashboard, and the
+            local column `classification` (undecided columns have no decision yet).
+    """
+    columns = profile.column_names
+    total_fields = profile.total_fields
+    classification = classify_columns(profile, settings.ANALYSIS_CLASSIFIER_CONFIDENCE)
+    id_column = classification.id_column or (columns[0] if columns else None)
+    text_columns = [column for column in columns if not pd.api.types.is_numeric_dtype(profile[column].dtype)]
+
+    completeness_score, completeness_issues = completeness_check(None, total_fields=total_fields, profile=profile)
+    _, accuracy_score, accuracy_issues = accuracy_check(
+        None, [column for column in columns if column != id_column], ranges=settings.ANALYSIS_VALUE_RANGES,
+        outlier_iqr=settings.ANALYSIS_OUTLIER_IQR, profile=profile,
+    )
+    _, consistency_score, consistency_issues = consistency_check(
+        None, text_columns, formats=settings.ANALYSIS_FORMATS, profile=profile,
+    )
+    _, timeliness_score, timeliness_issues = timeliness_check(
+        None, columns, freshness_days=settings.ANALYSIS_FRESHNESS_DAYS, profile=profile,
+    )
+    _, integrity_score, integrity_issues = integrity_check(None, settings.ANALYSIS_REFERENCES, profile=profile)
+    duplicates = sum(profile[column].duplicate_rows for column in columns)
+    uniqueness_score = round(max(0, 100 * (total_fields - duplicates) / total_fields), 2) if total_fields else 100
+
+    estimated = profile.approximate
+    checks = [
+        check_result("Completeness", completeness_score, completeness_issues),
+        check_result("Accuracy", accuracy_score, accuracy_issues, approximate=estimated),
+        check_result("Consistency", consistency_score, consistency_issues, approximate=estimated),
+        check_result("Timeliness", timeliness_score, timeliness_issues, approximate=estimated),
+        check_result("Uniqueness", uniqueness_score, duplicates),
+        check_result("Integrity", integrity_score, integrity_issues, approximate=estimated),
+    ]
+    return {
+        "rows": profile.rows,
+        "checks": checks,
+        "overall_score": overall_score(checks),
+        "classification": classification.report(),
+    }
+
+
+def head_profile(path, rows):
+    """Profile of the first `rows` rows of a CSV or Parquet file, read without scanning the rest."""
+    for chunk in read_data_chunks(path, chunksize=rows):
+        return profile_dataframe(chunk.head(rows))
+    return None
+
+
+class JobProgress:
+    """
+    Progress of a running job, written to `AnalysisJob.progress` for the processing page.
+
+    Called as the `progress` of run_analysis: the stage is saved as it changes,
+    and the provisional scores are refreshed from the partial profile of the
+    full scan at most every ANALYSIS_PROGRESS_INTERVAL seconds. Errors are
+    logged and never fail the job.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.state = {"stage": "queued", "rows_read": 0, "estimated_rows": None, "percent": None,
+                      "provisional": None}
+        self.next_refresh = 0.0
+        try:
+            self.state["estimated_rows"] = estimate_rows(job.path)
+        except Exception:
+            logging.exception(f"Could not estimate the rows of {job.path}")
+
+    def preview(self, rows=None):
+        """Provisional scores from the first `rows` rows (ANALYSIS_PREVIEW_ROWS if None), before the full scan."""
+        rows = settings.ANALYSIS_PREVIEW_ROWS if rows is None else rows
+        if not rows:
+            return
+        try:
+            profile = head_profile(self.job.path, rows)
+            if profile is not None:
+                self.state["stage"] = "preview"
+                self._refresh("preview", profile, sample="head")
+                self._save()
+        except Exception:
+            logging.exception(f"Preview of analysis job {self.job.pk} failed")
+
+    def __call__(self, stage, profile=None):
+        try:
+            changed = stage != self.state["stage"]
+            self.state["stage"] = stage
+            if profile is not None:
+                self.state["rows_read"] = profile.rows
+                estimated = self.state["estimated_rows"]
+                if estimated:
+                    self.state["percent"] = min(99, 100 * profile.rows // estimated)
+                if time.monotonic() >= self.next_refresh:
+                    self._refresh(stage, profile, sample="scan")
+                    changed = True
+            elif stage != "parse":
+                self.state["percent"] = 100 if self.state["rows_read"] else None
+            if changed:
+                self._save()
+        except Exception:
+            logging.exception(f"Progress of analysis job {self.job.pk} could not be saved")
+
+    def _refresh(self, stage, profile, sample):
+        start = time.perf_counter()
+        self.state["provisional"] = dict(provisional_results(profile), sample=sample)
+        cost = time.perf_counter() - start
+        self.next_refresh = time.monotonic() + max(settings.ANALYSIS_PROGRESS_INTERVAL, REFRESH_COST_RATIO * cost)
+        logging.info(f"Provisional scores of analysis job {self.job.pk} ({stage}, {profile.rows} rows) "
+                     f"in {cost:.3f}s")
+
+    def _save(self):
+        self.state["updated_at"] = timezone.now().isoformat()
+        AnalysisJob.objects.filter(pk=self.job.pk).update(progress=self.state)
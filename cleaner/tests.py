@@ -1,3 +1,1035 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .ai_checks import llm, providers
+from .ai_checks.cache import LLMCache
+from .analysis import run_analysis
+from .batch import REPORT_NAME, SUMMARY_NAME, validate_files
+from .data_quality import checks, export, ingestion, scheduler
+from .data_quality.classification import classify_columns
+from .data_quality.duplicates import DuplicateIdCollector
+from .data_quality.incremental import dataset_key, hash_rows, load_snapshot, read_rows
+from .data_quality.profile import profile_dataframe, profile_file
+from .data_quality.sketches import SAMPLE_SIZE, SketchDatasetProfile
+from .jobs import run_pending_jobs
+from .models import AnalysisJob
+from .preview import JobProgress
+
+
+class StubModel:
+    """Model provider answering from the test and recording every prompt it receives."""
+
+    name = "stub"
+
+    def __init__(self, response="[]", delay=0, failures=0):
+        self.response = response
+        self.delay = delay
+        self.failures = failures
+        self.prompts = []
+
+    def generate(self, prompt, temperature, timeout):
+        self.prompts.append(prompt)
+        if self.failures:
+            self.failures -= 1
+            raise TimeoutError("stub timeout")
+        time.sleep(self.delay)
+        # A callable response answers each prompt differently
+        text = self.response(prompt) if callable(self.response) else self.response
+        return SimpleNamespace(text=text)
+
+
+class StubModelMixin:
+    """Runs llm calls against a StubModel and an empty cache, and keeps uploads, in a temporary directory."""
+
+    model_response = "[]"
+
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.cache = LLMCache(os.path.join(self.tmpdir.name, "cache.sqlite3"))
+        self.model = StubModel(self.model_response)
+        for target, value in (("llm_cache", self.cache), ("provider", self.model)):
+            patcher = mock.patch.object(llm, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.dict(os.environ, {"LLM_RETRY_BACKOFF": "0"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = override_settings(ANALYSIS_RUN_WORKERS_IN_PROCESS=False, CSV_UPLOAD_DIR=self.tmpdir.name)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+
+class StubModelTestCase(StubModelMixin, SimpleTestCase):
+    pass
+
+
+class LLMCacheTests(StubModelTestCase):
+    model_response = "['Gender']"
+
+    def test_repeated_prompt_makes_one_model_call(self):
+        first = llm.categorical_columns(["Age", "Gender"])
+        second = llm.categorical_columns(["Age", "Gender"])
+
+        self.assertEqual(first, ["Gender"])
+        self.assertEqual(second, ["Gender"])
+        self.assertEqual(len(self.model.prompts), 1)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_same_value_set_in_another_order_hits_cache(self):
+        llm.invalid_categorical_values(pd.DataFrame({"g": ["F", "M", "x"]}), "g")
+        llm.invalid_categorical_values(pd.DataFrame({"g": ["x", "M", "F", "F"]}), "g")
+
+        self.assertEqual(len(self.model.prompts), 1)
+
+    def test_cache_persists_across_instances(self):
+        llm.categorical_columns(["Age", "Gender"])
+        reopened = LLMCache(self.cache.path)
+
+        with mock.patch.object(llm, "llm_cache", reopened):
+            llm.categorical_columns(["Age", "Gender"])
+
+        self.assertEqual(len(self.model.prompts), 1)
+        self.assertEqual(reopened.stats()["hits"], 1)
+
+    def test_expired_entry_is_refetched(self):
+        self.cache.ttl = 60
+        llm.identify_id_column_prompt(["id", "name"])
+
+        with mock.patch("cleaner.ai_checks.cache.time.time", return_value=time.time() + 120):
+            llm.identify_id_column_prompt(["id", "name"])
+
+        self.assertEqual(len(self.model.prompts), 2)
+
+    def test_least_recently_used_entry_is_evicted_first(self):
+        self.cache.max_bytes = 10
+        self.cache.set("a", "aaaa")
+        self.cache.set("b", "bbbb")
+        self.cache.get("a")
+        self.cache.set("c", "cccc")
+
+        self.assertEqual(self.cache.get("a"), "aaaa")
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("c"), "cccc")
+
+
+class ConcurrentValidationTests(StubModelTestCase):
+    model_response = "['x']"
+
+    def test_columns_are_validated_concurrently(self):
+        self.model.delay = 0.2
+        values = {f"col{i}": ["a", "b", "x", str(i)] for i in range(6)}
+
+        start = time.perf_counter()
+        results = llm.invalid_categorical_values_concurrently(values, max_workers=6)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(list(results), list(values))
+        self.assertTrue(all(result == ["x"] for result in results.values()))
+        self.assertLess(elapsed, 0.6)
+
+    def test_failed_call_is_retried(self):
+        self.model.failures = 2
+
+        result = llm.invalid_categorical_values(None, "g", unique_values=["a", "x"])
+
+        self.assertEqual(result, ["x"])
+        self.assertEqual(len(self.model.prompts), 3)
+
+
+class ProviderTests(StubModelTestCase):
+    def test_startup_does_not_load_the_model_backend(self):
+        code = (
+            "import sys, django; django.setup(); import cleaner.views, cleaner.ai_checks.llm as llm; "
+            "print('google.generativeai' in sys.modules, llm.provider, llm.llm_cache)"
+        )
+        cache_path = os.path.join(self.tmpdir.name, "startup.sqlite3")
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE="csv_cleaner.settings", LLM_CACHE_PATH=cache_path)
+        output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True, env=env,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+        self.assertEqual(output.split(), ["False", "None", "None"])
+        self.assertFalse(os.path.exists(cache_path))
+
+    def test_cache_is_opened_on_first_use(self):
+        cache_path = os.path.join(self.tmpdir.name, "lazy.sqlite3")
+        with mock.patch.object(llm, "llm_cache", None), mock.patch.dict(os.environ, {"LLM_CACHE_PATH": cache_path}):
+            self.assertFalse(os.path.exists(cache_path))
+            llm.generate_ai("prompt")
+            self.assertIs(llm.get_cache(), llm.llm_cache)
+            self.assertEqual(llm.cache_stats()["entries"], 1)
+        self.assertTrue(os.path.exists(cache_path))
+
+    def test_offline_provider_finds_nothing(self):
+        with mock.patch.object(llm, "provider", providers.OfflineProvider()):
+            result = llm.classify_and_validate_columns(["id", "gender"], {"gender": ["F", "M", "x"]},
+                                                       categorical=["gender"])
+            id_column = llm.identify_id_column_prompt(["id", "gender"])
+
+        self.assertEqual(result, {"categorical_columns": ["gender"], "id_column": "not found",
+                                  "invalid_values": {"gender": []}})
+        self.assertEqual(id_column, "not found")
+
+    def test_environment_is_read_on_first_use(self):
+        with mock.patch.object(llm, "provider", None), mock.patch.dict(os.environ, {"LLM_PROVIDER": "offline"}):
+            self.assertIsInstance(llm.get_provider(), providers.OfflineProvider)
+
+    def test_provider_is_loaded_by_name_or_dotted_path(self):
+        self.assertIsInstance(providers.load_provider("offline"), providers.OfflineProvider)
+        self.assertIsInstance(providers.load_provider("cleaner.tests.StubModel"), StubModel)
+        with self.assertRaises(ValueError):
+            providers.load_provider("nowhere.Provider")
+
+
+class BatchedPromptTests(StubModelTestCase):
+    model_response = json.dumps({
+        "categorical_columns": ["gender", "country"],
+        "id_column": "id",
+        "invalid_values": {"gender": ["x"], "country": ["Atlantis"]},
+    })
+    samples = {"gender": ["F", "M", "x"], "country": ["France", "Spain", "Atlantis"]}
+
+    def test_columns_are_classified_and_validated_in_one_call(self):
+        result = llm.classify_and_validate_columns(["id", "gender", "country"], self.samples)
+
+        self.assertEqual(result["categorical_columns"], ["gender", "country"])
+        self.assertEqual(result["id_column"], "id")
+        self.assertEqual(result["invalid_values"], {"gender": ["x"], "country": ["Atlantis"]})
+        self.assertEqual(len(self.model.prompts), 1)
+
+    def test_prompt_over_the_token_budget_is_split(self):
+        result = llm.classify_and_validate_columns(["id", "gender", "country"], self.samples, token_budget=50)
+
+        self.assertEqual(result["invalid_values"], {"gender": ["x"], "country": ["Atlantis"]})
+        self.assertEqual(len(self.model.prompts), 2)
+        # The batches run concurrently; only the first one asks for the classification
+        self.assertEqual(sum('"categorical_columns"' in prompt for prompt in self.model.prompts), 1)
+
+    def test_malformed_column_falls_back_to_a_per_column_call(self):
+        batched = json.dumps({
+            "categorical_columns": ["gender", "country"],
+            "id_column": "id",
+            "invalid_values": {"gender": ["x"], "country": "Atlantis"},
+        })
+        self.model.response = lambda prompt: batched if prompt.startswith(llm.BATCH_PROMPT[:40]) else "['Atlantis']"
+
+        result = llm.classify_and_validate_columns(["id", "gender", "country"], self.samples)
+
+        self.assertEqual(result["invalid_values"], {"gender": ["x"], "country": ["Atlantis"]})
+        self.assertEqual(len(self.model.prompts), 2)
+
+    def test_non_json_response_is_not_evaluated(self):
+        self.model.response = "__import__('os').getcwd()"
+
+        result = llm.classify_and_validate_columns(["id", "gender"], {"gender": ["F", "M"]})
+
+        self.assertEqual(result["categorical_columns"], [])
+        self.assertEqual(result["invalid_values"], {})
+
+
+class LocalClassificationTests(StubModelTestCase):
+    model_response = json.dumps({"categorical_columns": ["grade"], "invalid_values": {"status": [], "grade": [9]}})
+
+    def setUp(self):
+        super().setUp()
+        rows = 1000
+        self.profile = profile_dataframe(pd.DataFrame({
+            "customer_id": range(rows),
+            "status": ["active", "inactive", "pending", "active"] * (rows // 4),
+            "amount": [i * 1.5 for i in range(rows)],
+            "grade": [1, 2, 3, 9] * (rows // 4),
+        }))
+
+    def test_obvious_columns_are_decided_locally(self):
+        classification = classify_columns(self.profile, threshold=0.9)
+
+        self.assertEqual(classification.categorical, ["status"])
+        self.assertEqual(classification.undecided, ["grade"])
+        self.assertEqual(classification.id_column, "customer_id")
+        report = {decision["column"]: decision for decision in classification.report()["columns"]}
+        self.assertEqual(report["amount"]["categorical"], False)
+        self.assertEqual(report["status"]["path"], "heuristic")
+        self.assertGreaterEqual(report["status"]["confidence"], 0.9)
+
+    def test_only_ambiguous_columns_are_sent_to_the_model(self):
+        classification = classify_columns(self.profile, threshold=0.9)
+        samples = {column: self.profile[column].value_sample() for column in ["status", "grade"]}
+
+        result = llm.classify_and_validate_columns(
+            self.profile.column_names, samples, undecided=classification.undecided,
+            categorical=classification.categorical, id_column=classification.id_column,
+        )
+        classification.resolve(result["categorical_columns"], result["id_column"])
+
+        self.assertEqual(result["categorical_columns"], ["status", "grade"])
+        self.assertEqual(result["id_column"], "customer_id")
+        self.assertEqual(result["invalid_values"], {"status": [], "grade": [9]})
+        self.assertEqual(len(self.model.prompts), 1)
+        self.assertIn('among ["grade"]', self.model.prompts[0])
+        self.assertNotIn('"id_column"', self.model.prompts[0])
+        report = {decision["column"]: decision for decision in classification.report()["columns"]}
+        self.assertEqual(report["grade"]["path"], "llm")
+
+
+class ProfileTests(SimpleTestCase):
+    df = pd.DataFrame({
+        "id": [1, 2, 3, 4, 5, 6],
+        "name": ["Ann", " ", "Bob", None, "Ann", "Bob"],
+        "score": [1.0, 2.0, None, 2.0, None, 1.0],
+    })
+
+    def test_column_statistics(self):
+        profile = profile_dataframe(self.df)
+
+        self.assertEqual(profile.rows, 6)
+        self.assertEqual(profile.total_fields, 18)
+        self.assertEqual((profile["name"].nulls, profile["name"].blanks, profile["name"].distinct), (1, 1, 3))
+        self.assertEqual(profile["score"].duplicate_rows, 6)  # 1.0, 2.0 and NaN twice each
+        self.assertEqual(profile["id"].duplicate_rows, 0)
+        self.assertEqual(profile.total_missing, 4)
+
+    def test_chunks_in_any_order_give_the_same_profile(self):
+        whole = profile_dataframe(self.df)
+        chunks = [self.df.iloc[4:], self.df.iloc[:2], self.df.iloc[2:4]]
+        folded = profile_dataframe(chunks[0])
+        for chunk in chunks[1:]:
+            folded.update(chunk)
+
+        self.assertEqual(folded.rows, whole.rows)
+        for column in self.df.columns:
+            pd.testing.assert_series_equal(folded[column].frequencies, whole[column].frequencies, check_names=False)
+            self.assertEqual(folded[column].dtype, whole[column].dtype)
+
+    def test_integer_then_float_chunks_share_a_numeric_dtype(self):
+        profile = profile_dataframe(pd.DataFrame({"n": [1, 2]}))
+        profile.update(pd.DataFrame({"n": [3.5, None]}))
+
+        self.assertEqual(profile["n"].dtype, np.float64)
+        self.assertEqual(profile["n"].nulls, 1)
+
+    def test_removed_rows_leave_the_profile_of_the_rest(self):
+        profile = profile_dataframe(self.df).remove(self.df.iloc[:2])
+        rest = profile_dataframe(self.df.iloc[2:])
+
+        self.assertEqual(profile.rows, 4)
+        for column in self.df.columns:
+            pd.testing.assert_series_equal(profile[column].frequencies, rest[column].frequencies, check_names=False)
+        with self.assertRaises(ValueError):
+            profile.remove(pd.DataFrame({"id": [99], "name": ["Zed"], "score": [7.0]}))
+
+
+class ValueSampleTests(SimpleTestCase):
+    def test_sample_keeps_frequent_values_and_every_frequency_band(self):
+        # Ten frequent values, then rare ones seen 4, 2 and 1 times
+        values = [f"top{i}" for i in range(10) for _ in range(100)]
+        values += [f"four{i}" for i in range(20) for _ in range(4)]
+        values += [f"two{i}" for i in range(40) for _ in range(2)]
+        values += [f"one{i}" for i in range(200)]
+        column = profile_dataframe(pd.DataFrame({"v": values}))["v"]
+
+        sample = column.value_sample(top_k=10, rare_sample=26)
+
+        self.assertEqual(sample[:10], [f"top{i}" for i in range(10)])
+        rare = sample[10:]
+        # Each band gets its share of the rare sample, and at least one value
+        self.assertEqual(sum(value.startswith("four") for value in rare), 2)
+        self.assertEqual(sum(value.startswith("two") for value in rare), 4)
+        self.assertEqual(sum(value.startswith("one") for value in rare), 20)
+        self.assertEqual(column.value_sample(top_k=10, rare_sample=26), sample)  # seeded
+
+    def test_small_columns_are_sent_whole(self):
+        column = profile_dataframe(pd.DataFrame({"v": ["a", "b", "b", None]}))["v"]
+
+        self.assertEqual(column.value_sample(top_k=1, rare_sample=5)[:2], ["b", "a"])
+        self.assertEqual(len(column.value_sample(top_k=1, rare_sample=5)), 3)
+
+    def test_looks_categorical(self):
+        def column(values):
+            return profile_dataframe(pd.DataFrame({"v": values}))["v"]
+
+        labels = column(["red", "green", "blue"] * 100)
+        identifiers = column([f"id{i}" for i in range(300)])
+        free_text = column([f"note {i % 200}" for i in range(300)])  # 200 values, almost uniform
+
+        self.assertTrue(labels.looks_categorical())
+        self.assertFalse(identifiers.looks_categorical())
+        self.assertFalse(free_text.looks_categorical(max_distinct_ratio=1.0))
+        self.assertFalse(labels.looks_categorical(max_distinct=2))
+
+
+class DuplicateIdTests(SimpleTestCase):
+    def test_ids_follow_row_order_across_chunks(self):
+        values = pd.Series(["b", "a", "b", "c", "a", "b"])
+        ids = np.array([10, 11, 12, 13, 14, 15])
+        collector = DuplicateIdCollector(values.value_counts()[lambda counts: counts > 1])
+        collector.update(values[:4], ids[:4])
+        collector.update(values[4:], ids[4:])
+
+        self.assertEqual(collector.findings("letter").to_dict(orient="records"), [
+            {"Column Name": "letter", "Findings": "b: 3 duplicates", "ID": "10; 12; 15"},
+            {"Column Name": "letter", "Findings": "a: 2 duplicates", "ID": "11; 14"},
+        ])
+
+    def test_ids_are_truncated_per_group(self):
+        values = pd.Series(["a"] * 5 + ["b"] * 2)
+        collector = DuplicateIdCollector(values.value_counts(), max_ids_per_group=2)
+        for start in range(0, len(values), 3):
+            collector.update(values[start:start + 3], values.index[start:start + 3])
+
+        self.assertEqual(list(collector.id_strings()), ["0; 1; ... (+3 more)", "5; 6"])
+
+    def test_missing_values_form_their_own_group(self):
+        df = pd.DataFrame({"id": [1, 2, 3, 4], "city": [None, "Paris", None, "Lyon"]})
+
+        results_df, _, total = checks.uniqueness_check(df, ["city"], "id", df.size)
+
+        self.assertEqual(results_df.to_dict(orient="records"),
+                         [{"Column Name": "city", "Findings": "nan: 2 duplicates", "ID": "1; 3"}])
+        self.assertEqual(total, 2)
+
+
+class ChunkedCheckTests(SimpleTestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "id": [1, 2, 3, 4, 5, 6, 7],
+            "gender": ["F", "M", None, "x", "F", " ", "x"],
+            "city": ["Paris", "Lyon", "Paris", None, None, "Nice", "Lyon"],
+        })
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "people.csv")
+        self.df.to_csv(self.path, index=False)
+        self.total_fields = self.df.size
+
+    def test_chunked_checks_match_the_in_memory_checks(self):
+        columns = list(self.df.columns)
+        for chunksize in (2, 3, 100):
+            with self.subTest(chunksize=chunksize):
+                self.assertEqual(
+                    checks.completeness_check_chunked(self.path, self.total_fields, chunksize=chunksize),
+                    checks.completeness_check(self.df, self.total_fields),
+                )
+                expected = checks.uniqueness_check(self.df, columns, "id", self.total_fields)
+                chunked = checks.uniqueness_check_chunked(self.path, columns, "id", self.total_fields,
+                                                          chunksize=chunksize)
+                self.assertEqual(chunked[0].to_dict(orient="records"), expected[0].to_dict(orient="records"))
+                self.assertEqual(chunked[1:], expected[1:])
+
+                expected = checks.check_categorical_validity_ai(
+                    self.df, ["gender"], "id", self.total_fields, invalid_values={"gender": ["x"]})
+                chunked = checks.check_categorical_validity_ai_chunked(
+                    self.path, ["gender"], "id", self.total_fields, chunksize=chunksize,
+                    invalid_values={"gender": ["x"]})
+                self.assertEqual(chunked[0].astype(str).to_dict(orient="records"),
+                                 expected[0].astype(str).to_dict(orient="records"))
+                self.assertEqual(chunked[1:], expected[1:])
+
+    def test_empty_chunks_and_missing_values_are_counted_once(self):
+        chunks = [self.df.iloc[:3], self.df.iloc[0:0], self.df.iloc[3:], self.df.iloc[0:0]]
+
+        score, issues = checks._completeness_check(lambda: chunks, self.total_fields, None, "completeness_check")
+        results_df, _, duplicates = checks._uniqueness_check(
+            lambda: chunks, ["gender", "city"], "id", self.total_fields, None, None, None, "uniqueness_check")
+
+        # A null and a blank in gender, two nulls in city
+        self.assertEqual((score, issues), checks.completeness_check(self.df, self.total_fields))
+        self.assertEqual(issues, 4)
+        self.assertEqual(duplicates, checks.uniqueness_check(self.df, ["gender", "city"], "id",
+                                                             self.total_fields)[2])
+        self.assertIn("gender", set(results_df["Column Name"]))
+
+
+class ParallelProfileTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "people.csv")
+        pd.DataFrame({
+            "id": range(12),
+            "age": [30, 41, 30, 52, 41, 30, None, 41, 30, None, 52, 30],  # nulls from the second chunk on
+            "city": ["Paris", "Lyon", None, "Paris", " ", "Nice", "Lyon", "Paris", None, "Nice", "Lyon", "Paris"],
+            "score": [1.5, 2.0, 1.5, 3.0, 2.0, 1.5, 3.0, 2.0, 1.5, 3.0, 2.0, 1.5],
+        }).to_csv(self.path, index=False)
+
+    def test_parallel_and_serial_paths_agree(self):
+        chunksize = 5
+        parquet_path = ingestion.spill_to_parquet(self.path, None, chunksize=chunksize)
+        serial = profile_file(self.path, chunksize=chunksize)
+        with mock.patch.object(scheduler, "PARALLEL_MIN_CELLS", 0):
+            self.assertTrue(scheduler.should_parallelize(parquet_path, serial.total_fields, serial.column_names, 2))
+            parallel = scheduler.profile_columns(parquet_path, chunksize=chunksize, max_workers=2)
+            parallel_uniqueness = checks.uniqueness_check_chunked(
+                parquet_path, parallel.column_names, "id", parallel.total_fields, chunksize=chunksize,
+                profile=parallel, max_workers=2)
+
+        self.assertEqual((parallel.rows, parallel.column_names), (serial.rows, serial.column_names))
+        for column in serial.column_names:
+            self.assertEqual(parallel[column].dtype, serial[column].dtype)
+            pd.testing.assert_series_equal(parallel[column].frequencies, serial[column].frequencies,
+                                           check_names=False)
+        serial_uniqueness = checks.uniqueness_check_chunked(
+            self.path, serial.column_names, "id", serial.total_fields, chunksize=chunksize, profile=serial)
+        self.assertEqual(parallel_uniqueness[0].to_dict(orient="records"),
+                         serial_uniqueness[0].to_dict(orient="records"))
+        self.assertEqual(parallel_uniqueness[1:], serial_uniqueness[1:])
+
+
+class NearDuplicateTests(SimpleTestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "id": range(8),
+            "company": ["Acme Inc.", "acme inc", "Globex", "Globex", "Initech", " ACME  Inc", None, "Initech"],
+            "first": ["Ann", "ann ", "Bob", "Bob", "Cy", "Ann", "Dee", "Cy"],
+            "last": ["Lee", "LEE", "Ray", "Ray", "Orr", "Lee", None, "Orr"],
+        })
+
+    def test_values_differing_in_case_spacing_and_punctuation_are_grouped(self):
+        results_df, score, total = checks.near_duplicate_check(self.df, ["company"], "id")
+
+        # Exact duplicates (Globex, Initech) are left to uniqueness_check
+        self.assertEqual(results_df.to_dict(orient="records"), [{
+            "Column Name": "company",
+            "Findings": "Acme Inc. ~ acme inc ~  ACME  Inc: 3 duplicates",
+            "ID": "0; 1; 5",
+        }])
+        self.assertEqual(total, 3)
+        self.assertEqual(score, 62.5)
+
+    def test_composite_key_groups_rows_and_streams_like_the_frame(self):
+        expected = checks.near_duplicate_check(self.df, [], "id", keys=[["first", "last"]])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "people.csv")
+            self.df.to_csv(path, index=False)
+            chunked = checks.near_duplicate_check_chunked(path, [], "id", keys=[["first", "last"]], chunksize=3)
+
+        self.assertEqual(list(expected[0]["ID"]), ["0; 1; 5", "2; 3", "4; 7"])
+        self.assertEqual(expected[0]["Column Name"].unique().tolist(), ["first + last"])
+        pd.testing.assert_frame_equal(chunked[0], expected[0])
+        self.assertEqual(chunked[1:], expected[1:])
+
+    def test_similar_values_are_grouped_with_minhash(self):
+        df = pd.DataFrame({"id": range(5), "name": [
+            "Jonathan Smith", "Jonathon Smith", "Maria Garcia", "Jonathan Smith", "Wei Zhang",
+        ]})
+
+        exact = checks.near_duplicate_check(df, ["name"], "id")
+        fuzzy = checks.near_duplicate_check(df, ["name"], "id", fuzzy=True, threshold=0.6)
+
+        self.assertTrue(exact[0].empty)
+        self.assertEqual(fuzzy[0].to_dict(orient="records"), [{
+            "Column Name": "name", "Findings": "Jonathan Smith ~ Jonathon Smith: 3 duplicates", "ID": "0; 1; 3",
+        }])
+
+
+class RuleCheckTests(SimpleTestCase):
+    def setUp(self):
+        rows = 40
+        self.df = pd.DataFrame({
+            "id": range(rows),
+            "email": [f"user{index}@example.com" for index in range(rows)],
+            "sku": [f"AB-{index:04d}" for index in range(rows)],
+            "age": [30 + index % 10 for index in range(rows)],
+            "updated": pd.date_range("2026-01-01", periods=rows, freq="D").strftime("%d/%m/%Y"),
+            "customer_id": [1 + index % 5 for index in range(rows)],
+        })
+        self.df.loc[1, "email"] = "user1-at-example.com"
+        self.df.loc[2, "sku"] = "ab1234"
+        self.df.loc[3, "age"] = 400
+        self.df.loc[4, "age"] = -2
+        self.df.loc[5, "updated"] = "31/12/2099"
+        self.df.loc[6, "updated"] = "unknown"
+
+    def findings(self, results_df):
+        return sorted(zip(results_df["Field"], results_df["Invalid Value"], results_df["Error"]))
+
+    def test_formats_follow_the_known_format_or_layout_of_each_column(self):
+        results_df, score, total = checks.consistency_check(self.df, ["email", "sku"])
+
+        self.assertEqual(self.findings(results_df), [
+            ("email", "user1-at-example.com", "Inconsistent format"), ("sku", "ab1234", "Inconsistent format"),
+        ])
+        self.assertEqual((score, total), (97.5, 2))
+
+        configured = checks.consistency_check(self.df, ["sku"], formats={"sku": r"[A-Z]{2}-\d{4}"})
+        self.assertEqual(configured[2], 1)
+
+    def test_ranges_outliers_and_dates(self):
+        results_df, score, total = checks.accuracy_check(self.df, ["age"], ranges={"age": [0, 120]})
+        self.assertEqual(self.findings(results_df), [("age", "-2", "Out of range"), ("age", "400", "Out of range")])
+        outliers = checks.accuracy_check(self.df, ["age"])
+        self.assertEqual(self.findings(outliers[0]), [("age", "-2", "Outlier"), ("age", "400", "Outlier")])
+
+        now = pd.Timestamp("2026-03-01", tz="UTC")
+        results_df, score, total = checks.timeliness_check(self.df, list(self.df.columns), freshness_days=30, now=now)
+        self.assertEqual(self.findings(results_df), [
+            ("updated", "31/12/2099", "Future date"), ("updated", "unknown", "Invalid date"),
+        ])
+        # The latest valid date, 2026-02-09, is 20 days old; 10 days later the dataset is stale
+        stale = checks.timeliness_check(self.df, ["updated"], freshness_days=10, now=now)
+        self.assertIn("Stale data", stale[0]["Error"].tolist())
+        self.assertEqual(stale[1], 50.0)
+
+    def test_historical_data_is_not_stale_by_default(self):
+        later = pd.Timestamp("2036-03-01", tz="UTC")
+        results_df, score, total = checks.timeliness_check(
+            self.df, ["updated"], freshness_days=settings.ANALYSIS_FRESHNESS_DAYS, now=later)
+
+        self.assertNotIn("Stale data", results_df["Error"].tolist())
+        self.assertEqual(total, 2)  # the unparsable date, and 2099 is still in the future
+
+    def test_foreign_keys_and_streaming(self):
+        with tempfile.TemporaryDirectory() as directory:
+            reference = os.path.join(directory, "customers.csv")
+            pd.DataFrame({"id": [1.0, 2.0, 3.0, None]}).to_csv(reference, index=False)
+            path = os.path.join(directory, "orders.csv")
+            self.df.to_csv(path, index=False)
+            references = {"customer_id": {"path": reference, "column": "id"}}
+
+            results_df, score, total = checks.integrity_check(self.df, references)
+            chunked = checks.integrity_check_chunked(path, references, chunksize=7)
+            timeliness = checks.timeliness_check_chunked(path, ["updated"], chunksize=7)
+
+        self.assertEqual(self.findings(results_df), [
+            ("customer_id", "4", "Missing reference"), ("customer_id", "5", "Missing reference"),
+        ])
+        self.assertEqual((score, total), (60.0, 16))
+        pd.testing.assert_frame_equal(chunked[0], results_df)
+        self.assertEqual(timeliness[2], 2)
+
+
+class BatchValidationTests(StubModelTestCase):
+    model_response = json.dumps({"categorical_columns": ["gender"], "id_column": "id", "invalid_values": {}})
+
+    def setUp(self):
+        super().setUp()
+        self.data = os.path.join(self.tmpdir.name, "data")
+        self.output = os.path.join(self.tmpdir.name, "report")
+        os.makedirs(self.data)
+        for index in range(3):
+            with open(os.path.join(self.data, f"people{index}.csv"), "w") as handle:
+                handle.write("id,gender\n1,F\n2,M\n" + "3,F\n" * index)
+        with open(os.path.join(self.data, "notes.txt"), "w") as handle:
+            handle.write("not data")
+
+    def test_scores_every_file_and_resumes(self):
+        reports = validate_files([self.data], self.output, workers=0)
+
+        self.assertEqual(len(reports), 3)
+        self.assertEqual({report["status"] for report in reports}, {"done"})
+        summary = pd.read_csv(os.path.join(self.output, SUMMARY_NAME))
+        self.assertEqual(summary["file"].map(os.path.basename).tolist(), ["people0.csv", "people1.csv", "people2.csv"])
+        self.assertIn("Uniqueness", summary.columns)
+        for report in reports:
+            self.assertTrue(os.path.exists(report["results"]))
+
+        # An interrupted run leaves a partial line behind; files edited since are validated again
+        with open(os.path.join(self.output, REPORT_NAME), "a") as handle:
+            handle.write('{"file": ')
+        with open(os.path.join(self.data, "people0.csv"), "a") as handle:
+            handle.write("4,M\n")
+        finished = []
+        reports = validate_files([os.path.join(self.data, "*.csv")], self.output, workers=0, progress=finished.append)
+
+        self.assertEqual([os.path.basename(report["file"]) for report in finished], ["people0.csv"])
+        self.assertEqual(len(reports), 3)
+
+
+class SketchProfileTests(SimpleTestCase):
+    def test_estimates_fall_within_their_bounds(self):
+        rng = np.random.default_rng(0)
+        rows = 60_000
+        df = pd.DataFrame({
+            "id": np.arange(rows),
+            "repeated": rng.integers(0, 20_000, rows),
+            "status": rng.choice(["open", "closed", None], rows),
+        })
+        exact = profile_dataframe(df)
+        approximate = SketchDatasetProfile()
+        for start in range(0, rows, 7_000):
+            approximate.update(df.iloc[start:start + 7_000])
+
+        for column in df.columns:
+            distinct, low, high = approximate[column].distinct_bounds()
+            self.assertLessEqual(low, exact[column].distinct, column)
+            self.assertGreaterEqual(high, exact[column].distinct, column)
+            duplicates, low, high = approximate[column].duplicate_rows_bounds()
+            self.assertLessEqual(low, exact[column].duplicate_rows, column)
+            self.assertGreaterEqual(high, exact[column].duplicate_rows, column)
+        self.assertEqual(approximate["id"].duplicate_counts().tolist(), [])
+        self.assertEqual(approximate["status"].nulls, exact["status"].nulls)
+        self.assertEqual(approximate["status"].frequencies.to_dict(), exact["status"].frequencies.to_dict())
+
+    def test_small_columns_are_exact(self):
+        df = pd.DataFrame({"id": [1, 2, 3, 3], "name": ["a", " ", "b", "a"]})
+        exact, approximate = profile_dataframe(df), SketchDatasetProfile().update(df)
+
+        for column in df.columns:
+            self.assertEqual(
+                (approximate[column].distinct, approximate[column].duplicate_rows, approximate[column].blanks),
+                (exact[column].distinct, exact[column].duplicate_rows, exact[column].blanks),
+            )
+        results_df, score, total = checks.uniqueness_check(df, ["id", "name"], "id", df.size, profile=approximate)
+        self.assertEqual(results_df["Findings"].tolist(), ["3: ~2 duplicates", "a: ~2 duplicates"])
+        self.assertEqual((score, total), (50.0, 4))
+
+    def test_column_filling_the_sample_is_exact(self):
+        df = pd.DataFrame({"value": np.arange(SAMPLE_SIZE).repeat(2)})
+        approximate = SketchDatasetProfile().update(df)
+
+        self.assertEqual(approximate["value"].distinct_bounds(), (SAMPLE_SIZE,) * 3)
+        self.assertEqual(approximate["value"].duplicate_rows_bounds(), (2 * SAMPLE_SIZE,) * 3)
+        approximate.update(pd.DataFrame({"value": [SAMPLE_SIZE]}))
+        self.assertFalse(approximate["value"].sample.complete)
+
+
+class TypedLoadingTests(SimpleTestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".csv")
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+        pd.DataFrame({
+            "id": range(400),
+            "status": ["active", "inactive", " ", None] * 100,
+            "email": [f"user{i % 300}@example.com" for i in range(400)],
+        }).to_csv(self.path, index=False)
+
+    def test_low_cardinality_text_is_read_as_category(self):
+        dtypes = ingestion.infer_csv_dtypes(self.path)
+
+        self.assertEqual(dtypes["status"], "category")
+        self.assertNotEqual(dtypes["email"], "category")
+        self.assertNotIn("id", dtypes)
+
+    def test_typed_profile_matches_untyped_profile(self):
+        profiles = []
+        for typed, engine in [(False, "c"), (True, "c"), (True, "pyarrow")]:
+            with mock.patch.object(ingestion, "TYPED_LOADING", typed), \
+                    mock.patch.object(ingestion, "CSV_ENGINE", engine):
+                profiles.append(profile_file(self.path, chunksize=150))
+
+        for profile in profiles[1:]:
+            for name in profiles[0].column_names:
+                expected, actual = profiles[0][name], profile[name]
+                self.assertEqual(
+                    (actual.nulls, actual.blanks, actual.distinct, actual.duplicate_rows),
+                    (expected.nulls, expected.blanks, expected.distinct, expected.duplicate_rows),
+                )
+
+
+class AnalysisJobTests(StubModelMixin, TestCase):
+    csv = b"id,gender,age\n1,F,30\n2,M,\n3,x,41\n3,F,41\n"
+
+    def upload(self):
+        response = self.client.post(reverse("home"), {"csv_file": SimpleUploadedFile("people.csv", self.csv)})
+        job = AnalysisJob.objects.get()
+        self.assertRedirects(response, reverse("dashboard", args=[job.pk]), fetch_redirect_response=False)
+        return job
+
+    def upload_again(self):
+        response = self.client.post(reverse("home"), {"csv_file": SimpleUploadedFile("copy.csv", self.csv)})
+        self.assertEqual(AnalysisJob.objects.count(), 1)
+        return AnalysisJob.objects.get(pk=response.url.split("/")[-2])
+
+    def test_upload_returns_before_the_checks_run(self):
+        job = self.upload()
+
+        self.assertEqual(job.status, AnalysisJob.QUEUED)
+        self.assertEqual(self.model.prompts, [])
+        response = self.client.get(reverse("dashboard", args=[job.pk]))
+        self.assertTemplateUsed(response, "processing.html")
+
+    def test_dashboard_renders_stored_results(self):
+        job = self.upload()
+        self.assertEqual(run_pending_jobs(), 1)
+
+        status = self.client.get(reverse("job_status", args=[job.pk])).json()
+        self.assertEqual(status["status"], AnalysisJob.DONE)
+
+        calls = len(self.model.prompts)
+        response = self.client.get(reverse("dashboard", args=[job.pk]))
+        self.assertTemplateUsed(response, "dashboard.html")
+        self.assertEqual(response.context["file_info"]["rows"], 4)
+        self.assertEqual(len(self.model.prompts), calls)
+
+    def test_approximate_analysis_shows_error_bounds(self):
+        with override_settings(ANALYSIS_APPROXIMATE_MIN_BYTES=0):
+            job = self.upload()
+            run_pending_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.results["file_info"]["approximate"]["columns"][0]["distinct"], 3)
+        uniqueness = next(check for check in job.results["checks"] if check["name"] == "Uniqueness")
+        self.assertEqual(uniqueness["margin"], 0)
+        approximate = {check["name"] for check in job.results["checks"] if check["approximate"]}
+        self.assertEqual(approximate, {"Accuracy", "Consistency", "Timeliness", "Integrity"})
+        response = self.client.get(reverse("dashboard", args=[job.pk]))
+        self.assertContains(response, "Estimates and error bounds")
+        self.assertContains(response, "most frequent values of each column", count=4)
+
+    def test_preview_scores_first_rows_then_follows_the_scan(self):
+        job = self.upload()
+        JobProgress(job).preview(rows=2)
+
+        job.refresh_from_db()
+        self.assertEqual(job.progress["stage"], "preview")
+        self.assertEqual(job.progress["provisional"]["rows"], 2)
+        self.assertEqual(job.progress["provisional"]["sample"], "head")
+        self.assertNotIn("Validity", [check["name"] for check in job.progress["provisional"]["checks"]])
+        self.assertEqual(self.model.prompts, [])
+        response = self.client.get(reverse("dashboard", args=[job.pk]))
+        self.assertContains(response, "Provisional results")
+
+        run_pending_jobs()
+        progress = self.client.get(reverse("job_status", args=[job.pk])).json()["progress"]
+        self.assertEqual(progress["rows_read"], 4)
+        self.assertEqual(progress["percent"], 100)
+        self.assertEqual(progress["stage"], "checks")
+
+    async def test_events_stream_progress_until_done(self):
+        job = await sync_to_async(self.upload)()
+        await sync_to_async(run_pending_jobs)()
+        self.async_client.cookies = self.client.cookies  # the session that uploaded the file
+
+        response = await self.async_client.get(reverse("job_events", args=[job.pk]))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertTrue(body.startswith("event: progress\n"))
+        self.assertTrue(body.endswith('event: done\ndata: {"status": "done", "error": ""}\n\n'))
+
+    def test_same_content_reuses_stored_results(self):
+        first = self.upload()
+        run_pending_jobs()
+        calls = len(self.model.prompts)
+
+        second = self.upload_again()
+
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(run_pending_jobs(), 0)
+        self.assertEqual(len(self.model.prompts), calls)
+
+    def test_other_sessions_cannot_see_an_analysis(self):
+        job = self.upload()
+        run_pending_jobs()
+        other = Client()
+
+        for url in (reverse("dashboard", args=[job.pk]), reverse("job_status", args=[job.pk]),
+                    reverse("download_cleaned", args=[job.pk, "csv"]),
+                    reverse("download_report", args=[job.pk, "duplicates"])):
+            with self.subTest(url=url):
+                self.assertEqual(other.get(url).status_code, 404)
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_session_dashboard_shows_its_latest_analysis(self):
+        job = self.upload()
+
+        response = self.client.get(reverse("latest_dashboard"))
+
+        self.assertRedirects(response, reverse("dashboard", args=[job.pk]), fetch_redirect_response=False)
+
+    def test_analysis_timings_reach_the_debug_panel_and_metrics(self):
+        job = self.upload()
+        run_pending_jobs()
+        job.refresh_from_db()
+
+        spans = {timing["span"] for timing in job.results["timings"]}
+        self.assertTrue({"analysis", "parse", "uniqueness_check", "completeness_check", "llm_call"} <= spans)
+
+        with override_settings(TIMING_DEBUG_PANEL=True):
+            response = self.client.get(reverse("dashboard", args=[job.pk]), {"debug": 1})
+        self.assertContains(response, "Analysis timings")
+        self.assertContains(response, "Column classification")
+        self.assertIn("render;dur=", response["Server-Timing"])
+
+        with override_settings(METRICS_ENABLED=True):
+            metrics = self.client.get(reverse("metrics")).content.decode()
+        self.assertIn('cleaner_span_seconds_count{span="parse"}', metrics)
+        self.assertIn('cleaner_llm_calls_total{cached="false"}', metrics)
+        with override_settings(METRICS_ENABLED=False):
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 404)
+
+    def test_analysed_upload_is_kept_as_parquet(self):
+        job = self.upload()
+        run_pending_jobs()
+        job.refresh_from_db()
+
+        self.assertTrue(job.path.endswith(".parquet"))
+        self.assertFalse(os.path.exists(job.path[:-len(".parquet")] + ".csv"))
+
+
+@override_settings(CSV_CHUNK_SIZE=64)
+class ExportTests(StubModelMixin, TestCase):
+    csv = b"id,gender,age\n1,F,30\n2,M,\n3,x,41\n3,x,41\n4, F ,25\n5,  ,7\n"
+
+    @staticmethod
+    def model_response(prompt):
+        # "id" is not unique here, so the model is asked for the ID column before the checks run
+        if "ID-related column" in prompt:
+            return "id"
+        return json.dumps({"categorical_columns": ["gender"], "invalid_values": {"gender": ["x"]}})
+
+    def setUp(self):
+        super().setUp()
+        self.client.post(reverse("home"), {"csv_file": SimpleUploadedFile("people.csv", self.csv)})
+        run_pending_jobs()
+        self.job = AnalysisJob.objects.get()
+
+    def download(self, name, *args, **params):
+        response = self.client.get(reverse(name, args=[self.job.pk, *args]), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def test_cleaned_csv_is_streamed_gzipped(self):
+        response, content = self.download("download_cleaned", "csv", compression="gzip")
+
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="people_cleaned.csv.gz"')
+        cleaned = pd.read_csv(io.BytesIO(gzip.decompress(content)), dtype=str, keep_default_na=False)
+        self.assertEqual(cleaned["id"].tolist(), ["1", "2", "3", "4", "5"])
+        self.assertEqual(cleaned["gender"].tolist(), ["F", "M", "x", "F", ""])
+        self.assertEqual(cleaned["invalid_fields"].tolist(), ["", "", "gender", "", ""])
+
+    def test_cleaned_parquet_and_issue_tables(self):
+        _, content = self.download("download_cleaned", "parquet")
+        self.assertEqual(len(pd.read_parquet(io.BytesIO(content))), 5)
+
+        _, content = self.download("download_report", "invalid_values")
+        invalid = pd.read_csv(io.BytesIO(content))
+        # One row per invalid cell with its ID, unless ANALYSIS_GROUP_INVALID_VALUES is set
+        self.assertEqual(list(invalid.columns), checks.ERROR_COLUMNS)
+        self.assertEqual(invalid[["ID", "Field", "Invalid Value"]].values.tolist(), [[3, "gender", "x"]] * 2)
+
+        _, content = self.download("download_report", "duplicates")
+        self.assertIn(b"Column Name,Findings,ID", content)
+
+    def test_invalid_values_can_be_grouped(self):
+        path = os.path.join(self.tmpdir.name, "people.csv")
+        with open(path, "wb") as handle:
+            handle.write(self.csv)
+
+        with override_settings(ANALYSIS_GROUP_INVALID_VALUES=True):
+            results, _ = run_analysis(path, "people.csv", save_snapshot=False)
+
+        self.assertEqual(results["file_info"]["categorical_validity_results"], [{
+            "Field": "gender", "Invalid Value": "x", "Count": 2, "Error": checks.INVALID_CATEGORY_ERROR,
+            "Explanation": "'x' is not among the predefined valid categories, which may impact data consistency.",
+        }])
+
+    def test_unknown_compression_is_rejected(self):
+        response = self.client.get(reverse("download_cleaned", args=[self.job.pk, "csv"]), {"compression": "rar"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_rows_repeated_in_later_chunks_are_dropped(self):
+        df = pd.DataFrame({"id": [1, 2, 1, 3, 2, 1], "gender": ["F", "M", "F", "F", "M", "x"]})
+        chunks = [df.iloc[:2], df.iloc[2:4], df.iloc[0:0], df.iloc[4:]]
+
+        cleaned = pd.concat(export.clean_chunks(chunks, {"gender": {"x"}}))
+
+        self.assertEqual(cleaned.index.tolist(), [0, 1, 3, 5])
+        self.assertEqual(cleaned[export.INVALID_FIELDS_COLUMN].tolist(), ["", "", "", "gender"])
+
+
+class IncrementalAnalysisTests(StubModelMixin, TestCase):
+    model_response = "['status']"
+
+    def setUp(self):
+        super().setUp()
+        self.rows = pd.DataFrame({
+            "id": range(300),
+            "status": ["active", "inactive", "unknown", None] * 75,
+            "email": [f"user{i % 250}@example.com" for i in range(300)],
+        })
+
+    def analyse(self, df, name):
+        self.client.post(reverse("home"), {"csv_file": SimpleUploadedFile(name, df.to_csv(index=False).encode())})
+        run_pending_jobs()
+        return AnalysisJob.objects.order_by("-created_at").first()
+
+    def new_version(self):
+        df = self.rows.drop(index=[5]).copy()
+        df.loc[10, "status"] = "inactive"
+        df.loc[20, "email"] = "user0@example.com"
+        appended = pd.DataFrame({"id": [300, 301], "status": ["active", None], "email": ["new@example.com"] * 2})
+        return pd.concat([df, appended], ignore_index=True)
+
+    def test_new_version_is_checked_from_changed_rows(self):
+        first = self.analyse(self.rows, "people.csv")
+        second = self.analyse(self.new_version(), "people.csv")
+
+        self.assertEqual(second.dataset_key, first.dataset_key)
+        self.assertEqual(second.results["file_info"]["changes"], {"removed": 1, "changed": 2, "added": 2})
+
+        path = os.path.join(self.tmpdir.name, "full.csv")
+        self.new_version().to_csv(path, index=False)
+        full, _ = run_analysis(path, "people.csv", spill=True)
+        second.results["file_info"].pop("changes")
+        for results in (second.results, full):
+            results.pop("timings")
+        self.assertEqual(second.results, full)
+
+    def test_changed_rows_are_kept_while_hashing(self):
+        old_path, new_path = (os.path.join(self.tmpdir.name, name) for name in ("old.csv", "new.csv"))
+        self.rows.to_csv(old_path, index=False)
+        self.new_version().to_csv(new_path, index=False)
+        columns = list(self.rows.columns)
+        ids, hashes, _ = hash_rows(old_path, columns, "id", chunksize=100)
+        snapshot = SimpleNamespace(ids=ids, hashes=hashes)
+
+        _, _, changed_rows = hash_rows(new_path, columns, "id", chunksize=100, snapshot=snapshot)
+
+        expected = read_rows(new_path, "id", [10, 20, 300, 301], chunksize=100)
+        pd.testing.assert_frame_equal(changed_rows, expected)
+        with mock.patch("cleaner.data_quality.incremental.MAX_CHANGED_RATIO", 0.01):
+            self.assertIsNone(hash_rows(new_path, columns, "id", chunksize=100, snapshot=snapshot)[2])
+
+    def test_ids_come_from_the_resolved_id_column(self):
+        path = os.path.join(self.tmpdir.name, "people.csv")
+        self.rows.assign(id=self.rows["id"] + 1000)[["status", "email", "id"]].to_csv(path, index=False)
+
+        results, _ = run_analysis(path, "people.csv", save_snapshot=True)
+
+        findings = {row["Findings"]: row["ID"] for row in results["file_info"]["uniqueness_results"]}
+        self.assertTrue(findings["active: 75 duplicates"].startswith("1000; 1004; 1008"))
+        self.assertEqual(load_snapshot(path).id_column, "id")
+
+    def test_snapshot_is_stored_as_plain_data(self):
+        path = os.path.join(self.tmpdir.name, "people.csv")
+        self.rows.to_csv(path, index=False)
+        run_analysis(path, "people.csv", save_snapshot=True)
+        expected = profile_file(path)
+
+        with mock.patch("pickle.load", side_effect=AssertionError("snapshots are not pickled")):
+            snapshot = load_snapshot(path)
+
+        self.assertEqual(snapshot.ids.tolist(), list(range(300)))
+        self.assertEqual(snapshot.profile.rows, 300)
+        for column in self.rows.columns:
+            self.assertEqual(str(snapshot.profile[column].dtype), str(expected[column].dtype))
+            pd.testing.assert_series_equal(snapshot.profile[column].frequencies, expected[column].frequencies,
+                                           check_names=False, check_index_type=False)
+        self.assertEqual(set(snapshot.duplicate_ids), {"status", "email"})
+
+    def test_versions_are_matched_on_an_id_column_that_is_not_first(self):
+        order = ["status", "email", "id"]
+        first = self.analyse(self.rows[order], "people.csv")
+        second = self.analyse(self.new_version()[order], "people.csv")
+
+        self.assertEqual(first.dataset_key, dataset_key(order, "id"))
+        self.assertEqual(second.results["file_info"]["changes"], {"removed": 1, "changed": 2, "added": 2})
@@ -1,7 +1,13 @@
 from django.urls import path
-from .views import home, dashboard
+from .views import home, dashboard, latest_dashboard, job_status, job_events, metrics, download_cleaned, download_report
 
 urlpatterns = [
     path('', home, name='home'),
-    path('dashboard/', dashboard, name='dashboard'),
+    path('dashboard/', latest_dashboard, name='latest_dashboard'),
+    path('dashboard/<uuid:job_id>/', dashboard, name='dashboard'),
+    path('jobs/<uuid:job_id>/status/', job_status, name='job_status'),
+    path('jobs/<uuid:job_id>/events/', job_events, name='job_events'),
+    path('metrics/', metrics, name='metrics'),
+    path('dashboard/<uuid:job_id>/download/cleaned.<str:file_format>', download_cleaned, name='download_cleaned'),
+    path('dashboard/<uuid:job_id>/download/<str:report>.csv', download_report, name='download_report'),
 ]
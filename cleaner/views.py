@@ -1,124 +1,212 @@
-from django.shortcuts import render, redirect
-import pandas as pd
-from .data_quality.checks import uniqueness_check
-from .data_quality.checks import completeness_check, check_categorical_validity_ai
-from .ai_checks.llm import categorical_columns, identify_id_column_prompt
-CSV_INFO = {}
+import asyncio
+import json
+import os
+from datetime import timedelta
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, render, redirect, get_object_or_404
+from django.utils import timezone
+from django.utils.timesince import timesince
+from .ai_checks.llm import cache_stats
+from .analysis import overall_score
+from .data_quality.checks import ERROR_COLUMNS, GROUPED_ERROR_COLUMNS
+from .data_quality.export import (
+    COMPRESSIONS, available_compressions, cleaned_dataset_stream, compress_stream, invalid_values_by_field,
+    records_csv_stream,
+)
+from .data_quality.ingestion import spool_upload, remove_spooled_file
+from .instrumentation import metrics as timing_metrics, span
+from .jobs import enqueue_analysis
+from .models import AnalysisJob
+
+FINDINGS_COLUMNS = ["Column Name", "Findings", "ID"]
+# Issue tables that can be downloaded: name -> (key in file_info, columns)
+REPORTS = {
+    "duplicates": ("uniqueness_results", FINDINGS_COLUMNS),
+    "near_duplicates": ("near_duplicate_results", FINDINGS_COLUMNS),
+    # Grouped per value with ANALYSIS_GROUP_INVALID_VALUES (GROUPED_ERROR_COLUMNS)
+    "invalid_values": ("categorical_validity_results", ERROR_COLUMNS),
+    "accuracy": ("accuracy_results", GROUPED_ERROR_COLUMNS),
+    "consistency": ("consistency_results", GROUPED_ERROR_COLUMNS),
+    "timeliness": ("timeliness_results", GROUPED_ERROR_COLUMNS),
+    "integrity": ("integrity_results", GROUPED_ERROR_COLUMNS),
+}
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "gzip": "application/gzip",
+    "zstd": "application/zstd",
+}
 
 def home(request):
     if request.method == "POST":
         uploaded_file = request.FILES.get("csv_file")
         if uploaded_file:
+            path, content_hash = spool_upload(uploaded_file, directory=settings.CSV_UPLOAD_DIR)
             try:
-                global df
-                df = pd.read_csv(uploaded_file)
-
-                # Run uniqueness check
-                columns = df.columns.tolist()
-                total_fields = df.size
-                results_df, score, duplicates = uniqueness_check(
-                    df,
-                    columns=columns,
-                    id_column=columns[0],  # assuming first column is ID
-                    total_fields=total_fields,
-                    excluded_category_columns=[]
-                )
-
-                global CSV_INFO
-                CSV_INFO = {
-                    "filename": uploaded_file.name,
-                    "rows": len(df),
-                    "columns": len(df.columns),
-                    "uniqueness_score": score,
-                    "total_duplicates": duplicates,
-                    "uniqueness_results": results_df.to_dict(orient="records"),
-                }
-                return redirect("dashboard")
+                # The checks run in a background worker; the dashboard polls for the results.
+                # A file with the same content reuses the results stored for it.
+                job = enqueue_analysis(path, uploaded_file.name, content_hash)
+                # Each session keeps its own analyses instead of sharing a module-level global
+                request.session["analyses"] = request.session.get("analyses", [])[-19:] + [str(job.pk)]
+                return redirect("dashboard", job_id=job.pk)
             except Exception as e:
+                remove_spooled_file(path)
                 return render(request, "home.html", {"error": str(e)})
     return render(request, "home.html")
 
-def dashboard(request):
-    if not CSV_INFO:
+def last_checked(finished_at):
+    if timezone.now() - finished_at < timedelta(minutes=1):
+        return "just now"
+    return f"{timesince(finished_at)} ago"
+
+def _check_session(analyses, job_id):
+    # Job IDs end up in URLs and logs: only the session that uploaded a file sees its results
+    if str(job_id) not in (analyses or []):
+        raise Http404("No such analysis in this session")
+
+def _session_job(request, job_id):
+    """The job `job_id`, if it is one of the analyses of this session."""
+    _check_session(request.session.get("analyses"), job_id)
+    return get_object_or_404(AnalysisJob, pk=job_id)
+
+def job_status(request, job_id):
+    job = _session_job(request, job_id)
+    return JsonResponse({
+        "id": str(job.pk),
+        "status": job.status,
+        "finished": job.is_finished,
+        "error": job.error,
+        "progress": job.progress,
+    })
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+async def job_events(request, job_id):
+    """
+    Server-sent events following a job: a `progress` event whenever its stage or
+    provisional scores change, then one `done` event when it finishes.
+
+    The view is async, so under the ASGI server (csv_cleaner.asgi) an open stream
+    holds no worker thread.
+    """
+    _check_session(await request.session.aget("analyses"), job_id)
+    await aget_object_or_404(AnalysisJob, pk=job_id)
+
+    async def events():
+        last = None
+        waited = 0.0
+        while True:
+            job = await AnalysisJob.objects.only("status", "error", "progress").aget(pk=job_id)
+            state = {"status": job.status, "progress": job.progress}
+            if state != last:
+                yield _event("progress", state)
+                last, waited = state, 0.0
+            elif waited >= 15:
+                yield ": keep-alive\n\n"  # comment line, so proxies do not close an idle stream
+                waited = 0.0
+            if job.is_finished:
+                yield _event("done", {"status": job.status, "error": job.error})
+                return
+            await asyncio.sleep(settings.ANALYSIS_EVENTS_INTERVAL)
+            waited += settings.ANALYSIS_EVENTS_INTERVAL
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx would otherwise hold events back
+    return response
+
+def latest_dashboard(request):
+    analyses = request.session.get("analyses")
+    if not analyses:
         return redirect("home")
+    return redirect("dashboard", job_id=analyses[-1])
+
+def dashboard(request, job_id):
+    job = _session_job(request, job_id)
+
+    if job.status == AnalysisJob.FAILED:
+        return render(request, "home.html", {"error": job.error})
+    if job.status != AnalysisJob.DONE:
+        return render(request, "processing.html", {"job": job})
+
+    checked = last_checked(job.finished_at)
+    checks = [dict(check, last_checked=checked) for check in job.results["checks"]]
+
+    # Timing spans of the analysis, shown with ?debug=1 when the panel is enabled
+    debug = settings.TIMING_DEBUG_PANEL and "debug" in request.GET
+    timings = job.results.get("timings") if debug else None
+    classification = job.results.get("classification") if debug else None
 
-    total_fields = df.shape[0] * df.shape[1]  # total cells
-    columns = df.columns
-    categorical_columns_ = categorical_columns(columns)
-    id_column = identify_id_column_prompt(columns)
-    # Run completeness check
-    completeness_score, completeness_issues = completeness_check(
-        df, total_fields=total_fields
+    with span("render", template="dashboard.html") as record:
+        response = render(request, "dashboard.html", {
+            "file_info": job.results["file_info"],
+            "checks": checks,
+            "overall_score": overall_score(checks),
+            "passed": len([c for c in checks if c["status"] == "passed"]),
+            "warnings": len([c for c in checks if c["status"] == "warning"]),
+            "failed": len([c for c in checks if c["status"] == "failed"]),
+            "timings": timings,
+            "classification": classification,
+            "job": job,
+            "compressions": available_compressions(),
+        })
+    response["Server-Timing"] = f"render;dur={record['duration_ms']}"
+    return response
+
+def metrics(request):
+    """Span durations and LLM counters of this process in the Prometheus text format; 404 unless METRICS_ENABLED."""
+    if not settings.METRICS_ENABLED:
+        raise Http404("Metrics are disabled")
+    stats = cache_stats()
+    body = timing_metrics.render(extra_gauges={
+        "cleaner_llm_cache_entries": stats["entries"],
+        "cleaner_llm_cache_bytes": stats["bytes"],
+        "cleaner_llm_cache_hits": stats["hits"],
+        "cleaner_llm_cache_misses": stats["misses"],
+    })
+    return HttpResponse(body, content_type="text/plain; version=0.0.4; charset=utf-8")
+
+def _finished_job(request, job_id):
+    job = _session_job(request, job_id)
+    if job.status != AnalysisJob.DONE:
+        raise Http404("The analysis has not finished")
+    return job
+
+def _download(chunks, filename, file_format, request):
+    """Stream `chunks` as an attachment, compressed as asked by the `compression` query parameter."""
+    compression = request.GET.get("compression") or None
+    if compression is not None and compression not in available_compressions():
+        return HttpResponseBadRequest(f"Unsupported compression: {compression}")
+    response = StreamingHttpResponse(
+        compress_stream(chunks, compression), content_type=CONTENT_TYPES[compression or file_format]
     )
+    suffix = COMPRESSIONS[compression] if compression else ""
+    response["Content-Disposition"] = f'attachment; filename="{filename}{suffix}"'
+    return response
+
+def download_cleaned(request, job_id, file_format):
+    """Cleaned dataset: duplicate rows dropped, blanks normalized and invalid categorical values flagged."""
+    job = _finished_job(request, job_id)
+    if file_format not in ("csv", "parquet"):
+        raise Http404("Unknown format")
+    if not os.path.exists(job.path):
+        raise Http404("The analysed file is no longer available")
+    invalid_values = invalid_values_by_field(job.results["file_info"].get("categorical_validity_results", []))
+    chunks = cleaned_dataset_stream(job.path, file_format, invalid_values, chunksize=settings.CSV_CHUNK_SIZE)
+    filename = f"{os.path.splitext(job.filename)[0]}_cleaned.{file_format}"
+    return _download(chunks, filename, file_format, request)
 
-    error_df, categorical_validity_score, total_invalid = check_categorical_validity_ai(df, categorical_columns_, id_column, total_fields)
-
-    checks = [
-        {
-            "name": "Completeness",
-            "description": "Missing values and null checks",
-            "status": "passed" if completeness_score > 90 else "warning" if completeness_score > 70 else "failed",
-            "score": completeness_score,
-            "issues": completeness_issues,
-            "last_checked": "just now",
-        },
-        {
-            "name": "Accuracy",
-            "description": "Correctness and validity of data",
-            "status": "warning",
-            "score": 78,
-            "issues": 3,
-            "last_checked": "5 min ago",
-        },
-        {
-            "name": "Consistency",
-            "description": "Format and standard compliance",
-            "status": "passed",
-            "score": 91,
-            "issues": 0,
-            "last_checked": "1 min ago",
-        },
-        {
-            "name": "Timeliness",
-            "description": "Freshness and update frequency",
-            "status": "failed",
-            "score": 45,
-            "issues": 12,
-            "last_checked": "10 min ago",
-        },
-        {
-            "name": "Uniqueness",
-            "description": "Duplicate record detection",
-            "status": "passed",
-            "score": 98,
-            "issues": 0,
-            "last_checked": "3 min ago",
-        },
-        {
-            "name": "Validity",
-            "description": "Business rule compliance",
-            "status": "warning",
-            "score": categorical_validity_score,
-            "issues": 5,
-            "last_checked": "just now",
-        },
-        {
-            "name": "Integrity",
-            "description": "Referential integrity checks",
-            "status": "passed",
-            "score": 89,
-            "issues": 1,
-            "last_checked": "4 min ago",
-        },
-    ]
-
-    overall_score = sum(c["score"] for c in checks) // len(checks)
-
-    return render(request, "dashboard.html", {
-        "file_info": CSV_INFO,
-        "checks": checks,
-        "overall_score": overall_score,
-        "passed": len([c for c in checks if c["status"] == "passed"]),
-        "warnings": len([c for c in checks if c["status"] == "warning"]),
-        "failed": len([c for c in checks if c["status"] == "failed"]),
-    })
\ No newline at end of file
+def download_report(request, job_id, report):
+    """Issue table of one check as CSV."""
+    job = _finished_job(request, job_id)
+    if report not in REPORTS:
+        raise Http404("Unknown report")
+    key, columns = REPORTS[report]
+    records = job.results["file_info"].get(key, [])
+    if records:
+        columns = list(records[0])  # the shape the results were stored with
+    chunks = records_csv_stream(records, columns)
+    filename = f"{os.path.splitext(job.filename)[0]}_{report}.csv"
+    return _download(chunks, filename, "csv", request)
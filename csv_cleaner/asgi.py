@@ -3,6 +3,11 @@ ASGI config for csv_cleaner project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server (e.g. ``uvicorn csv_cleaner.asgi:application``) to
+stream job progress: the server-sent events of /jobs/<id>/events/ come from an
+async view, which WSGI servers can only send once the job has finished (the
+processing page then falls back to polling /jobs/<id>/status/).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -10,11 +10,19 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
+from dotenv import load_dotenv
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Environment variables from a .env file (e.g. GEMINI_API_KEY, LLM_PROVIDER), for the settings
+# below and for the model calls, which read theirs when first needed
+load_dotenv()
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
@@ -80,6 +88,10 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Analysis workers write job results while requests read them
+            'timeout': 20,
+        },
     }
 }
 
@@ -119,6 +131,114 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 
 
+# CSV uploads
+# Uploads are spooled to disk and read back in chunks of CSV_CHUNK_SIZE rows,
+# so peak memory does not depend on the size of the file.
+
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2_621_440  # 2.5 MB
+CSV_UPLOAD_DIR = BASE_DIR / 'uploads'
+CSV_CHUNK_SIZE = 100_000
+
+# Maximum number of row IDs listed per duplicated value in uniqueness findings
+UNIQUENESS_MAX_IDS_PER_GROUP = 100
+
+
+# Analysis jobs
+# Uploads are queued in the AnalysisJob table and processed by worker threads. In
+# production, run them as their own process with `manage.py run_analysis_workers`;
+# threads inside the web process (each process of a multi-process server starting
+# its own) are only started in development.
+
+ANALYSIS_RUN_WORKERS_IN_PROCESS = DEBUG
+ANALYSIS_WORKERS = 2
+ANALYSIS_POLL_INTERVAL = 2  # seconds
+ANALYSIS_JOB_TIMEOUT = 3600  # seconds before a running job is considered dead
+# Keep analysed data as compressed Parquet (requires pyarrow) instead of the uploaded CSV
+ANALYSIS_SPILL_TO_PARQUET = True
+# Processes used for column-level work of one large job (1 keeps every check serial). Each
+# running job starts its own pool, so the cores are split between the ANALYSIS_WORKERS jobs
+ANALYSIS_MAX_WORKERS_PER_JOB = max(1, (os.cpu_count() or 1) // ANALYSIS_WORKERS)
+# Check a new version of a known dataset (same columns and ID column) from its changed rows only
+ANALYSIS_INCREMENTAL = True
+# Classify columns, pick the ID column and validate values in batched JSON requests
+# (LLM_TOKEN_BUDGET tokens per prompt) instead of one model call per column
+ANALYSIS_LLM_BATCHED = True
+# Minimum confidence of the local, statistics-based column classification; less confident
+# columns (and the ID column) are left to the LLM. Above 1, every decision goes to the LLM.
+ANALYSIS_CLASSIFIER_CONFIDENCE = 0.9
+# Near-duplicate detection in text columns: "normalized" groups values differing only by case,
+# whitespace or punctuation, "fuzzy" also similar ones (MinHash/LSH); None turns it off
+ANALYSIS_NEAR_DUPLICATES = "normalized"
+ANALYSIS_FUZZY_THRESHOLD = 0.8
+# Composite keys checked for duplicate rows, e.g. [["first_name", "last_name", "birth_date"]]
+ANALYSIS_DUPLICATE_KEYS = []
+# Files of at least this many bytes are profiled approximately, with constant-memory sketches
+# (HyperLogLog, Count-Min, top-K) in a single read: distinct and duplicate counts become
+# estimates shown with error bounds, and near duplicates are not checked. None turns it off.
+ANALYSIS_APPROXIMATE_MIN_BYTES = None
+# Accuracy: expected [minimum, maximum] of numeric columns, e.g. {"age": [0, 120]}, and the width
+# of the outlier fences in interquartile ranges (None turns outlier detection off)
+ANALYSIS_VALUE_RANGES = {}
+ANALYSIS_OUTLIER_IQR = 3.0
+# Consistency: regex the values of a column must match, e.g. {"sku": r"[A-Z]{3}-\d{4}"}; other
+# text columns are checked against the known format or code layout most of their values follow
+ANALYSIS_FORMATS = {}
+# Timeliness: maximum age in days of the latest date of a dataset. None (the default) skips
+# the freshness window, as historical datasets are stale by design; dates are still checked
+ANALYSIS_FRESHNESS_DAYS = None
+# Integrity: foreign keys checked against a reference file,
+# e.g. {"customer_id": {"path": "/data/customers.csv", "column": "id"}}
+ANALYSIS_REFERENCES = {}
+# Categorical validity: list invalid values once per (field, value) with their count, read from
+# the column profile, instead of once per row with its ID (which takes another pass over the rows)
+ANALYSIS_GROUP_INVALID_VALUES = False
+# Progressive results: provisional scores from the first ANALYSIS_PREVIEW_ROWS rows as soon as a
+# job starts (None turns the preview off), refreshed from the partial profile at most every
+# ANALYSIS_PROGRESS_INTERVAL seconds while the full scan runs. The processing page follows them
+# over server-sent events, checking the job every ANALYSIS_EVENTS_INTERVAL seconds.
+ANALYSIS_PREVIEW_ROWS = 5000
+ANALYSIS_PROGRESS_INTERVAL = 2  # seconds
+ANALYSIS_EVENTS_INTERVAL = 0.5  # seconds
+
+
+# Logging
+# Application messages go to stderr from LOG_LEVEL up. Each stage of an analysis and
+# each request render is logged as one JSON line on the `cleaner.timing` logger and
+# counted in the Prometheus metrics at /metrics/. The lines are only logged in development
+# (not while the test suite runs) unless TIMING_LOG_LEVEL is set.
+
+TESTING = sys.argv[1:2] == ['test']
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'standard': {'format': '%(asctime)s - %(levelname)s - %(message)s'},
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'standard'},
+        'timing': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': os.getenv('LOG_LEVEL', 'ERROR'),
+    },
+    'loggers': {
+        'cleaner.timing': {
+            'handlers': ['timing'],
+            'level': os.getenv('TIMING_LOG_LEVEL', 'INFO' if DEBUG and not TESTING else 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+# Show the timing spans of an analysis on its dashboard when opened with ?debug=1
+TIMING_DEBUG_PANEL = DEBUG
+# Serve /metrics/ (per-process timings and LLM cache statistics, without authentication);
+# enable it only where the endpoint is reachable from the monitoring network alone
+METRICS_ENABLED = DEBUG
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 